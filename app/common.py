@@ -1,9 +1,42 @@
-from PySide6.QtCore import QItemSelectionModel, Qt, Signal
-from PySide6.QtGui import QAction, QContextMenuEvent, QKeyEvent
-from PySide6.QtWidgets import QMenu, QTableView
+import dataclasses
+import itertools
+import math
+import operator
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, Protocol, Self
 
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QAbstractTableModel,
+    QItemSelectionModel,
+    QModelIndex,
+    QPersistentModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    QTimer,
+    Signal,
+)
+from PySide6.QtGui import QAction, QColor, QContextMenuEvent, QKeyEvent, QResizeEvent
+from PySide6.QtWidgets import QHeaderView, QMenu, QScrollBar, QStyleOptionViewItem, QTableView
+
+from app.connection import DEVICE_TYPE_ICONS, new_connection_id
+from app.connection_search import ConnectionSearchIndex
+from app.connection_status import (
+    CONNECTION_STATUS_ICONS,
+    UNKNOWN_RESULT,
+    ConnectionStatus,
+    Endpoint,
+    ProbeResult,
+)
+from app.connection_store import ConnectionStore
 from app.utility.resource_provider import get_icon
 
+FETCH_PAGE_SIZE = 256  # Rows built from the store at a time as the table is scrolled
+LAST_SEEN_REFRESH_MS = 60_000  # The ages of last known statuses are shown in minutes
+COLUMN_SIZE_SAMPLE_ROWS = 200  # Most rows measured, besides the visible rows, to size a column to its contents
+# Roles of the cells that change along with the connection status
+STATUS_ROLES = [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.UserRole]
+
 
 class StyleSheets:
     TRANSPARENT_TOOLBUTTON = """
@@ -20,7 +53,10 @@ class StyleSheets:
 
 
 class ViewBase(QTableView):
-    """Base class for all table views in the application."""
+    """Base class for all table views in the application.
+
+    The view may show its model through a filter; the rows in its signals are always rows of the model being filtered.
+    """
 
     item_activated = Signal(int)
     new_item = Signal()
@@ -28,6 +64,8 @@ class ViewBase(QTableView):
     duplicate_item = Signal(int)
     delete_item = Signal(int)
     copy_command = Signal(int)
+    visible_rows_changed = Signal(list)  # rows on screen
+    focused_row_changed = Signal(int)  # selected or hovered row
 
     def __init__(self):
         super().__init__()
@@ -36,6 +74,20 @@ class ViewBase(QTableView):
         self.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.setSortingEnabled(False)
+        self.setMouseTracking(True)  # For hover hints through the entered signal
+        vertical_header = self.verticalHeader()
+        assert isinstance(vertical_header, QHeaderView)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)  # Rows are never measured one by one
+        self._fitted_columns: list[int] = []
+        self._column_widths: dict[int, int] = {}  # Column -> width fitted to its contents
+        # Rows changed within one pass of the event loop are measured together
+        self._fit_span: tuple[int, int] | None = None  # First and last changed row
+        self._fit_pending_columns: set[int] = set()
+        self._refit_pending = False
+        self._fit_timer = QTimer(self)
+        self._fit_timer.setSingleShot(True)
+        self._fit_timer.setInterval(0)
+        self._fit_timer.timeout.connect(self._fit_pending)
 
         self.new_action = QAction(get_icon("new.png"), "New")
         self.edit_action = QAction(get_icon("pencil.png"), "Edit")
@@ -50,12 +102,63 @@ class ViewBase(QTableView):
         self.menu.addSeparator()
         self.menu.addAction(self.copy_command_action)
 
-        self.doubleClicked.connect(lambda: self.item_activated.emit(self.currentIndex().row()))
+        self.doubleClicked.connect(lambda: self.item_activated.emit(self._source_row(self.currentIndex())))
         self.new_action.triggered.connect(self.new_item)
-        self.edit_action.triggered.connect(lambda: self.edit_item.emit(self.currentIndex().row()))
-        self.duplicate_action.triggered.connect(lambda: self.duplicate_item.emit(self.currentIndex().row()))
-        self.delete_action.triggered.connect(lambda: self.delete_item.emit(self.currentIndex().row()))
-        self.copy_command_action.triggered.connect(lambda: self.copy_command.emit(self.currentIndex().row()))
+        self.edit_action.triggered.connect(lambda: self.edit_item.emit(self._source_row(self.currentIndex())))
+        self.duplicate_action.triggered.connect(lambda: self.duplicate_item.emit(self._source_row(self.currentIndex())))
+        self.delete_action.triggered.connect(lambda: self.delete_item.emit(self._source_row(self.currentIndex())))
+        self.copy_command_action.triggered.connect(
+            lambda: self.copy_command.emit(self._source_row(self.currentIndex()))
+        )
+        self.entered.connect(lambda index: self.focused_row_changed.emit(self._source_row(index)))
+        scroll_bar = self.verticalScrollBar()
+        assert isinstance(scroll_bar, QScrollBar)
+        scroll_bar.valueChanged.connect(self._on_viewport_changed)
+
+    def setModel(self, model: QAbstractItemModel | None) -> None:
+        super().setModel(model)
+        selection_model = self.selectionModel()
+        assert isinstance(selection_model, QItemSelectionModel)
+        selection_model.currentRowChanged.connect(self._on_current_row_changed)
+        # Columns are fitted to the rows of the model being filtered, so changing the filter doesn't resize them
+        source_model = self._source_model()
+        if source_model is not None:
+            source_model.rowsInserted.connect(
+                lambda _parent, first, last: self._queue_fit(first, last, self._fitted_columns)
+            )
+            source_model.dataChanged.connect(self._on_data_changed)
+            source_model.rowsRemoved.connect(self._queue_refit)
+            source_model.modelReset.connect(self._queue_refit)
+
+    def fit_columns_to_contents(self, columns: list[int]) -> None:
+        """Size columns to their contents, measuring a bounded sample of rows rather than every row.
+
+        The widths are kept and only widened as rows are added or changed. They are measured again from scratch when
+        rows are removed or the model is reset.
+        """
+        header = self.horizontalHeader()
+        assert isinstance(header, QHeaderView)
+        for column in columns:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Interactive)
+        self._fitted_columns = columns
+        self._queue_refit()
+
+    def visible_rows(self) -> list[int]:
+        """Get the rows on screen."""
+        first, last = self._visible_view_rows()
+        model = self.model()
+        if isinstance(model, QSortFilterProxyModel):
+            return [model.mapToSource(model.index(row, 0)).row() for row in range(first, last + 1)]
+        return list(range(first, last + 1))
+
+    def current_row(self) -> int | None:
+        """Get the row of the current item, or None if there is no current item."""
+        index = self.currentIndex()
+        return self._source_row(index) if index.isValid() else None
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self._on_viewport_changed()
 
     def contextMenuEvent(self, event: QContextMenuEvent | None) -> None:
         assert event is not None
@@ -71,9 +174,9 @@ class ViewBase(QTableView):
         assert event is not None
         if self.currentIndex().isValid():
             if event.key() == Qt.Key.Key_Delete:
-                self.delete_item.emit(self.currentIndex().row())
+                self.delete_item.emit(self._source_row(self.currentIndex()))
             elif event.key() == Qt.Key.Key_Return:
-                self.item_activated.emit(self.currentIndex().row())
+                self.item_activated.emit(self._source_row(self.currentIndex()))
             elif event.key() == Qt.Key.Key_Escape:
                 selection_model = self.selectionModel()
                 assert isinstance(selection_model, QItemSelectionModel)
@@ -83,3 +186,505 @@ class ViewBase(QTableView):
                 super().keyPressEvent(event)
         else:
             super().keyPressEvent(event)
+
+    def _visible_view_rows(self) -> tuple[int, int]:
+        """Get the first and last rows of the view on screen. The last row is before the first if none are visible."""
+        model = self.model()
+        row_count = model.rowCount() if model is not None else 0
+        first = self.rowAt(0)
+        if first < 0:
+            return (0, -1)
+        last = self.rowAt(self.viewport().height() - 1)
+        return (first, last if last >= 0 else row_count - 1)
+
+    def _source_model(self) -> QAbstractItemModel | None:
+        model = self.model()
+        return model.sourceModel() if isinstance(model, QSortFilterProxyModel) else model
+
+    def _source_row(self, index: QModelIndex | QPersistentModelIndex) -> int:
+        model = self.model()
+        if isinstance(model, QSortFilterProxyModel):
+            return model.mapToSource(index).row()
+        return index.row()
+
+    def _on_viewport_changed(self) -> None:
+        rows = self.visible_rows()
+        if rows:
+            self.visible_rows_changed.emit(rows)
+
+    def _on_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, _roles: list[int]) -> None:
+        columns = [col for col in self._fitted_columns if top_left.column() <= col <= bottom_right.column()]
+        if columns:
+            self._queue_fit(top_left.row(), bottom_right.row(), columns)
+
+    def _queue_fit(self, first: int, last: int, columns: list[int]) -> None:
+        if self._fit_span is not None:
+            first, last = min(first, self._fit_span[0]), max(last, self._fit_span[1])
+        self._fit_span = (first, last)
+        self._fit_pending_columns.update(columns)
+        self._fit_timer.start()
+
+    def _queue_refit(self) -> None:
+        self._refit_pending = True
+        self._fit_timer.start()
+
+    def _fit_pending(self) -> None:
+        model = self._source_model()
+        if self._refit_pending:
+            self._column_widths = {}
+            if model is not None:
+                self._fit_rows(0, model.rowCount() - 1, self._fitted_columns)
+        elif self._fit_span is not None and model is not None:
+            first, last = self._fit_span
+            self._fit_rows(first, min(last, model.rowCount() - 1), sorted(self._fit_pending_columns))
+        self._fit_span = None
+        self._fit_pending_columns.clear()
+        self._refit_pending = False
+
+    def _fit_rows(self, first: int, last: int, columns: list[int]) -> None:
+        """Widen columns to fit a sample of the rows between two rows (inclusive) of the model being filtered."""
+        model = self._source_model()
+        header = self.horizontalHeader()
+        assert isinstance(header, QHeaderView)
+        if model is None or not columns:
+            return
+        rows = self._sample_rows(first, last)
+        # The rows may be filtered out of the view, so they are measured by the delegate rather than the view
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        delegate = self.itemDelegate()
+        for column in columns:
+            width = max((delegate.sizeHint(option, model.index(row, column)).width() for row in rows), default=0)
+            width = max(width, self._column_widths.get(column) or header.sectionSizeHint(column))
+            if width != self._column_widths.get(column):
+                self._column_widths[column] = width
+                header.resizeSection(column, width)
+
+    def _sample_rows(self, first: int, last: int) -> set[int]:
+        """Get evenly spread rows between two rows (inclusive), and the visible rows among them."""
+        step = max(1, math.ceil((last - first + 1) / COLUMN_SIZE_SAMPLE_ROWS))
+        rows = set(range(first, last + 1, step))
+        rows.update(row for row in self.visible_rows() if first <= row <= last)
+        return rows
+
+    def _on_current_row_changed(self, current: QModelIndex, _previous: QModelIndex) -> None:
+        if current.isValid():
+            self.focused_row_changed.emit(self._source_row(current))
+
+
+class Connection(Protocol):
+    id: str
+    device_type: str
+    name: str
+
+    def to_dict(self) -> dict: ...
+
+    def copy(self) -> Self: ...
+
+
+@dataclasses.dataclass(frozen=True)
+class Column[ConnectionT: Connection]:
+    """A column of a connection table and how each role of its cells is found.
+
+    Cell functions take the item of the row and the result of the last connection check of the item.
+    """
+
+    header: str
+    value: Callable[[ConnectionT, ProbeResult], Any]
+    display: Callable[[Any], Any] | None = None  # Formats the value for display; the value is shown as-is if None
+    user: Callable[[ConnectionT, ProbeResult], Any] | None = None  # Value for the user role, if not `value`
+    decoration: Callable[[ConnectionT, ProbeResult], Any] | None = None
+    status: bool = False  # The cells show the connection check result, which changes without the item changing
+
+
+def item_column(
+    header: str, attribute: str, display: Callable[[Any], Any] | None = None, device_icon: bool = False
+) -> Column:
+    """Get a column showing an attribute of the items, optionally with the device type icon of the item."""
+    get_attribute = operator.attrgetter(attribute)
+    return Column(
+        header,
+        value=lambda item, _result: get_attribute(item),
+        display=display,
+        decoration=(lambda item, _result: get_icon(DEVICE_TYPE_ICONS[item.device_type])) if device_icon else None,
+    )
+
+
+STATUS_COLUMN = Column(
+    "Status",
+    value=lambda _item, result: result,
+    display=ProbeResult.status_text,
+    user=lambda _item, result: result.status.value,
+    decoration=lambda _item, result: get_icon(CONNECTION_STATUS_ICONS[result.status]),
+    status=True,
+)
+LATENCY_COLUMN = Column(
+    "Latency",
+    value=lambda _item, result: result,
+    display=ProbeResult.latency_text,
+    user=lambda _item, result: result.latency_ms,
+    status=True,
+)
+SERVER_COLUMN = Column(
+    "Server",
+    value=lambda _item, result: result,
+    display=ProbeResult.server_version,
+    user=lambda _item, result: result.banner,
+    status=True,
+)
+
+
+def contiguous_ranges(rows: list[int]) -> Iterator[tuple[int, int]]:
+    """Group sorted rows into runs of consecutive rows, as (first, last) pairs (inclusive)."""
+    for _, run in itertools.groupby(enumerate(rows), lambda pair: pair[1] - pair[0]):
+        run_rows = [row for _, row in run]
+        yield run_rows[0], run_rows[-1]
+
+
+class ModelBase[ConnectionT: Connection](QAbstractTableModel):
+    """Base class for all connection table models in the application.
+
+    Keeps the connections of a table alongside the result of the last connection check of each one, and writes every
+    change to the connection store of the table. Rows are indexed by the ID of their item and by the endpoint it uses,
+    so that a check result is applied without searching the table. The search fields of each item are kept in a search
+    index, which `ConnectionFilterModel` uses to filter the table.
+
+    Rows are read from the store a page at a time through `canFetchMore`/`fetchMore` as the view scrolls, so only the
+    rows that have been shown are built into items. Adding an item reads the rest of the store first.
+
+    Cells are described by a list of columns that `data` indexes into. The display values of the columns showing the
+    item are formatted once per row and cached until the item changes.
+    """
+
+    endpoints_changed = Signal()  # The set of endpoints used by the items may have changed
+
+    def __init__(
+        self,
+        columns: list[Column[ConnectionT]],
+        store: ConnectionStore,
+        from_dict: Callable[[dict], ConnectionT],
+        endpoint: Callable[[ConnectionT], Endpoint],
+        search_fields: list[str],
+    ) -> None:
+        super().__init__()
+        self.items: list[ConnectionT] = []
+        self.probe_results: list[ProbeResult] = []
+        self._display_rows: list[tuple | None] = []  # Display values of each row, built when the row is first shown
+        self.columns = columns
+        self.store = store
+        self.from_dict = from_dict
+        self.endpoint = endpoint  # Gets the endpoint that is checked to find the connection status of an item
+        self.search_fields = search_fields  # Fields of the items that the table can be filtered by
+        self.search_index = ConnectionSearchIndex()
+        self._rows: dict[str, int] = {}  # ID -> row of each item
+        self._endpoint_ids: dict[Endpoint, set[str]] = {}  # Endpoint -> IDs of the items using it
+        self._unfetched: Iterator[dict] | None = None  # Rows of the store not yet built into items
+        self._cached_result: Callable[[Endpoint], ProbeResult | None] | None = None
+        status_columns = [col for col, column in enumerate(columns) if column.status]
+        self._status_columns = (status_columns[0], status_columns[-1]) if status_columns else None
+        # Results arriving within one pass of the event loop are shown together
+        self._status_changed_ids: set[str] = set()
+        self._status_timer = QTimer(self)
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(0)
+        self._status_timer.timeout.connect(self._emit_status_changes)
+        # The ages of last known statuses are shown ticking while any are on display
+        self._last_seen_timer = QTimer(self)
+        self._last_seen_timer.setInterval(LAST_SEEN_REFRESH_MS)
+        self._last_seen_timer.timeout.connect(self._refresh_last_seen)
+        self._load()
+
+    def endpoints(self, first: int = 0, last: int | None = None) -> list[Endpoint]:
+        """Get the endpoint of every item in the model, or of the items between two rows (inclusive)."""
+        items = self.items if last is None else self.items[first : last + 1]
+        return [self.endpoint(item) for item in items]
+
+    def add(self, item: ConnectionT) -> None:
+        """Add an item to the end of the model."""
+        self.fetch_all()
+        row = len(self.items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.items.append(item)
+        self.probe_results.append(UNKNOWN_RESULT)
+        self._display_rows.append(None)
+        self._index(row)
+        self.endInsertRows()
+        self.store.append(item.to_dict())
+        self.endpoints_changed.emit()
+
+    def delete(self, row: int) -> None:
+        """Delete an item from the model by row."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._unindex(self.items.pop(row))
+        self.probe_results.pop(row)
+        self._display_rows.pop(row)
+        for later_row in range(row, len(self.items)):
+            self._rows[self.items[later_row].id] = later_row
+        self.endRemoveRows()
+        self.store.delete(row)
+        self.endpoints_changed.emit()
+
+    def move_up(self, row: int) -> None:
+        """Move an item up one row."""
+        if row > 0:
+            self._move(row, row - 1)
+
+    def move_down(self, row: int) -> None:
+        """Move an item down one row."""
+        if row < len(self.items) - 1:
+            self._move(row, row + 1)
+
+    def get(self, row: int) -> ConnectionT:
+        """Get an item from the model by row."""
+        return self.items[row]
+
+    def row(self, item_id: str) -> int | None:
+        """Get the row of an item by ID, or None if no item has the ID."""
+        return self._rows.get(item_id)
+
+    def update(self, row: int, item: ConnectionT) -> None:
+        """Replace the item in a row, keeping the ID of the item it replaces.
+
+        The connection status of the row becomes unknown until it is checked again.
+        """
+        item.id = self.items[row].id
+        self._unindex(self.items[row])
+        self.items[row] = item
+        self.probe_results[row] = UNKNOWN_RESULT
+        self._display_rows[row] = None
+        self._index(row)
+        self.store.update(row, item.to_dict())
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+        self.endpoints_changed.emit()
+
+    def reset_connection_statuses(self) -> None:
+        """Set the connection status of every item back to unknown, keeping the latency history on display.
+
+        Last known statuses stay on display until the items are checked.
+        """
+        if self.items:
+            self.probe_results = [
+                r if r.cached else dataclasses.replace(r, status=ConnectionStatus.UNKNOWN) for r in self.probe_results
+            ]
+            self._emit_status_changed(0, len(self.items) - 1)
+
+    def restore_connection_statuses(self, cached_result: Callable[[Endpoint], ProbeResult | None]) -> None:
+        """Show the last known status of every item that hasn't been checked yet, e.g. from a previous session.
+
+        Items fetched later start with their last known status too.
+        """
+        self._cached_result = cached_result
+        for row, item in enumerate(self.items):
+            if self.probe_results[row].status == ConnectionStatus.UNKNOWN:
+                self.probe_results[row] = cached_result(self.endpoint(item)) or self.probe_results[row]
+        if self.items:
+            self._emit_status_changed(0, len(self.items) - 1)
+        self._last_seen_timer.start()
+
+    def new_connection_status(self, host: str, port: int, result: ProbeResult) -> None:
+        """Apply the result of a network check to every item using the checked endpoint.
+
+        The view is told about the change once the current pass of the event loop is over, together with every other
+        result that arrived during it. An unknown result doesn't replace a last known status, as nothing was learned.
+        """
+        # Items that were deleted or edited since the check started simply won't match
+        item_ids = self._endpoint_ids.get((host, port), ())
+        if result.status == ConnectionStatus.UNKNOWN:
+            item_ids = [item_id for item_id in item_ids if not self.probe_results[self._rows[item_id]].cached]
+        for item_id in item_ids:
+            self.probe_results[self._rows[item_id]] = result
+        self._queue_status_changed(item_ids)
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        return not parent.isValid() and self._unfetched is not None
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        if not parent.isValid():
+            self._fetch(FETCH_PAGE_SIZE)
+
+    def fetch_all(self) -> None:
+        """Build every row of the store that hasn't been fetched yet."""
+        while self._unfetched is not None:
+            self._fetch(FETCH_PAGE_SIZE)  # A page at a time, so the rows being built never pile up
+
+    def data(
+        self,
+        index: QModelIndex | QPersistentModelIndex = QModelIndex(),  # noqa: B008
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if not index.isValid():
+            return None
+        col = index.column()
+        row = index.row()
+        column = self.columns[col]
+
+        if role == Qt.ItemDataRole.DisplayRole:  # What's displayed to the user
+            if column.status:
+                value = column.value(self.items[row], self.probe_results[row])
+                return column.display(value) if column.display is not None else value
+            display_row = self._display_rows[row]
+            if display_row is None:
+                display_row = self._display_rows[row] = self._display_row(row)
+            return display_row[col]
+        if role == Qt.ItemDataRole.DecorationRole:
+            if column.decoration is not None:
+                return column.decoration(self.items[row], self.probe_results[row])
+        elif role == Qt.ItemDataRole.UserRole:  # Application-specific purposes
+            get_user_value = column.user if column.user is not None else column.value
+            return get_user_value(self.items[row], self.probe_results[row])
+        return None
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:  # noqa: B008
+        return len(self.items)
+
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:  # noqa: B008
+        return len(self.columns)
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex = QModelIndex()) -> Qt.ItemFlag:  # noqa: B008
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.columns[section].header
+            if role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor(Qt.GlobalColor.gray)
+
+    def _move(self, row: int, new_row: int) -> None:
+        # Qt expects the destination of a move to be the row the item is placed before
+        destination = new_row if new_row < row else new_row + 1
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        self.items.insert(new_row, self.items.pop(row))
+        self.probe_results.insert(new_row, self.probe_results.pop(row))
+        self._display_rows.insert(new_row, self._display_rows.pop(row))
+        for moved_row in range(min(row, new_row), max(row, new_row) + 1):
+            self._rows[self.items[moved_row].id] = moved_row
+        self.endMoveRows()
+        self.store.move(row, new_row)
+
+    def _queue_status_changed(self, item_ids: Iterable[str]) -> None:
+        """Tell the view that the status columns of items changed, once the current pass of the event loop is over."""
+        self._status_changed_ids.update(item_ids)
+        if self._status_changed_ids and not self._status_timer.isActive():
+            self._status_timer.start()
+
+    def _refresh_last_seen(self) -> None:
+        """Show the new age of the last known statuses, until every item that can have one has been checked."""
+        item_ids = [item.id for item, result in zip(self.items, self.probe_results, strict=True) if result.cached]
+        if item_ids:
+            self._queue_status_changed(item_ids)
+        elif self._unfetched is None:
+            self._last_seen_timer.stop()
+
+    def _emit_status_changes(self) -> None:
+        # Rows are looked up now, as items may have moved or been deleted since their result arrived
+        rows = sorted(row for item_id in self._status_changed_ids if (row := self._rows.get(item_id)) is not None)
+        self._status_changed_ids.clear()
+        for first, last in contiguous_ranges(rows):
+            self._emit_status_changed(first, last)
+
+    def _emit_status_changed(self, first: int, last: int) -> None:
+        """Tell the view that the connection status of the rows between two rows (inclusive) changed."""
+        if self._status_columns is not None:
+            first_col, last_col = self._status_columns
+            self.dataChanged.emit(self.index(first, first_col), self.index(last, last_col), STATUS_ROLES)
+
+    def _display_row(self, row: int) -> tuple:
+        item = self.items[row]
+        values = []
+        for column in self.columns:
+            if column.status:
+                values.append(None)  # Shown from the latest result instead
+                continue
+            value = column.value(item, UNKNOWN_RESULT)
+            values.append(column.display(value) if column.display is not None else value)
+        return tuple(values)
+
+    def _index(self, row: int) -> None:
+        item = self.items[row]
+        self._rows[item.id] = row
+        self._endpoint_ids.setdefault(self.endpoint(item), set()).add(item.id)
+        self.search_index.add(item.id, [str(getattr(item, field)) for field in self.search_fields])
+
+    def _unindex(self, item: ConnectionT) -> None:
+        del self._rows[item.id]
+        endpoint = self.endpoint(item)
+        ids = self._endpoint_ids[endpoint]
+        ids.discard(item.id)
+        if not ids:
+            del self._endpoint_ids[endpoint]
+        self.search_index.remove(item.id)
+
+    def _load(self):
+        self._unfetched = iter(self.store.load(self._snapshot))
+        self._fetch(FETCH_PAGE_SIZE)
+
+    def _snapshot(self) -> list[dict]:
+        return [item.to_dict() for item in self.items]  # The store keeps the rows that haven't been fetched
+
+    def _fetch(self, count: int) -> None:
+        """Build up to `count` more rows from the store."""
+        if self._unfetched is None:
+            return
+        fetched = list(itertools.islice(self._unfetched, count))
+        if len(fetched) < count:
+            self._unfetched = None
+        if not fetched:
+            return
+
+        first = len(self.items)
+        self.beginInsertRows(QModelIndex(), first, first + len(fetched) - 1)
+        new_ids = []
+        for row, data in enumerate(fetched, start=first):
+            item = self.from_dict(data)
+            if item.id in self._rows:  # Entries copied by hand within the file
+                item.id = new_connection_id()
+            if item.id != data.get("id"):
+                new_ids.append(row)
+            self.items.append(item)
+            cached = self._cached_result(self.endpoint(item)) if self._cached_result is not None else None
+            self.probe_results.append(cached or UNKNOWN_RESULT)
+            self._display_rows.append(None)
+            self._index(row)
+        self.endInsertRows()
+        for row in new_ids:
+            self.store.update(row, self.items[row].to_dict())  # Keep the IDs given to items from older files
+        self.endpoints_changed.emit()
+
+
+class ConnectionFilterModel(QSortFilterProxyModel):
+    """Shows the rows of a connection table that match a search query, using the search index of the table."""
+
+    def __init__(self, model: ModelBase) -> None:
+        super().__init__()
+        self.model = model
+        # IDs of the connections to show, or None to show every row. This is the set returned by the search index,
+        # which keeps it up to date as connections are added, edited and deleted.
+        self._matches: set[str] | None = None
+        self.setSourceModel(model)
+
+    def set_query(self, query: str) -> None:
+        """Show only the connections whose searchable fields contain the query. An empty query shows every row."""
+        search_index = self.model.search_index
+        if query.strip():
+            self.model.fetch_all()  # Rows that haven't been fetched yet could match too
+        narrowing = search_index.query in query.strip().lower()
+        matches = search_index.search(query)
+        if matches == self._matches:
+            self._matches = matches  # The same rows, so the view doesn't need to change
+        elif narrowing:
+            # Narrowing the query only hides rows
+            self.beginFilterChange()
+            self._matches = matches
+            self.endFilterChange(QSortFilterProxyModel.Direction.Rows)
+        else:
+            # Rows shown again would be inserted into the view a run at a time, which is slow in a long table, so the
+            # view is laid out again instead
+            self._matches = matches
+            self.invalidate()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex | QPersistentModelIndex) -> bool:
+        matches = self._matches
+        return matches is None or self.model.items[source_row].id in matches
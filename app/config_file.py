@@ -1,24 +1,51 @@
+import contextlib
 import json
+import logging
 import os
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
 from sys import platform
+from typing import Any, ClassVar
+
+from PySide6.QtCore import QTimer
+
+from app.utility.json_stream import iter_json_array
 
 APP_DIR = "grasshopper"
+DEFAULT_WRITE_DELAY_MS = 500  # Quiet period after the last save before a write-behind file is written
+MAX_WRITE_DELAY = 5.0  # Seconds a write-behind file can stay unwritten while saves keep arriving
 
 
 class ConfigFile:
-    """A generic configuration file that can be saved and loaded from disk."""
+    """A generic configuration file that can be saved and loaded from disk.
+
+    Files are written to a temporary file that replaces the original once it is complete, so a crash can't leave a
+    half-written file behind. In write-behind mode (`write_delay_ms` > 0) a burst of saves is coalesced into a single
+    write of the latest data once no more saves arrive for `write_delay_ms`. Call `flush_all` before exiting so that no
+    pending data is lost. The data to save can be given as a function, which is only called when the file is written.
+    """
 
-    def __init__(self, name: str):
+    _unwritten: ClassVar[set["ConfigFile"]] = set()  # Write-behind files with data waiting to be written
+
+    def __init__(self, name: str, indent: int | None = 4, write_delay_ms: int = 0):
         self.name = name
+        self.indent = indent  # None writes the file as compactly as possible
+        self.write_delay_ms = write_delay_ms
         if platform == "win32":
             self.path = os.path.join(os.environ["APPDATA"], APP_DIR, name)
         elif platform == "linux":
             self.path = os.path.join(os.environ["HOME"], ".config", APP_DIR, name)
         else:
             raise NotImplementedError(f"Platform '{platform}' is not supported")
+        self._pending: Callable[[], dict] | None = None
+        self._pending_since = 0.0
+        self._write_timer: QTimer | None = None
 
     def load(self) -> dict:
         """Loads the configuration file from disk into a dictionary."""
+        if self._pending is not None:
+            return self._pending()
         if not os.path.exists(self.path):
             return {}
         with open(self.path) as file:
@@ -27,9 +54,99 @@ class ConfigFile:
             except json.JSONDecodeError:
                 return {}
 
-    def save(self, data: dict):
-        """Saves the configuration file to disk."""
-        if not os.path.exists(os.path.dirname(self.path)):
-            os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        with open(self.path, "w") as file:
-            file.write(json.dumps(data, indent=4))
+    def stream(self, key: str) -> Iterator[Any]:
+        """Yields the elements of a list in the configuration file one at a time, without loading the whole file."""
+        if self._pending is not None:
+            yield from self._pending().get(key, [])
+            return
+        yield from self.stream_saved(key)
+
+    def stream_saved(self, key: str) -> Iterator[Any]:
+        """Yields the elements of a list as the file was last written to disk, ignoring data waiting to be saved."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as file:
+            try:
+                yield from iter_json_array(file, key)
+            except json.JSONDecodeError as error:
+                logging.warning(f"Stopped reading '{self.name}' at an error: {error}")
+
+    def save(self, data: dict | Callable[[], dict]):
+        """Saves the configuration file to disk, or schedules the save in write-behind mode."""
+        get_data = data if callable(data) else lambda: data
+        if self.write_delay_ms <= 0:
+            self._write(get_data())
+            return
+
+        if self._pending is None:
+            self._pending_since = time.monotonic()
+        self._pending = get_data
+        ConfigFile._unwritten.add(self)
+        if time.monotonic() - self._pending_since >= MAX_WRITE_DELAY:
+            self.flush()  # Don't let a steady stream of saves hold the data back indefinitely
+            return
+        if self._write_timer is None:
+            self._write_timer = QTimer()
+            self._write_timer.setSingleShot(True)
+            self._write_timer.timeout.connect(self.flush)
+        self._write_timer.start(self.write_delay_ms)  # Restarting the timer extends the quiet period
+
+    def flush(self):
+        """Write any data waiting to be saved."""
+        if self._pending is not None:
+            data = self._pending()  # Saves made while getting the data are included in it
+            self._pending = None
+            self._write(data)
+        if self._write_timer is not None:
+            self._write_timer.stop()
+        ConfigFile._unwritten.discard(self)
+
+    @classmethod
+    def flush_all(cls):
+        """Write the data waiting to be saved in every configuration file."""
+        for config_file in list(cls._unwritten):
+            config_file.flush()
+
+    def read_lines(self) -> Iterator[str]:
+        """Yields the lines of a configuration file kept as a log, one line per record."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as file:
+            for line in file:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+    def append_line(self, line: str):
+        """Adds a record to the end of a configuration file kept as a log, without rewriting the rest of it."""
+        self.ensure_directory()
+        with open(self.path, "a") as file:
+            file.write(line + "\n")
+
+    def write_lines(self, lines: Iterable[str]):
+        """Replaces the records of a configuration file kept as a log, e.g. to compact it."""
+        self._write_text("".join(line + "\n" for line in lines))
+
+    def ensure_directory(self):
+        """Create the directory of the configuration file if it doesn't exist yet."""
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def _write(self, data: dict):
+        separators = (",", ":") if self.indent is None else None
+        self._write_text(json.dumps(data, indent=self.indent, separators=separators))
+
+    def _write_text(self, text: str):
+        self.ensure_directory()
+        directory = os.path.dirname(self.path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{self.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
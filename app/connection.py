@@ -1,5 +1,10 @@
-from dataclasses import dataclass
+import dataclasses
+import sys
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any, ClassVar, Self
 
 
 class DeviceType(str, Enum):
@@ -23,12 +28,64 @@ DEVICE_TYPE_ICONS = {
 }
 
 
-@dataclass
-class DirectConnection:
+def new_connection_id() -> str:
+    """Get a new identifier that stays with a connection for as long as it exists, even if it is edited or moved."""
+    return uuid.uuid4().hex
+
+
+class ConnectionBase(ABC):
+    """Conversion to and from dictionaries and copying for the connection dataclasses, driven by a table of fields.
+
+    Connections are slotted. When loaded, device types are replaced by their enum member and the string fields named in
+    `_INTERNED_FIELDS` are interned, since the same users, keys and hosts are repeated across many rows.
+    """
+
+    __slots__ = ()
+    _FIELDS: ClassVar[tuple[str, ...]] = ()  # Names of the dataclass fields, in order
+    _DEFAULTS: ClassVar[dict[str, Any]] = {}  # Default value of every field except the ID
+    _INTERNED_FIELDS: ClassVar[frozenset[str]] = frozenset()
+
+    @classmethod
+    @abstractmethod
+    def default(cls) -> Self:
+        """Get a connection containing default values."""
+
+    def to_dict(self) -> dict:
+        """Convert the connection to a dictionary."""
+        return {name: getattr(self, name) for name in self._FIELDS}
+
+    def copy(self) -> Self:
+        """Create a copy of the connection. The copy is a separate connection with its own ID."""
+        return type(self)(**{name: getattr(self, name) for name in self._DEFAULTS})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        """Create a connection from a dictionary. If a key is not present, the default value will be used."""
+        values = {name: data.get(name, default) for name, default in cls._DEFAULTS.items()}
+        if values["device_type"] in DeviceType:
+            values["device_type"] = DeviceType(values["device_type"])  # Every row shares the enum member
+        else:
+            values["device_type"] = cls._DEFAULTS["device_type"]
+        for name in cls._INTERNED_FIELDS:
+            if type(values[name]) is str:
+                values[name] = sys.intern(values[name])
+        return cls(**values, id=data.get("id") or new_connection_id())
+
+
+def _with_field_table[ConnectionT: ConnectionBase](cls: type[ConnectionT]) -> type[ConnectionT]:
+    cls._FIELDS = tuple(f.name for f in dataclasses.fields(cls))  # type: ignore[arg-type]
+    cls._DEFAULTS = {name: value for name, value in cls.default().to_dict().items() if name != "id"}
+    return cls
+
+
+@_with_field_table
+@dataclass(slots=True)
+class DirectConnection(ConnectionBase):
     """A direct connection to a server using SSH."""
 
     DEFAULT_PORT = 22
     DEFAULT_DEVICE_TYPE = DeviceType.SERVER
+    _INTERNED_FIELDS = frozenset({"user", "key"})
 
     device_type: str
     name: str
@@ -37,72 +94,40 @@ class DirectConnection:
     port: int
     key: str
     notes: str
+    id: str = field(default_factory=new_connection_id, compare=False)
 
-    def command(self) -> str:
-        """Get the command to connect to the server."""
-        key_arg = f"-i {self.key}" if self.key else ""
-        return f"ssh {key_arg} {self.user}@{self.host} -p{self.port}"
+    def command(self, ssh_options: str = "") -> str:
+        """Get the command to connect to the server.
 
-    def to_dict(self) -> dict:
-        """Convert the direct connection to a dictionary."""
-        return {
-            "device_type": self.device_type,
-            "name": self.name,
-            "user": self.user,
-            "host": self.host,
-            "port": self.port,
-            "key": self.key,
-            "notes": self.notes,
-        }
-
-    def copy(self) -> "DirectConnection":
-        """Create a copy of the direct connection."""
-        return DirectConnection(
-            device_type=self.device_type,
-            name=self.name,
-            user=self.user,
-            host=self.host,
-            port=self.port,
-            key=self.key,
-            notes=self.notes,
-        )
+        Args:
+            ssh_options (str): Extra options for ssh, e.g. to share a connection to the server.
+        """
+        key_arg = f"-i {self.key}" if self.key else ""
+        return f"ssh {ssh_options} {key_arg} {self.user}@{self.host} -p{self.port}"
 
-    @staticmethod
-    def default() -> "DirectConnection":
+    @classmethod
+    def default(cls) -> "DirectConnection":
         """Get a direct connection containing default values."""
-        return DirectConnection(
-            device_type=DirectConnection.DEFAULT_DEVICE_TYPE,
+        return cls(
+            device_type=cls.DEFAULT_DEVICE_TYPE,
             name="",
             user="",
             host="",
-            port=DirectConnection.DEFAULT_PORT,
+            port=cls.DEFAULT_PORT,
             key="",
             notes="",
         )
 
-    @staticmethod
-    def from_dict(data: dict) -> "DirectConnection":
-        """Create a direct connection from a dictionary. If a key is not present, the default value will be used."""
-        direct_connection = DirectConnection.default()
-        device_type = data.get("device_type")
-        if device_type is not None and device_type in DeviceType:
-            direct_connection.device_type = device_type
-        direct_connection.name = data.get("name", direct_connection.name)
-        direct_connection.user = data.get("user", direct_connection.user)
-        direct_connection.host = data.get("host", direct_connection.host)
-        direct_connection.port = data.get("port", direct_connection.port)
-        direct_connection.key = data.get("key", direct_connection.key)
-        direct_connection.notes = data.get("notes", direct_connection.notes)
-        return direct_connection
-
-
-@dataclass
-class PortForward:
+
+@_with_field_table
+@dataclass(slots=True)
+class PortForward(ConnectionBase):
     """A port forwarding connection to a server using SSH."""
 
     DEFAULT_SSH_PORT = 22
     DEFAULT_FORWARD_PORT = 8080
     DEFAULT_DEVICE_TYPE = DeviceType.SERVER
+    _INTERNED_FIELDS = frozenset({"target_host", "remote_server_user", "remote_server_host", "key"})
 
     device_type: str
     name: str
@@ -114,82 +139,58 @@ class PortForward:
     remote_server_host: str
     remote_server_port: int
     key: str
+    id: str = field(default_factory=new_connection_id, compare=False)
 
-    def command(self) -> str:
+    def command(self, ssh_options: str = "") -> str:
         key_arg = f"-i {self.key}" if self.key else ""
         remote_server_arg = f"{self.remote_server_user}@{self.remote_server_host} -p{self.remote_server_port}"
-        return f"ssh -N -L {self.local_port}:{self.target_host}:{self.target_port} {remote_server_arg} {key_arg}"
-
-    def to_dict(self) -> dict:
-        """Convert the port forward to a dictionary."""
-        return {
-            "device_type": self.device_type,
-            "name": self.name,
-            "notes": self.notes,
-            "local_port": self.local_port,
-            "target_host": self.target_host,
-            "target_port": self.target_port,
-            "remote_server_user": self.remote_server_user,
-            "remote_server_host": self.remote_server_host,
-            "remote_server_port": self.remote_server_port,
-            "key": self.key,
-        }
-
-    def copy(self) -> "PortForward":
-        """Create a copy of the port forward."""
-        return PortForward(
-            device_type=self.device_type,
-            name=self.name,
-            notes=self.notes,
-            local_port=self.local_port,
-            target_host=self.target_host,
-            target_port=self.target_port,
-            remote_server_user=self.remote_server_user,
-            remote_server_host=self.remote_server_host,
-            remote_server_port=self.remote_server_port,
-            key=self.key,
-        )
-
-    @staticmethod
-    def default() -> "PortForward":
+        forward_arg = f"-L {self.forward_argument()}"
+        return f"ssh {ssh_options} -N {forward_arg} {remote_server_arg} {key_arg}"
+
+    def forward_argument(self, local_port: int | None = None) -> str:
+        """Get the argument of -L that sets up the forward, e.g. '8080:localhost:80'.
+
+        Args:
+            local_port (int | None): Loopback port to listen on in place of the local port, e.g. behind a relay.
+        """
+        if local_port is not None:
+            return f"127.0.0.1:{local_port}:{self.target_host}:{self.target_port}"
+        return f"{self.local_port}:{self.target_host}:{self.target_port}"
+
+    def server_arguments(self) -> list[str]:
+        """Get the arguments of ssh that log in to the remote server, which forwards to the same server share."""
+        key_args = ["-i", self.key] if self.key else []
+        return [
+            f"{self.remote_server_user}@{self.remote_server_host}",
+            "-p",
+            str(self.remote_server_port),
+            *key_args,
+        ]
+
+    @classmethod
+    def default(cls) -> "PortForward":
         """Get a port forward containing default values."""
-        return PortForward(
-            device_type=PortForward.DEFAULT_DEVICE_TYPE,
+        return cls(
+            device_type=cls.DEFAULT_DEVICE_TYPE,
             name="",
             notes="",
-            local_port=PortForward.DEFAULT_FORWARD_PORT,
+            local_port=cls.DEFAULT_FORWARD_PORT,
             target_host="",
-            target_port=PortForward.DEFAULT_FORWARD_PORT,
+            target_port=cls.DEFAULT_FORWARD_PORT,
             remote_server_user="",
             remote_server_host="",
-            remote_server_port=PortForward.DEFAULT_SSH_PORT,
+            remote_server_port=cls.DEFAULT_SSH_PORT,
             key="",
         )
 
-    @staticmethod
-    def from_dict(data: dict) -> "PortForward":
-        """Create a port forward from a dictionary. If a key is not present, the default value will be used."""
-        port_forward = PortForward.default()
-        device_type = data.get("device_type")
-        if device_type is not None and device_type in DeviceType:
-            port_forward.device_type = device_type
-        port_forward.name = data.get("name", port_forward.name)
-        port_forward.notes = data.get("notes", port_forward.notes)
-        port_forward.local_port = data.get("local_port", port_forward.local_port)
-        port_forward.target_host = data.get("target_host", port_forward.target_host)
-        port_forward.target_port = data.get("target_port", port_forward.target_port)
-        port_forward.remote_server_user = data.get("remote_server_user", port_forward.remote_server_user)
-        port_forward.remote_server_host = data.get("remote_server_host", port_forward.remote_server_host)
-        port_forward.remote_server_port = data.get("remote_server_port", port_forward.remote_server_port)
-        port_forward.key = data.get("key", port_forward.key)
-        return port_forward
-
-
-@dataclass
-class ProxyJump:
+
+@_with_field_table
+@dataclass(slots=True)
+class ProxyJump(ConnectionBase):
     DEFAULT_TARGET_PORT = 22
     DEFAULT_JUMP_PORT = 22
     DEFAULT_DEVICE_TYPE = DeviceType.SERVER
+    _INTERNED_FIELDS = frozenset({"target_user", "jump_user", "jump_host", "key"})
 
     device_type: str
     name: str
@@ -201,73 +202,33 @@ class ProxyJump:
     jump_host: str
     jump_port: int
     key: str
+    id: str = field(default_factory=new_connection_id, compare=False)
 
-    def command(self) -> str:
+    def command(self, ssh_options: str = "", proxy_command: str | None = None) -> str:
+        """Get the command to connect to the target through the jump host.
+
+        Args:
+            ssh_options (str): Extra options for ssh, e.g. to share a connection to the target.
+            proxy_command (str | None): Option that reaches the target through the jump host in place of -J, e.g. to
+                share a connection to the jump host.
+        """
         key_arg = f"-i {self.key}" if self.key else ""
-        jump_arg = f"-J {self.jump_user}@{self.jump_host}:{self.jump_port}"
+        jump_arg = proxy_command or f"-J {self.jump_user}@{self.jump_host}:{self.jump_port}"
         target_arg = f"{self.target_user}@{self.target_host} -p{self.target_port}"
-        return f"ssh {key_arg} {jump_arg} {target_arg}"
+        return f"ssh {ssh_options} {key_arg} {jump_arg} {target_arg}"
 
-    def to_dict(self) -> dict:
-        """Convert the proxy jump to a dictionary."""
-        return {
-            "device_type": self.device_type,
-            "name": self.name,
-            "notes": self.notes,
-            "target_user": self.target_user,
-            "target_host": self.target_host,
-            "target_port": self.target_port,
-            "jump_user": self.jump_user,
-            "jump_host": self.jump_host,
-            "jump_port": self.jump_port,
-            "key": self.key,
-        }
-
-    def copy(self) -> "ProxyJump":
-        """Create a copy of the proxy jump."""
-        return ProxyJump(
-            device_type=self.device_type,
-            name=self.name,
-            notes=self.notes,
-            target_user=self.target_user,
-            target_host=self.target_host,
-            target_port=self.target_port,
-            jump_user=self.jump_user,
-            jump_host=self.jump_host,
-            jump_port=self.jump_port,
-            key=self.key,
-        )
-
-    @staticmethod
-    def default() -> "ProxyJump":
+    @classmethod
+    def default(cls) -> "ProxyJump":
         """Get a proxy jump containing default values."""
-        return ProxyJump(
-            device_type=ProxyJump.DEFAULT_DEVICE_TYPE,
+        return cls(
+            device_type=cls.DEFAULT_DEVICE_TYPE,
             name="",
             notes="",
             target_user="",
             target_host="",
-            target_port=ProxyJump.DEFAULT_TARGET_PORT,
+            target_port=cls.DEFAULT_TARGET_PORT,
             jump_user="",
             jump_host="",
-            jump_port=ProxyJump.DEFAULT_JUMP_PORT,
+            jump_port=cls.DEFAULT_JUMP_PORT,
             key="",
         )
-
-    @staticmethod
-    def from_dict(data: dict) -> "ProxyJump":
-        """Create a proxy jump from a dictionary. If a key is not present, the default value will be used."""
-        proxy_jump = ProxyJump.default()
-        device_type = data.get("device_type")
-        if device_type is not None and device_type in DeviceType:
-            proxy_jump.device_type = device_type
-        proxy_jump.name = data.get("name", proxy_jump.name)
-        proxy_jump.notes = data.get("notes", proxy_jump.notes)
-        proxy_jump.target_user = data.get("target_user", proxy_jump.target_user)
-        proxy_jump.target_host = data.get("target_host", proxy_jump.target_host)
-        proxy_jump.target_port = data.get("target_port", proxy_jump.target_port)
-        proxy_jump.jump_user = data.get("jump_user", proxy_jump.jump_user)
-        proxy_jump.jump_host = data.get("jump_host", proxy_jump.jump_host)
-        proxy_jump.jump_port = data.get("jump_port", proxy_jump.jump_port)
-        proxy_jump.key = data.get("key", proxy_jump.key)
-        return proxy_jump
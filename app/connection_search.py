@@ -0,0 +1,91 @@
+from bisect import bisect_right
+from collections.abc import Iterable
+
+_FIELD_SEPARATOR = "\n"  # Between the fields of a connection, so that a query can't match across two fields
+_ITEM_SEPARATOR = "\0"  # Between connections in the haystack
+BROAD_QUERY_FRACTION = 4  # Queries matching more than 1/n of the connections are tested against each connection
+
+
+class ConnectionSearchIndex:
+    """Finds the connections whose searchable fields (name, host, user, notes, ...) contain a query.
+
+    The lowercase fields of every connection are kept joined into a single haystack string, which is searched with
+    `str.find` rather than by testing each connection in turn. The haystack is rebuilt on the next search after a
+    connection is added or removed. A query that extends the previous one (as it does while a user is typing) only
+    tests the connections that matched the previous query.
+
+    The set returned by the latest search is kept up to date in place as connections are added and removed.
+    """
+
+    def __init__(self) -> None:
+        self._texts: dict[str, str] = {}  # ID -> searchable text of each connection
+        self._haystack: str | None = None  # Texts of every connection, or None if it needs rebuilding
+        self._haystack_ids: list[str] = []  # ID of each connection in the haystack
+        self._haystack_starts: list[int] = []  # Where each connection starts in the haystack
+        self._query = ""
+        self._result: set[str] | None = None  # IDs matching the query, or None if everything matches
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    def add(self, item_id: str, fields: Iterable[str]) -> None:
+        """Add a connection to the index, or replace the fields of a connection already in it."""
+        text = _FIELD_SEPARATOR.join(fields).lower()
+        self._texts[item_id] = text
+        self._haystack = None
+        if self._result is not None:
+            if self._query in text:
+                self._result.add(item_id)
+            else:
+                self._result.discard(item_id)
+
+    def remove(self, item_id: str) -> None:
+        """Remove a connection from the index, if it is in it."""
+        if self._texts.pop(item_id, None) is not None:
+            self._haystack = None
+        if self._result is not None:
+            self._result.discard(item_id)
+
+    def search(self, query: str) -> set[str] | None:
+        """Find the connections matching a query, ignoring case.
+
+        Returns:
+            set[str] | None: IDs of the matching connections, or None if the query is empty and everything matches.
+        """
+        query = query.strip().lower()
+        if not query:
+            result = None
+        elif self._result is not None and self._query in query:
+            # Narrowing the previous query can only drop connections from its result
+            result = {item_id for item_id in self._result if query in self._texts[item_id]}
+        else:
+            result = self._scan(query)
+        self._query = query
+        self._result = result
+        return result
+
+    def _scan(self, query: str) -> set[str]:
+        if self._haystack is None:
+            self._haystack_ids = list(self._texts)
+            self._haystack_starts = []
+            start = 0
+            for text in self._texts.values():
+                self._haystack_starts.append(start)
+                start += len(text) + len(_ITEM_SEPARATOR)
+            self._haystack = _ITEM_SEPARATOR.join(self._texts.values())
+
+        if self._haystack.count(query) > len(self._haystack_ids) // BROAD_QUERY_FRACTION:
+            # Stepping through most of the connections one match at a time is slower than testing each one
+            return {item_id for item_id, text in self._texts.items() if query in text}
+        result: set[str] = set()
+        position = self._haystack.find(query)
+        while position >= 0:
+            index = bisect_right(self._haystack_starts, position) - 1
+            result.add(self._haystack_ids[index])
+            # Carry on from the next connection; more matches in this one don't change the result
+            next_index = index + 1
+            if next_index == len(self._haystack_starts):
+                break
+            position = self._haystack.find(query, self._haystack_starts[next_index])
+        return result
@@ -1,9 +1,15 @@
-import socket
+import asyncio
+import contextlib
+import time
+from dataclasses import dataclass
 from enum import Enum
 
-from PySide6.QtCore import QThread, Signal
+Endpoint = tuple[str, int]
 
-from app.connection import DirectConnection
+DEFAULT_CONNECT_TIMEOUT = 2.0
+DEFAULT_BANNER_TIMEOUT = 3.0
+DEFAULT_REFRESH_BUDGET = 30.0
+MAX_LINES_BEFORE_BANNER = 16  # Servers may send other lines before the identification string (RFC 4253 4.2)
 
 
 class ConnectionStatus(str, Enum):
@@ -12,6 +18,11 @@ class ConnectionStatus(str, Enum):
     OFFLINE = "Offline"
 
 
+class ProbeMode(str, Enum):
+    TCP = "tcp"  # The host accepts a TCP connection
+    SSH_BANNER = "ssh_banner"  # The host accepts a TCP connection and sends an SSH identification string
+
+
 CONNECTION_STATUS_ICONS = {
     ConnectionStatus.UNKNOWN: "gray_circle.png",
     ConnectionStatus.ONLINE: "green_circle.png",
@@ -19,20 +30,117 @@ CONNECTION_STATUS_ICONS = {
 }
 
 
-class ConnectionStatusThread(QThread):
-    """Thread to check the connection status of a DirectConnection."""
+@dataclass(frozen=True)
+class ProbeResult:
+    """The outcome of checking an endpoint."""
+
+    status: ConnectionStatus
+    latency_ms: float | None = None  # Round-trip time of the TCP connect, if it succeeded
+    latency_p50_ms: float | None = None  # Percentiles over the recent latency history of the endpoint
+    latency_p95_ms: float | None = None
+    banner: str = ""  # SSH identification string sent by the server, if it was read
+    checked_at: float | None = None  # Wall-clock time of the check
+    cached: bool = False  # Restored from a previous session rather than checked in this one
+
+    def status_text(self, now: float | None = None) -> str:
+        """Get a description of the status for display, including its age if it is from a previous session."""
+        if not self.cached or self.checked_at is None or self.status == ConnectionStatus.UNKNOWN:
+            return self.status.value
+        age = (time.time() if now is None else now) - self.checked_at
+        return f"Last seen {self.status.value.lower()} {_format_age(age)} ago"
+
+    def server_version(self) -> str:
+        """Get the software version from the SSH identification string, e.g. 'OpenSSH_9.6'."""
+        return self.banner.split("-", 2)[-1].split(" ", 1)[0]  # SSH-protoversion-softwareversion SP comments
+
+    def latency_text(self) -> str:
+        """Get a description of the latency of the endpoint for display."""
+        if self.latency_p50_ms is None or self.latency_p95_ms is None:
+            return f"{_format_ms(self.latency_ms)} ms" if self.latency_ms is not None else ""
+        last = f"{_format_ms(self.latency_ms)} ms" if self.latency_ms is not None else "-"
+        return f"{last} (p50 {_format_ms(self.latency_p50_ms)} / p95 {_format_ms(self.latency_p95_ms)})"
+
+
+UNKNOWN_RESULT = ProbeResult(ConnectionStatus.UNKNOWN)
+
+
+@dataclass(frozen=True)
+class ProbeOptions:
+    """How endpoints are checked."""
+
+    mode: ProbeMode = ProbeMode.TCP
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    banner_timeout: float = DEFAULT_BANNER_TIMEOUT
+    refresh_budget: float = DEFAULT_REFRESH_BUDGET  # Wall-clock seconds allowed for one batch of checks
 
-    status_updated = Signal(ConnectionStatus)
 
-    def __init__(self, direct_connection: DirectConnection):
-        super().__init__()
-        self.direct_connection = direct_connection
+def _format_ms(value: float) -> str:
+    # Show a decimal place for the sub-10 ms latencies of local networks
+    return f"{value:.1f}" if value < 10 else f"{value:.0f}"  # noqa: PLR2004
+
+
+def _format_age(seconds: float) -> str:
+    for unit, unit_seconds in (("d", 24 * 60 * 60), ("h", 60 * 60)):
+        if seconds >= unit_seconds:
+            return f"{int(seconds // unit_seconds)} {unit}"
+    return f"{max(1, int(seconds // 60))} min"
+
+
+def make_endpoint(host: str, port: int) -> Endpoint:
+    """Get the key used to identify a (host, port) endpoint, so that differently written host names match."""
+    return (host.strip().lower().rstrip("."), int(port))
+
+
+async def check_connection(
+    addresses: list[str], port: int, connect_timeout: float, banner_timeout: float | None = None
+) -> ProbeResult:
+    """Check whether a TCP connection can be opened to any of the addresses of a host.
+
+    Args:
+        addresses (list[str]): The resolved addresses of the host, tried in order.
+        port (int): The port to connect to.
+        connect_timeout (float): The maximum time in seconds to wait for a connection across all addresses.
+        banner_timeout (float | None): If given, the host is only online if it sends an SSH identification string
+            within this many seconds of connecting.
+
+    Returns:
+        ProbeResult: ONLINE with the connect round-trip time if a connection was opened, otherwise OFFLINE.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + connect_timeout
+    for address in addresses:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        start = loop.time()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(address, port), remaining)
+        except (OSError, TimeoutError):
+            continue
+        latency_ms = (loop.time() - start) * 1000
 
-    def run(self):
         try:
-            with socket.create_connection((self.direct_connection.host, self.direct_connection.port), timeout=1):
-                status = ConnectionStatus.ONLINE
-        except OSError:
-            status = ConnectionStatus.OFFLINE
+            if banner_timeout is None:
+                return ProbeResult(ConnectionStatus.ONLINE, latency_ms)
+            banner = await asyncio.wait_for(_read_ssh_banner(reader), banner_timeout)
+        except (OSError, TimeoutError, ValueError):
+            banner = None
+        finally:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+        if banner is None:  # Accepting connections, but the SSH server isn't responding
+            return ProbeResult(ConnectionStatus.OFFLINE, latency_ms)
+        return ProbeResult(ConnectionStatus.ONLINE, latency_ms, banner=banner)
+    return ProbeResult(ConnectionStatus.OFFLINE)
+
 
-        self.status_updated.emit(status)
+async def _read_ssh_banner(reader: asyncio.StreamReader) -> str | None:
+    for _ in range(MAX_LINES_BEFORE_BANNER):
+        line = await reader.readline()
+        if not line:
+            return None
+        if line.startswith(b"SSH-"):
+            return line.decode("utf-8", errors="replace").strip()
+    return None
@@ -0,0 +1,240 @@
+import itertools
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from enum import Enum
+
+from app.config_file import DEFAULT_WRITE_DELAY_MS, ConfigFile
+from app.connection import new_connection_id
+
+DATABASE_NAME = "connections.sqlite3"
+
+
+class StoreBackend(str, Enum):
+    JSON = "json"  # One JSON file per table, rewritten whenever the table changes
+    SQLITE = "sqlite"  # One SQLite database holding every table, changed a row at a time
+
+
+_backend = StoreBackend.JSON
+
+
+def set_store_backend(backend: StoreBackend) -> None:
+    """Choose where connection tables opened from now on are kept."""
+    global _backend  # noqa: PLW0603
+    _backend = backend
+
+
+def open_connection_store(key: str, indexed_fields: dict[str, str]) -> "ConnectionStore":
+    """Open the store of a connection table using the chosen backend.
+
+    Args:
+        key (str): Name of the table, used for its JSON file and SQLite table.
+        indexed_fields (dict[str, str]): Indexed SQLite column -> connection field it holds, for the name, host and
+            user of each connection.
+    """
+    json_store = JsonConnectionStore(ConfigFile(f"{key}.json", write_delay_ms=DEFAULT_WRITE_DELAY_MS), key)
+    if _backend == StoreBackend.SQLITE:
+        return SqliteConnectionStore(ConfigFile(DATABASE_NAME), key, indexed_fields, migrate_from=json_store)
+    return json_store
+
+
+class ConnectionStore(ABC):
+    """Where the connections of a table are kept, as dictionaries addressed by their row in the table."""
+
+    @abstractmethod
+    def load(self, snapshot: Callable[[], list[dict]]) -> Iterator[dict]:
+        """Get every connection in the table, in order.
+
+        Connections are read as they are iterated over. Rows that have been read can be changed before the rest are.
+
+        Args:
+            snapshot (Callable[[], list[dict]]): Gets the connections of the table that have been read, as they are
+                now, for stores that write the whole table at once.
+        """
+
+    @abstractmethod
+    def append(self, data: dict) -> None:
+        """Add a connection to the end of the table."""
+
+    @abstractmethod
+    def update(self, row: int, data: dict) -> None:
+        """Replace the connection in a row."""
+
+    @abstractmethod
+    def delete(self, row: int) -> None:
+        """Remove the connection in a row."""
+
+    @abstractmethod
+    def move(self, row: int, new_row: int) -> None:
+        """Move the connection in a row to another row, shifting the rows in between."""
+
+
+class JsonConnectionStore(ConnectionStore):
+    """Keeps a table in a JSON configuration file, which is written as a whole after every change.
+
+    Connections are parsed from the file one at a time as they are read. The store keeps no copy of them. When the
+    file is written, the rows that have been read are taken from the snapshot and the rest, which can't have changed,
+    are copied from the file as it was, so a change doesn't make the table read every row. Reading then carries on from
+    the same row of the new file. A burst of changes takes a single snapshot.
+    """
+
+    def __init__(self, source: ConfigFile, key: str) -> None:
+        self.source = source
+        self.key = key
+        self._snapshot: Callable[[], list[dict]] = list
+        self._read = 0  # Rows of the file as it is on disk that have been read
+        self._unread: Iterator[dict] | None = None  # The other rows of the file, opened when they are needed
+
+    def load(self, snapshot: Callable[[], list[dict]]) -> Iterator[dict]:
+        self._snapshot = snapshot
+        self._read = 0
+        self._unread = None
+        return self._rows()
+
+    def append(self, data: dict) -> None:
+        self._save()
+
+    def update(self, row: int, data: dict) -> None:
+        self._save()
+
+    def delete(self, row: int) -> None:
+        self._save()
+
+    def move(self, row: int, new_row: int) -> None:
+        self._save()
+
+    def _rows(self) -> Iterator[dict]:
+        while (data := next(self._unread_rows(), None)) is not None:
+            self._read += 1
+            yield data
+
+    def _unread_rows(self) -> Iterator[dict]:
+        if self._unread is None:
+            self._unread = itertools.islice(self.source.stream_saved(self.key), self._read, None)
+        return self._unread
+
+    def _save(self) -> None:
+        self.source.save(self._data)
+
+    def _data(self) -> dict:
+        rows = self._snapshot()
+        unread = list(self._unread_rows())  # Reading them to the end closes the file, so that it can be replaced
+        self._read = len(rows)
+        self._unread = None if unread else iter(())  # Reopened at the same row once the file has been written
+        return {self.key: rows + unread}
+
+
+class SqliteConnectionStore(ConnectionStore):
+    """Keeps a table in an SQLite database, so that a change only writes the rows it affects.
+
+    Each connection is stored as JSON along with indexed copies of its name, host and user. Rows are ordered by a
+    position column; positions may have gaps, so adding or deleting a row never renumbers the others and moving a row
+    only updates the rows it passes. The first time a table is opened, the connections in its JSON file are copied in.
+    """
+
+    def __init__(
+        self,
+        database: ConfigFile,
+        table: str,
+        indexed_fields: dict[str, str],
+        migrate_from: ConnectionStore | None = None,
+    ) -> None:
+        self.database = database
+        self.table = table
+        self.indexed_fields = indexed_fields
+        self.migrate_from = migrate_from
+        self._connection: sqlite3.Connection | None = None
+        self._ids: list[str] = []  # ID of the connection in each row
+        self._positions: list[float] = []  # Position of each row, in ascending order
+
+    def load(self, snapshot: Callable[[], list[dict]]) -> Iterator[dict]:
+        self._ids = []
+        self._positions = []
+        for item_id, position, data in self._connect().execute(
+            f"SELECT id, position, data FROM {self.table} ORDER BY position"
+        ):
+            self._ids.append(item_id)
+            self._positions.append(position)
+            yield json.loads(data)
+
+    def append(self, data: dict) -> None:
+        position = self._positions[-1] + 1 if self._positions else 0.0
+        with self._connect() as connection:
+            connection.execute(self._insert_sql(), self._values(data, position))
+        self._ids.append(data["id"])
+        self._positions.append(position)
+
+    def update(self, row: int, data: dict) -> None:
+        columns = ", ".join(f"{column} = ?" for column in self.indexed_fields)
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE {self.table} SET id = ?, {columns}, data = ? WHERE id = ?",
+                (data["id"], *self._indexed_values(data), json.dumps(data), self._ids[row]),
+            )
+        self._ids[row] = data["id"]
+
+    def delete(self, row: int) -> None:
+        with self._connect() as connection:
+            connection.execute(f"DELETE FROM {self.table} WHERE id = ?", (self._ids[row],))
+        self._ids.pop(row)
+        self._positions.pop(row)
+
+    def move(self, row: int, new_row: int) -> None:
+        self._ids.insert(new_row, self._ids.pop(row))
+        # The positions stay in place; the rows between the old and new row each take the position of their new row
+        changed_rows = range(min(row, new_row), max(row, new_row) + 1)
+        with self._connect() as connection:
+            connection.executemany(
+                f"UPDATE {self.table} SET position = ? WHERE id = ?",
+                [(self._positions[r], self._ids[r]) for r in changed_rows],
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.database.ensure_directory()
+            connection = sqlite3.connect(self.database.path)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            with connection:
+                self._create_table(connection)
+                self._migrate(connection)
+            self._connection = connection
+        return self._connection
+
+    def _create_table(self, connection: sqlite3.Connection) -> None:
+        columns = "".join(f", {column} TEXT NOT NULL" for column in self.indexed_fields)
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, position REAL NOT NULL{columns}, "
+            "data TEXT NOT NULL)"
+        )
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_position ON {self.table} (position)")
+        for column in self.indexed_fields:
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_{column} ON {self.table} ({column})")
+        connection.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        if connection.execute("SELECT 1 FROM migrations WHERE name = ?", (self.table,)).fetchone() is not None:
+            return
+        rows = self.migrate_from.load(list) if self.migrate_from is not None else []
+        seen_ids: set[str] = set()
+        values = []
+        for position, loaded in enumerate(rows):
+            data = (
+                loaded if loaded.get("id") and loaded["id"] not in seen_ids else {**loaded, "id": new_connection_id()}
+            )
+            seen_ids.add(data["id"])
+            values.append(self._values(data, float(position)))
+        connection.executemany(self._insert_sql(), values)
+        connection.execute("INSERT INTO migrations (name) VALUES (?)", (self.table,))
+
+    def _insert_sql(self) -> str:
+        columns = "".join(f", {column}" for column in self.indexed_fields)
+        placeholders = ", ?" * len(self.indexed_fields)
+        return f"INSERT INTO {self.table} (id, position{columns}, data) VALUES (?, ?{placeholders}, ?)"
+
+    def _values(self, data: dict, position: float) -> tuple:
+        return (data["id"], position, *self._indexed_values(data), json.dumps(data))
+
+    def _indexed_values(self, data: dict) -> list[str]:
+        return [str(data.get(field, "")) for field in self.indexed_fields.values()]
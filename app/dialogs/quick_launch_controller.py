@@ -0,0 +1,47 @@
+from collections.abc import Callable
+
+from PySide6.QtWidgets import QListWidgetItem
+
+from app.dialogs.quick_launch_view import QuickLaunchView
+from app.model.quick_launch_index import QuickLaunchEntry, QuickLaunchIndex
+from app.model.usage_log import UsageLog
+
+
+class QuickLaunchController:
+    def __init__(
+        self,
+        view: QuickLaunchView,
+        index: QuickLaunchIndex,
+        usage: UsageLog,
+        launch: Callable[[QuickLaunchEntry], None],
+    ) -> None:
+        self.view = view
+        self.index = index
+        self.usage = usage
+        self.launch = launch
+        self.entries: list[QuickLaunchEntry] = []
+        view.setWindowTitle("Quick Launch")
+
+        index.refresh()
+        view.search_input.textChanged.connect(self._on_query_changed)
+        view.search_input.returnPressed.connect(self._on_launch)
+        view.results.itemActivated.connect(self._on_launch)
+        self._on_query_changed("")
+
+    def _on_query_changed(self, query: str):
+        """Show the connections matching the query, best first."""
+        self.entries = self.index.search(query, self.usage)
+        self.view.results.clear()
+        for entry in self.entries:
+            label = self.index.sources[entry.source][0]
+            text = f"{entry.name} - {entry.detail}" if entry.detail else entry.name
+            QListWidgetItem(f"{text}  ({label})", self.view.results)
+        if self.entries:
+            self.view.results.setCurrentRow(0)
+
+    def _on_launch(self):
+        """Launch the selected connection and close the palette."""
+        row = self.view.results.currentRow()
+        if 0 <= row < len(self.entries):
+            self.view.accept()
+            self.launch(self.entries[row])
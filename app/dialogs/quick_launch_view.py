@@ -0,0 +1,30 @@
+from PySide6.QtCore import QEvent, QObject, Qt
+from PySide6.QtGui import QKeyEvent
+from PySide6.QtWidgets import QDialog, QLineEdit, QListWidget, QVBoxLayout
+
+# Keys typed into the search box that move through the results instead
+_NAVIGATION_KEYS = {Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown}
+
+
+class QuickLaunchView(QDialog):
+    def __init__(self) -> None:
+        super().__init__()
+        self.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
+        self.resize(600, 400)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search connections")
+        self.search_input.installEventFilter(self)
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.results)
+        self.setLayout(layout)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self.search_input and isinstance(event, QKeyEvent) and event.key() in _NAVIGATION_KEYS:
+            self.results.keyPressEvent(event)
+            return True
+        return super().eventFilter(watched, event)
@@ -0,0 +1,60 @@
+import time
+
+from PySide6.QtWidgets import QTableWidgetItem
+
+from app.dialogs.shared_connections_view import SharedConnectionsView
+from app.model.ssh_multiplexer import SshMultiplexer
+
+
+class SharedConnectionsController:
+    def __init__(self, view: SharedConnectionsView, multiplexer: SshMultiplexer) -> None:
+        self.view = view
+        self.multiplexer = multiplexer
+        self.names: list[str] = []  # Control socket of each row
+        view.setWindowTitle("Shared SSH Connections")
+
+        if not multiplexer.supported:
+            view.label.setText("Sharing SSH connections isn't supported by OpenSSH for Windows.")
+        elif not multiplexer.options.enabled:
+            view.label.setText("Sharing SSH connections is turned off. New sessions connect on their own.")
+        else:
+            view.label.setText(
+                "Sessions to the same destination share one SSH connection, which closes "
+                f"{multiplexer.options.control_persist // 60} minutes after its last session ends."
+            )
+
+        view.close_button.clicked.connect(self._on_close)
+        view.close_all_button.clicked.connect(multiplexer.close_all)
+        multiplexer.masters_changed.connect(self._show_masters)
+        view.finished.connect(lambda _: multiplexer.masters_changed.disconnect(self._show_masters))
+        multiplexer.sweep()
+        self._show_masters()
+
+    def _show_masters(self):
+        """List the shared connections, most recently used first."""
+        masters = self.multiplexer.masters()
+        self.names = [master.name for master in masters]
+        self.view.table.setRowCount(len(masters))
+        for row, master in enumerate(masters):
+            values = [
+                master.destination,
+                ("Connected" if master.running else "Connecting") + (" (pre-warmed)" if master.prewarmed else ""),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(master.opened_at)),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(master.last_used)),
+            ]
+            for col, value in enumerate(values):
+                self.view.table.setItem(row, col, QTableWidgetItem(value))
+        stats = self.multiplexer.prewarm_stats()
+        login = f", saving {stats.mean_login_ms:.0f} ms each" if stats.mean_login_ms is not None else ""
+        self.view.stats_label.setText(
+            f"Pre-warming: {stats.hits} ready when launched{login}, {stats.late} still logging in, {stats.misses} not "
+            f"pre-warmed, {stats.reused} reusing an earlier session, {stats.wasted} unused, {stats.failed} failed"
+        )
+        self.view.close_button.setEnabled(bool(masters))
+        self.view.close_all_button.setEnabled(bool(masters))
+
+    def _on_close(self):
+        """Close the selected shared connections."""
+        rows = {index.row() for index in self.view.table.selectionModel().selectedRows()}
+        for name in [self.names[row] for row in sorted(rows)]:
+            self.multiplexer.close(name)
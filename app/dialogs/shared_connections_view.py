@@ -0,0 +1,49 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QDialogButtonBox,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QVBoxLayout,
+)
+
+HEADERS = ["Destination", "Status", "Opened", "Last Used"]
+
+
+class SharedConnectionsView(QDialog):
+    def __init__(self) -> None:
+        super().__init__()
+        self.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
+        self.resize(600, 300)
+
+        self.label = QLabel()
+        self.label.setWordWrap(True)
+
+        self.table = QTableWidget(0, len(HEADERS))
+        self.table.setHorizontalHeaderLabels(HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        self.stats_label = QLabel()
+        self.stats_label.setWordWrap(True)
+
+        self.close_button = QPushButton("Disconnect")
+        self.close_all_button = QPushButton("Disconnect All")
+
+        buttons = QDialogButtonBox()
+        buttons.addButton(self.close_button, QDialogButtonBox.ButtonRole.ActionRole)
+        buttons.addButton(self.close_all_button, QDialogButtonBox.ButtonRole.ActionRole)
+        buttons.addButton(QDialogButtonBox.StandardButton.Close)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.label)
+        layout.addWidget(self.table)
+        layout.addWidget(self.stats_label)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
@@ -1,31 +1,39 @@
 import logging
 import os
-import subprocess
 from enum import IntEnum
-from typing import Any
 
-from PySide6.QtCore import QAbstractItemModel, QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
-from PySide6.QtGui import QAction, QClipboard, QColor
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Signal
+from PySide6.QtGui import QAction, QClipboard, QContextMenuEvent
 from PySide6.QtWidgets import (
     QApplication,
     QDialog,
     QHBoxLayout,
     QHeaderView,
+    QLineEdit,
     QMessageBox,
     QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
-from app.common import StyleSheets, ViewBase
-from app.config_file import ConfigFile
-from app.connection import DEVICE_TYPE_ICONS, DeviceType, DirectConnection
-from app.connection_status import (
-    CONNECTION_STATUS_ICONS,
-    ConnectionStatus,
-    ConnectionStatusThread,
+from app.common import (
+    LATENCY_COLUMN,
+    SERVER_COLUMN,
+    STATUS_COLUMN,
+    ConnectionFilterModel,
+    ModelBase,
+    StyleSheets,
+    ViewBase,
+    item_column,
 )
+from app.connection import DirectConnection
+from app.connection_status import Endpoint, make_endpoint
+from app.connection_store import open_connection_store
 from app.direct_connection_dialog import DirectConnectionDialog
+from app.model.probe_service import ProbeService
+from app.model.ssh_multiplexer import PrewarmTarget, SshMultiplexer
+from app.ssh import open_terminal
+from app.thread.probe_thread import ProbePriority
 from app.utility.resource_provider import get_icon
 
 
@@ -38,181 +46,66 @@ class DirectConnectionsHeader(IntEnum):
     PORT = 3
     KEY = 4
     CONNECTION_STATUS = 5
+    LATENCY = 6
+    SERVER = 7
 
 
-class DirectConnectionsModel(QAbstractTableModel):
+class DirectConnectionsModel(ModelBase[DirectConnection]):
     """Model for the direct connections table."""
 
     def __init__(self) -> None:
-        super().__init__()
-        self.direct_connections: list[DirectConnection] = []
-        self.connection_statuses: list[ConnectionStatus] = []
-
-        self.headers = {
-            DirectConnectionsHeader.NAME: "Name",
-            DirectConnectionsHeader.USER: "User",
-            DirectConnectionsHeader.HOST: "Host Name",
-            DirectConnectionsHeader.PORT: "Port",
-            DirectConnectionsHeader.KEY: "Key",
-            DirectConnectionsHeader.CONNECTION_STATUS: "Status",
+        columns = {
+            DirectConnectionsHeader.NAME: item_column("Name", "name", device_icon=True),
+            DirectConnectionsHeader.USER: item_column("User", "user"),
+            DirectConnectionsHeader.HOST: item_column("Host Name", "host"),
+            DirectConnectionsHeader.PORT: item_column("Port", "port"),
+            DirectConnectionsHeader.KEY: item_column("Key", "key", display=os.path.basename),
+            DirectConnectionsHeader.CONNECTION_STATUS: STATUS_COLUMN,
+            DirectConnectionsHeader.LATENCY: LATENCY_COLUMN,
+            DirectConnectionsHeader.SERVER: SERVER_COLUMN,
         }
-        assert len(self.headers) == len(DirectConnectionsHeader)
-
-        self.source = ConfigFile("direct_connections.json")
-        self._load()
-
-    def add_direct_connection(self, direct_connection: DirectConnection) -> None:
-        """Add a direct connection to the model.
-
-        Args:
-            direct_connection (DirectConnection): The direct connection to add.
-        """
-        row = len(self.direct_connections)
-        self.beginInsertRows(QModelIndex(), row, row)
-        self.direct_connections.append(direct_connection)
-        self.connection_statuses.append(ConnectionStatus.UNKNOWN)
-        self.endInsertRows()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-        self._save()
-
-    def delete_direct_connection(self, row: int) -> None:
-        """Delete a direct connection from the model.
-
-        Args:
-            row (int): The row of the direct connection to delete.
-        """
-        self.beginRemoveRows(QModelIndex(), row, row)
-        self.direct_connections.pop(row)
-        self.connection_statuses.pop(row)
-        self.endRemoveRows()
-        self._save()
-
-    def move_up(self, row: int) -> None:
-        """Move a proxy jump up in the model.
-
-        Args:
-            row (int): The row of the proxy jump to move up.
-        """
-        if row > 0:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row - 1)
-            self.direct_connections.insert(row - 1, self.direct_connections.pop(row))
-            self.connection_statuses.insert(row - 1, self.connection_statuses.pop(row))
-            self.endMoveRows()
-            self.dataChanged.emit(self.index(row - 1, 0), self.index(row, len(self.headers) - 1))
-            self._save()
-
-    def move_down(self, row: int) -> None:
-        """Move a direct connection down one row."""
-        if row < len(self.direct_connections) - 1:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row + 2)
-            self.direct_connections.insert(row + 1, self.direct_connections.pop(row))
-            self.connection_statuses.insert(row + 1, self.connection_statuses.pop(row))
-            self.endMoveRows()
-            self.dataChanged.emit(self.index(row, 0), self.index(row + 1, len(self.headers) - 1))
-            self._save()
-
-    def get_direct_connection(self, row: int) -> DirectConnection:
-        """Get a direct connection from the model by row."""
-        return self.direct_connections[row]
-
-    def update_direct_connection(self, row: int, direct_connection: DirectConnection) -> None:
-        """Update a direct connection in the model."""
-        self.direct_connections[row] = direct_connection
-        self._save()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-
-    def new_connection_status(self, direct_connection: DirectConnection, status: ConnectionStatus) -> None:
-        if direct_connection in self.direct_connections:  # Guard against the connection being deleted or edited
-            row = self.direct_connections.index(direct_connection)
-            self.connection_statuses[row] = status
-            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-
-    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
-        return len(self.direct_connections)
-
-    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
-        return len(DirectConnectionsHeader)
-
-    def data(
-        self, index: QModelIndex | QPersistentModelIndex = QModelIndex(), role: int = Qt.ItemDataRole.DisplayRole
-    ) -> Any:
-        if not index.isValid():
-            return
-
-        col = index.column()
-        row = index.row()
-
-        if role == Qt.ItemDataRole.DecorationRole:
-            if col == DirectConnectionsHeader.NAME:
-                return get_icon(DEVICE_TYPE_ICONS[DeviceType(self.direct_connections[row].device_type)])
-            if col == DirectConnectionsHeader.CONNECTION_STATUS:
-                return get_icon(CONNECTION_STATUS_ICONS[self.connection_statuses[row]])
-
-        if role == Qt.ItemDataRole.DisplayRole:  # What's displayed to the user
-            if col == DirectConnectionsHeader.NAME:
-                return self.direct_connections[row].name
-            if col == DirectConnectionsHeader.USER:
-                return self.direct_connections[row].user
-            if col == DirectConnectionsHeader.HOST:
-                return self.direct_connections[row].host
-            if col == DirectConnectionsHeader.PORT:
-                return self.direct_connections[row].port
-            if col == DirectConnectionsHeader.KEY:
-                # Display the key file name only
-                return os.path.basename(self.direct_connections[row].key)
-            if col == DirectConnectionsHeader.CONNECTION_STATUS:
-                return self.connection_statuses[row].value
-
-        if role == Qt.ItemDataRole.UserRole:  # Application-specific purposes
-            if col == DirectConnectionsHeader.NAME:
-                return self.direct_connections[row].name
-            if col == DirectConnectionsHeader.USER:
-                return self.direct_connections[row].user
-            if col == DirectConnectionsHeader.HOST:
-                return self.direct_connections[row].host
-            if col == DirectConnectionsHeader.PORT:
-                return self.direct_connections[row].port
-            if col == DirectConnectionsHeader.KEY:
-                return self.direct_connections[row].key
-            if col == DirectConnectionsHeader.CONNECTION_STATUS:
-                return self.connection_statuses[row].value
-
-    def flags(self, index: QModelIndex | QPersistentModelIndex = QModelIndex()) -> Qt.ItemFlag:
-        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
-
-    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
-        if orientation == Qt.Orientation.Horizontal:
-            if role == Qt.ItemDataRole.DisplayRole:
-                return self.headers[DirectConnectionsHeader(section)]
-            if role == Qt.ItemDataRole.TextAlignmentRole:
-                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-            if role == Qt.ItemDataRole.ForegroundRole:
-                return QColor(Qt.GlobalColor.gray)
-
-    def _load(self):
-        loaded_direct_connections = self.source.load()
-        if "direct_connections" in loaded_direct_connections:
-            for connection in loaded_direct_connections["direct_connections"]:
-                self.direct_connections.append(DirectConnection.from_dict(connection))
-                self.connection_statuses.append(ConnectionStatus.UNKNOWN)
-
-    def _save(self):
-        self.source.save({"direct_connections": [conn.to_dict() for conn in self.direct_connections]})
+        assert len(columns) == len(DirectConnectionsHeader)
+        store = open_connection_store("direct_connections", {"name": "name", "host": "host", "user": "user"})
+        super().__init__(
+            [columns[header] for header in DirectConnectionsHeader],
+            store,
+            DirectConnection.from_dict,
+            lambda item: make_endpoint(item.host, item.port),
+            ["name", "host", "user", "notes"],
+        )
 
 
 class DirectConnectionsView(ViewBase):
+    prewarm_changed = Signal(int, bool)  # Row and whether its host is pre-warmed
+
     def __init__(self) -> None:
         super().__init__()
+        self.prewarm_action = QAction("Pre-warm Host")
+        self.prewarm_action.setCheckable(True)
+        self.prewarm_action.setVisible(False)  # Until SSH connections are shared
+        self.menu.addAction(self.prewarm_action)
+        self.prewarm_action.triggered.connect(
+            lambda checked: self.prewarm_changed.emit(self._source_row(self.currentIndex()), checked)
+        )
+
+    def contextMenuEvent(self, event: QContextMenuEvent | None) -> None:
+        assert event is not None
+        self.prewarm_action.setEnabled(self.indexAt(event.pos()).isValid())
+        super().contextMenuEvent(event)
 
     def attach_model(self, model: QAbstractItemModel):
         self.setModel(model)
         header = self.horizontalHeader()
         assert isinstance(header, QHeaderView)
         header.setSectionResizeMode(DirectConnectionsHeader.NAME.value, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(DirectConnectionsHeader.USER.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(DirectConnectionsHeader.HOST.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(DirectConnectionsHeader.PORT.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(DirectConnectionsHeader.KEY.value, QHeaderView.ResizeMode.ResizeToContents)
+        self.fit_columns_to_contents(
+            [
+                DirectConnectionsHeader.USER,
+                DirectConnectionsHeader.HOST,
+                DirectConnectionsHeader.PORT,
+                DirectConnectionsHeader.KEY,
+            ]
+        )
 
 
 class DirectConnectionsWidget(QWidget):
@@ -221,13 +114,17 @@ class DirectConnectionsWidget(QWidget):
 
         self.view = DirectConnectionsView()
         self.model = DirectConnectionsModel()
-        self.view.attach_model(self.model)
+        self.filter_model = ConnectionFilterModel(self.model)
+        self.view.attach_model(self.filter_model)
         self.view.item_activated.connect(self._on_direct_connection_activated)
         self.view.new_item.connect(self._on_new_direct_connection)
         self.view.edit_item.connect(self._on_edit_direct_connection)
         self.view.duplicate_item.connect(self._on_duplicate_direct_connection)
         self.view.delete_item.connect(self._on_delete_direct_connection)
         self.view.copy_command.connect(self._on_copy_command)
+        self.view.visible_rows_changed.connect(self._on_visible_rows_changed)
+        self.view.focused_row_changed.connect(self._on_focused_row_changed)
+        self.model.rowsInserted.connect(self._on_rows_inserted)
 
         new_button = QToolButton()
         new_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
@@ -250,9 +147,15 @@ class DirectConnectionsWidget(QWidget):
         refresh_connection_status_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
         refresh_connection_status_button.setDefaultAction(refresh_connection_status_action)
 
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.filter_model.set_query)
+
         buttons_layout = QHBoxLayout()
         buttons_layout.addWidget(new_button)
         buttons_layout.addWidget(refresh_connection_status_button)
+        buttons_layout.addWidget(self.filter_input)
         buttons_layout.addStretch()
         buttons_layout.addWidget(move_up_button)
         buttons_layout.addWidget(move_down_button)
@@ -262,42 +165,79 @@ class DirectConnectionsWidget(QWidget):
         layout.addWidget(self.view)
         self.setLayout(layout)
 
-        self.connection_status_threads: list[ConnectionStatusThread] = []
-        for connection in self.model.direct_connections:
-            self._start_connection_status_thread(connection)
+        self.probe_service: ProbeService | None = None
+        self.multiplexer: SshMultiplexer | None = None
 
-    def _on_refresh_status(self):
-        """Refresh all connection statuses."""
-        for connection in self.model.direct_connections:
-            self.model.new_connection_status(connection, ConnectionStatus.UNKNOWN)
-            self._start_connection_status_thread(connection)
-
-    def _start_connection_status_thread(self, direct_connection: DirectConnection):
-        """Start a thread to check the connection status of a DirectConnection."""
-        thread = ConnectionStatusThread(direct_connection)
-        thread.status_updated.connect(
-            lambda status, conn=direct_connection: self._on_connection_status_updated(status, conn)
-        )
-        thread.finished.connect(lambda: self._on_thread_finished(thread))
-        thread.start()
-        self.connection_status_threads.append(thread)
+    def attach_probe_service(self, probe_service: ProbeService):
+        """Use a probe service to check the connection status of the direct connections."""
+        self.probe_service = probe_service
+        self.probe_service.status_updated.connect(self.model.new_connection_status)
+        self._check_connection_statuses(self.model.endpoints())
 
-    def _on_connection_status_updated(self, status: ConnectionStatus, direct_connection: DirectConnection):
-        """When a connection status thread updates the status of a DirectConnection."""
-        logging.info(f"Network check for {direct_connection.name} complete: {status.value}")
-        self.model.new_connection_status(direct_connection, status)
+    def attach_multiplexer(self, multiplexer: SshMultiplexer):
+        """Share SSH connections between the sessions of the direct connections."""
+        self.multiplexer = multiplexer
+        self.view.menu.aboutToShow.connect(self._on_menu_about_to_show)
+        self.view.prewarm_changed.connect(self._on_prewarm_changed)
 
-    def _on_thread_finished(self, thread: ConnectionStatusThread):
-        """When a connection status thread finishes."""
-        self.connection_status_threads.remove(thread)
-        thread.deleteLater()
+    def _on_refresh_status(self):
+        """Refresh all connection statuses."""
+        self.model.reset_connection_statuses()
+        self._check_connection_statuses(self.model.endpoints())
+
+    def _check_connection_statuses(self, endpoints: list[Endpoint]):
+        """Queue a network check of each endpoint on the probe service."""
+        if self.probe_service is not None and endpoints:
+            self.probe_service.probe(endpoints)
+            self._on_visible_rows_changed(self.view.visible_rows())
+
+    def _on_rows_inserted(self, _parent: QModelIndex, first: int, last: int):
+        """Check the endpoints of rows that were added or fetched from the store."""
+        self._check_connection_statuses(self.model.endpoints(first, last))
+
+    def _on_visible_rows_changed(self, rows: list[int]):
+        """Check the endpoints of the rows on screen before the rest."""
+        if self.probe_service is not None and rows:
+            endpoints = [self.model.endpoint(self.model.get(row)) for row in rows]
+            self.probe_service.prioritize(endpoints, ProbePriority.VISIBLE)
+
+    def _on_focused_row_changed(self, row: int):
+        """Check the endpoint of the selected or hovered row next, and open a shared connection to it ahead of time."""
+        if not 0 <= row < len(self.model.items):
+            return
+        conn = self.model.get(row)
+        if self.probe_service is not None:
+            self.probe_service.prioritize([self.model.endpoint(conn)], ProbePriority.FOCUSED)
+        if self.multiplexer is not None:
+            self.multiplexer.prewarm(PrewarmTarget(conn.user, conn.host, conn.port, conn.key))
+
+    def _on_menu_about_to_show(self):
+        """Show whether the host of the current row is pre-warmed."""
+        assert self.multiplexer is not None
+        row = self.view.current_row()
+        self.view.prewarm_action.setVisible(self.multiplexer.active)
+        if row is not None:
+            host = self.model.get(row).host
+            self.view.prewarm_action.setChecked(host not in self.multiplexer.options.prewarm_excluded_hosts)
+
+    def _on_prewarm_changed(self, row: int, checked: bool):
+        """Change whether the host of a row is pre-warmed."""
+        if self.multiplexer is not None:
+            self.multiplexer.set_prewarm_excluded(self.model.get(row).host, not checked)
+
+    def activate(self, item_id: str):
+        """Launch a connection by ID, as if its row had been activated in the table."""
+        row = self.model.row(item_id)
+        if row is not None:
+            self.view.item_activated.emit(row)
 
     def _on_direct_connection_activated(self, row: int):
         """Open a new terminal window and connect to the host."""
-        conn = self.model.get_direct_connection(row)
-        command = conn.command()
+        conn = self.model.get(row)
+        ssh_options = self.multiplexer.ssh_options(conn.user, conn.host, conn.port) if self.multiplexer else ""
+        command = conn.command(ssh_options)
         logging.info(f"Running: {command}")
-        subprocess.Popen(["start", "cmd", "/k", command], shell=True)
+        open_terminal(command)
 
     def _on_new_direct_connection(self):
         """Open a new direct connection dialog."""
@@ -305,33 +245,30 @@ class DirectConnectionsWidget(QWidget):
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
             new_direct_connection = dialog.to_direct_connection()
-            self.model.add_direct_connection(new_direct_connection)
-            self._start_connection_status_thread(new_direct_connection)
+            self.model.add(new_direct_connection)
 
     def _on_edit_direct_connection(self, row: int):
         """Open an edit direct connection dialog."""
-        direct_connection = self.model.get_direct_connection(row)
+        direct_connection = self.model.get(row)
 
         dialog = DirectConnectionDialog("Edit Direct Connection")
         dialog.populate_fields(direct_connection)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
             edited_direct_connection = dialog.to_direct_connection()
-            self.model.update_direct_connection(row, dialog.to_direct_connection())
-            self.model.new_connection_status(edited_direct_connection, ConnectionStatus.UNKNOWN)
-            self._start_connection_status_thread(edited_direct_connection)
+            self.model.update(row, edited_direct_connection)
+            self._check_connection_statuses([self.model.endpoint(edited_direct_connection)])
 
     def _on_duplicate_direct_connection(self, row: int):
         """Duplicate a direct connection into a new direct connection dialog."""
-        direct_connection = self.model.get_direct_connection(row).copy()
+        direct_connection = self.model.get(row).copy()
         direct_connection.name += " (Copy)"
         dialog = DirectConnectionDialog("New Direct Connection")
         dialog.populate_fields(direct_connection)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
             new_direct_connection = dialog.to_direct_connection()
-            self.model.add_direct_connection(new_direct_connection)
-            self._start_connection_status_thread(new_direct_connection)
+            self.model.add(new_direct_connection)
 
     def _on_delete_direct_connection(self, row: int):
         """Delete a direct connection."""
@@ -343,11 +280,11 @@ class DirectConnectionsWidget(QWidget):
             QMessageBox.StandardButton.Yes,
         )
         if confirmed == QMessageBox.StandardButton.Yes:
-            self.model.delete_direct_connection(row)
+            self.model.delete(row)
 
     def _on_copy_command(self, row: int):
         """Copy the SSH command to the clipboard."""
-        conn = self.model.get_direct_connection(row)
+        conn = self.model.get(row)
         command = conn.command()
         clipboard = QApplication.clipboard()
         assert isinstance(clipboard, QClipboard)
@@ -356,12 +293,12 @@ class DirectConnectionsWidget(QWidget):
 
     def _move_selected_row_up(self):
         """Move the selected row up."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_up(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_up(selected_row)
 
     def _move_selected_row_down(self):
         """Move the selected row down."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_down(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_down(selected_row)
@@ -3,19 +3,30 @@ import logging
 import qdarktheme  # type: ignore[import]
 from PySide6.QtWidgets import QApplication
 
+from app.config_file import ConfigFile
+from app.connection import DEVICE_TYPE_ICONS
+from app.connection_status import CONNECTION_STATUS_ICONS, ProbeMode
 from app.dialogs.about_controller import AboutController
 from app.dialogs.about_view import AboutView
 from app.dialogs.new_version_controller import NewVersionController
 from app.dialogs.new_version_view import NewVersionView
+from app.dialogs.quick_launch_controller import QuickLaunchController
+from app.dialogs.quick_launch_view import QuickLaunchView
+from app.dialogs.shared_connections_controller import SharedConnectionsController
+from app.dialogs.shared_connections_view import SharedConnectionsView
 from app.main.log_controller import LogController
 from app.main.main_view import MainView
 from app.model.model import Model
+from app.model.quick_launch_index import QuickLaunchEntry, QuickLaunchIndex
+from app.model.ssh_multiplexer import MultiplexOptions
 from app.model.version_service import VersionInfo
+from app.port_forward_page import PortForwardsWidget
 from app.thread.get_latest_version_thread import GetLatestVersionThread
+from app.utility.resource_provider import preload_icons
 
 
 class MainController:
-    def __init__(self, view: MainView, model: Model) -> None:
+    def __init__(self, view: MainView, model: Model) -> None:  # noqa: PLR0915
         self.model = model
         view.setWindowTitle(f"Grasshopper {model.version.current}")
 
@@ -30,8 +41,24 @@ class MainController:
         view.light_theme_action.triggered.connect(lambda: self._change_theme("light"))
         view.about_action.triggered.connect(self._on_about)
         view.prompt_to_download_new_version_action.triggered.connect(self._change_prompt_to_download_new_version)
+        view.ssh_banner_probe_action.triggered.connect(self._change_ssh_banner_probe)
+        view.quick_launch_action.triggered.connect(self._on_quick_launch)
+        view.shared_connections_action.triggered.connect(self._on_shared_connections)
+        view.ssh_multiplexing_action.triggered.connect(self._change_ssh_multiplexing)
+        view.prewarm_action.triggered.connect(self._change_prewarm)
+        view.group_port_forwards_action.triggered.connect(self._change_group_port_forwards)
+        view.meter_port_forwards_action.triggered.connect(
+            lambda checked: self._change_meter_port_forwards(view.port_forwards_widget, checked)
+        )
 
         view.prompt_to_download_new_version_action.setChecked(model.settings.prompt_to_download_new_version)
+        view.ssh_banner_probe_action.setChecked(model.settings.probe_mode == ProbeMode.SSH_BANNER)
+        view.ssh_multiplexing_action.setChecked(model.settings.ssh_multiplexing)
+        view.ssh_multiplexing_action.setEnabled(model.multiplexer.supported)
+        view.prewarm_action.setChecked(model.settings.prewarm)
+        view.prewarm_action.setEnabled(model.multiplexer.prewarm_supported)
+        view.group_port_forwards_action.setChecked(model.settings.group_port_forwards)
+        view.meter_port_forwards_action.setChecked(model.settings.meter_port_forwards)
         if model.settings.theme == "dark":
             view.dark_theme_action.setChecked(True)
             self._change_theme("dark")
@@ -39,6 +66,32 @@ class MainController:
             view.light_theme_action.setChecked(True)
             self._change_theme("light")
 
+        preload_icons([*DEVICE_TYPE_ICONS.values(), *CONNECTION_STATUS_ICONS.values()])  # Painted in every table row
+        application = QApplication.instance()
+        assert isinstance(application, QApplication)
+        application.aboutToQuit.connect(model.probe.stop)
+        application.aboutToQuit.connect(model.forwards.stop_all)
+        application.aboutToQuit.connect(model.traffic.stop)
+        application.aboutToQuit.connect(ConfigFile.flush_all)  # After everything that saves on exit
+        self.pages = [view.direct_connections_widget, view.proxy_jumps_widget, view.port_forwards_widget]
+        model.probe.prefetch(host for page in self.pages for host, _ in page.model.endpoints())
+        for page in self.pages:
+            page.model.restore_connection_statuses(model.status_cache.get)
+            page.attach_probe_service(model.probe)
+            page.attach_multiplexer(model.multiplexer)
+            model.probe_scheduler.watch(page.model)
+            page.view.item_activated.connect(lambda row, page=page: model.usage_log.record(page.model.get(row).id))
+        view.port_forwards_widget.attach_forward_supervisor(model.forwards)
+        view.port_forwards_widget.attach_traffic_meter(model.traffic)
+        self.quick_launch_index = QuickLaunchIndex(
+            [
+                ("Direct Connection", view.direct_connections_widget.model),
+                ("Proxy Jump", view.proxy_jumps_widget.model),
+                ("Port Forward", view.port_forwards_widget.model),
+            ]
+        )
+        view.window_hidden_changed.connect(model.probe_scheduler.set_paused)
+
         self.version_check_thread = GetLatestVersionThread(model)
         self.version_check_thread.new_version_available.connect(self._on_new_version_available)
         self.version_check_thread.start()
@@ -50,6 +103,22 @@ class MainController:
             NewVersionController(latest, new_version_dialog, self.model)
             new_version_dialog.exec()
 
+    def _on_quick_launch(self):
+        """Show the quick launch palette."""
+        quick_launch_dialog = QuickLaunchView()
+        QuickLaunchController(quick_launch_dialog, self.quick_launch_index, self.model.usage_log, self._launch)
+        quick_launch_dialog.exec()
+
+    def _launch(self, entry: QuickLaunchEntry):
+        """Launch a connection found by the quick launch palette from its table."""
+        self.pages[entry.source].activate(entry.item_id)
+
+    def _on_shared_connections(self):
+        """Show the shared SSH connections."""
+        shared_connections_dialog = SharedConnectionsView()
+        SharedConnectionsController(shared_connections_dialog, self.model.multiplexer)
+        shared_connections_dialog.exec()
+
     def _on_about(self):
         """Show the about dialog."""
         about_dialog = AboutView()
@@ -71,3 +140,49 @@ class MainController:
             checked (bool): Whether to prompt to download new versions.
         """
         self.model.settings.set_prompt_to_download_new_version(checked)
+
+    def _change_ssh_banner_probe(self, checked: bool):
+        """Change whether connection checks wait for the SSH identification string of the server.
+
+        Args:
+            checked (bool): Whether to check the SSH banner.
+        """
+        self.model.settings.set_probe_mode(ProbeMode.SSH_BANNER if checked else ProbeMode.TCP)
+        self.model.probe.set_options(self.model.settings.probe_options())
+
+    def _change_ssh_multiplexing(self, checked: bool):
+        """Change whether sessions to the same destination share one SSH connection.
+
+        Args:
+            checked (bool): Whether to share SSH connections.
+        """
+        self.model.settings.set_ssh_multiplexing(checked)
+        self.model.multiplexer.set_options(MultiplexOptions.from_settings(self.model.settings))
+
+    def _change_prewarm(self, checked: bool):
+        """Change whether shared SSH connections are opened ahead of time for the selected or hovered row.
+
+        Args:
+            checked (bool): Whether to pre-warm connections.
+        """
+        self.model.settings.set_prewarm(checked)
+        self.model.multiplexer.set_options(MultiplexOptions.from_settings(self.model.settings))
+
+    def _change_group_port_forwards(self, checked: bool):
+        """Change whether port forwards to the same server run in one SSH process, restarting the running ones.
+
+        Args:
+            checked (bool): Whether to run port forwards to the same server together.
+        """
+        self.model.settings.set_group_port_forwards(checked)
+        self.model.forwards.set_grouped(checked)
+
+    def _change_meter_port_forwards(self, port_forwards_widget: PortForwardsWidget, checked: bool):
+        """Change whether the connections through port forwards are relayed and counted, restarting the running ones.
+
+        Args:
+            port_forwards_widget (PortForwardsWidget): Page running the port forwards.
+            checked (bool): Whether to meter port forward traffic.
+        """
+        self.model.settings.set_meter_port_forwards(checked)
+        port_forwards_widget.set_traffic_metering(checked)
@@ -1,5 +1,5 @@
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QAction, QActionGroup
+from PySide6.QtCore import QEvent, Qt, Signal
+from PySide6.QtGui import QAction, QActionGroup, QHideEvent, QKeySequence, QShowEvent
 from PySide6.QtWidgets import QDockWidget, QMainWindow, QMenu, QMenuBar, QTabWidget, QVBoxLayout, QWidget
 
 from app.direct_connection_page import DirectConnectionsWidget
@@ -10,25 +10,35 @@ from app.utility.resource_provider import get_icon
 
 
 class MainView(QMainWindow):
-    def __init__(self):
+    window_hidden_changed = Signal(bool)  # Whether the window is minimized or hidden
+
+    def __init__(self):  # noqa: PLR0915
         super().__init__()
         self.setWindowIcon(get_icon("logo_32x32.png"))
         self.resize(1000, 800)
         self._set_up_dock()
-        direct_connections_widget = DirectConnectionsWidget()
-        proxy_jumps_widget = ProxyJumpsWidget()
-        port_forwards_widget = PortForwardsWidget()
+        self.direct_connections_widget = DirectConnectionsWidget()
+        self.proxy_jumps_widget = ProxyJumpsWidget()
+        self.port_forwards_widget = PortForwardsWidget()
 
         file_menu = QMenu("&File", self)
         preferences_menu = QMenu("&Preferences", self)
         theme_menu = QMenu("&Theme", self)
         preferences_menu.addMenu(theme_menu)
 
+        self.quick_launch_action = QAction("&Quick Launch...")
+        self.quick_launch_action.setShortcut(QKeySequence("Ctrl+K"))
         self.open_ssh_directory_action = QAction("&Open SSH directory")
+        self.shared_connections_action = QAction("S&hared SSH connections...")
         self.light_theme_action = QAction("Light")
         self.dark_theme_action = QAction("Dark")
         self.about_action = QAction("&About")
         self.prompt_to_download_new_version_action = QAction("&Check version")
+        self.ssh_banner_probe_action = QAction("Check &SSH banner")
+        self.ssh_multiplexing_action = QAction("Share SSH &connections")
+        self.prewarm_action = QAction("&Pre-warm SSH connections")
+        self.group_port_forwards_action = QAction("Run port forwards to the same server &together")
+        self.meter_port_forwards_action = QAction("&Meter port forward traffic")
 
         theme_action_group = QActionGroup(self)
         theme_action_group.setExclusive(True)
@@ -38,14 +48,26 @@ class MainView(QMainWindow):
         theme_menu.addAction(self.dark_theme_action)
 
         self.prompt_to_download_new_version_action.setCheckable(True)
+        self.ssh_banner_probe_action.setCheckable(True)
+        self.ssh_multiplexing_action.setCheckable(True)
+        self.prewarm_action.setCheckable(True)
+        self.group_port_forwards_action.setCheckable(True)
+        self.meter_port_forwards_action.setCheckable(True)
 
+        file_menu.addAction(self.quick_launch_action)
         file_menu.addAction(self.open_ssh_directory_action)
+        file_menu.addAction(self.shared_connections_action)
         file_menu.addSeparator()
         file_menu.addMenu(preferences_menu)
         file_menu.addSeparator()
         file_menu.addAction("E&xit", self.close)
 
         preferences_menu.addAction(self.prompt_to_download_new_version_action)
+        preferences_menu.addAction(self.ssh_banner_probe_action)
+        preferences_menu.addAction(self.ssh_multiplexing_action)
+        preferences_menu.addAction(self.prewarm_action)
+        preferences_menu.addAction(self.group_port_forwards_action)
+        preferences_menu.addAction(self.meter_port_forwards_action)
 
         help_menu = QMenu("&Help", self)
         help_menu.addAction(self.about_action)
@@ -56,9 +78,9 @@ class MainView(QMainWindow):
         self.setMenuBar(menu_bar)
 
         tabs = QTabWidget()
-        tabs.addTab(direct_connections_widget, "Direct Connections")
-        tabs.addTab(proxy_jumps_widget, "Proxy Jumps")
-        tabs.addTab(port_forwards_widget, "Port Forwards")
+        tabs.addTab(self.direct_connections_widget, "Direct Connections")
+        tabs.addTab(self.proxy_jumps_widget, "Proxy Jumps")
+        tabs.addTab(self.port_forwards_widget, "Port Forwards")
 
         layout = QVBoxLayout()
         layout.addWidget(tabs)
@@ -67,6 +89,19 @@ class MainView(QMainWindow):
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
+    def changeEvent(self, event: QEvent) -> None:
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.window_hidden_changed.emit(self.isMinimized())
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        self.window_hidden_changed.emit(self.isMinimized())
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        super().hideEvent(event)
+        self.window_hidden_changed.emit(True)
+
     def _set_up_dock(self) -> None:
         self.log_view = LogView()
         dock = QDockWidget("Log")
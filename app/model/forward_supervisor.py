@@ -0,0 +1,527 @@
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from sys import platform
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+READY_POLL_INTERVAL_MS = 250  # How often a starting tunnel is checked for its local port
+BASE_RESTART_DELAY = 1.0  # Seconds before the first restart of a tunnel that exited
+MAX_RESTART_DELAY = 60.0
+STABLE_UPTIME = 60.0  # Seconds a tunnel has to stay up for the restart delay to start again from the base delay
+STOP_TIMEOUT_MS = 2000  # How long a tunnel has to exit after being asked to before it is killed
+# Tunnels run without a terminal, so they must not prompt. They exit if their forwards can't be set up or the server
+# stops responding, so that they are restarted.
+SUPERVISED_SSH_OPTIONS = [
+    "BatchMode=yes",
+    "ExitOnForwardFailure=yes",
+    "ServerAliveInterval=15",
+    "ServerAliveCountMax=3",
+]
+
+
+class ForwardState(str, Enum):
+    STOPPED = "Stopped"
+    STARTING = "Starting"
+    UP = "Up"
+    FAILED = "Failed"  # Exited, and restarting after a delay unless it couldn't be started at all
+
+
+FORWARD_STATE_ICONS = {
+    ForwardState.STOPPED: "gray_circle.png",
+    ForwardState.STARTING: "gray_circle.png",
+    ForwardState.UP: "green_circle.png",
+    ForwardState.FAILED: "red_circle.png",
+}
+
+
+@dataclass(frozen=True)
+class ForwardStatus:
+    """The state of the ssh process running a tunnel."""
+
+    state: ForwardState
+    up_since: float | None = None  # Monotonic time the tunnel came up
+    restarts: int = 0  # Times the tunnel has been restarted since it was started
+    retry_at: float | None = None  # Monotonic time of the next restart, while failed
+    error: str = ""  # Last line ssh wrote to stderr
+
+    def state_text(self, now: float | None = None) -> str:
+        """Get a description of the state for display, including when a failed tunnel is restarted."""
+        if self.state == ForwardState.FAILED and self.retry_at is not None:
+            remaining = max(0, round(self.retry_at - (time.monotonic() if now is None else now)))
+            return f"Failed, retrying in {remaining} s"
+        return self.state.value
+
+    def uptime_text(self, now: float | None = None) -> str:
+        """Get how long the tunnel has been up for display, e.g. '1:02:03', or an empty string if it isn't up."""
+        if self.up_since is None:
+            return ""
+        seconds = int((time.monotonic() if now is None else now) - self.up_since)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+STOPPED_STATUS = ForwardStatus(ForwardState.STOPPED)
+
+
+@dataclass(frozen=True)
+class TunnelSpec:
+    """What a tunnel forwards, and through which server."""
+
+    server: tuple[str, ...]  # Arguments of ssh that log in to the server, e.g. the destination, -p and -i
+    forward: str  # Argument of -L
+    local_port: int  # Port the tunnel listens on, which shows that it is up
+
+
+@dataclass
+class _Tunnel:
+    spec: TunnelSpec
+    status: ForwardStatus
+    failures: int = 0  # Times in a row the tunnel couldn't be added to a process, which sets its retry delay
+
+
+@dataclass
+class _Group:
+    """The tunnels run by one ssh process."""
+
+    server: tuple[str, ...]
+    control_path: str | None  # Socket tunnels are added and cancelled through while the process runs
+    tunnels: dict[str, _Tunnel] = field(default_factory=dict)  # ID of the port forward -> tunnel
+    process: QProcess | None = None
+    live: set[str] = field(default_factory=set)  # Tunnels the process has set up, or is setting up
+    ports: set[int] = field(default_factory=set)  # Local ports the process was given, which it may listen on
+    connected: bool = False  # Whether the process has logged in, which one of its tunnels coming up shows
+    up_since: float | None = None  # Monotonic time the process logged in
+    retry_at: float | None = None  # Monotonic time of the next restart, while failed
+    failures: int = 0  # Exits in a row without staying up for STABLE_UPTIME, which sets the restart delay
+    error: str = ""  # Last line the process wrote to stderr
+
+
+class ForwardSupervisor(QObject):
+    """Runs the started port forwards as ssh child processes, and restarts them when they exit.
+
+    A tunnel is starting until its local port is listening, and then up. When its ssh exits, the tunnel is failed and
+    restarted after a delay that doubles with each exit in a row, up to `MAX_RESTART_DELAY`, with random jitter so that
+    tunnels through the same server don't all reconnect at once. A tunnel that stays up for `STABLE_UPTIME` goes back
+    to the base delay. Stopping a tunnel asks its ssh to exit without waiting for it, and a tunnel started on one of its
+    ports is added once it has; `stop_all` ends every one and waits for them, e.g. before exiting.
+
+    When grouped, the tunnels through the same server share one ssh process with a -L for each, so that there is one
+    login per server rather than per tunnel. The process is a control master, and tunnels started or stopped while it
+    is logged in are added or cancelled through its control socket, leaving the other tunnels running. Where there
+    are no control sockets (Windows) the process is restarted with the new set of tunnels instead. A tunnel whose
+    local port is taken by another program, or that can't be added to its process, is failed on its own, so that it
+    can't take its group down, and retried after a delay in the same way.
+    """
+
+    status_changed = Signal(str, object)  # ID of the port forward, ForwardStatus
+    ports_released = Signal(list)  # Local ports a stopped tunnel's process has let go of
+
+    def __init__(self, control_dir: str, grouped: bool = False) -> None:
+        super().__init__()
+        self.control_dir = control_dir  # Where the control sockets of grouped processes are created
+        self.grouped = grouped
+        self._groups: dict[str, _Group] = {}  # Key of the group -> group
+        self._group_keys: dict[str, str] = {}  # ID of the port forward -> key of its group
+        self._unlaunched: set[str] = set()  # Keys of the groups to launch once the tunnels started together are added
+        # ID of the port forward -> tunnel that isn't in a group, because it failed on its own and is waiting for its
+        # retry, or because it is waiting for its port to be freed
+        self._waiting: dict[str, _Tunnel] = {}
+        self._ending: dict[QProcess, set[int]] = {}  # Processes asked to exit or cancel tunnels -> ports they free
+        self._launch_timer = QTimer(self)
+        self._launch_timer.setSingleShot(True)
+        self._launch_timer.setInterval(0)
+        self._launch_timer.timeout.connect(self._launch_pending)
+        self._ready_timer = QTimer(self)
+        self._ready_timer.setInterval(READY_POLL_INTERVAL_MS)
+        self._ready_timer.timeout.connect(self._check_starting)
+
+    @property
+    def live_control_supported(self) -> bool:
+        return platform != "win32"
+
+    def status(self, item_id: str) -> ForwardStatus:
+        tunnel = self._tunnel(item_id)
+        return tunnel.status if tunnel is not None else STOPPED_STATUS
+
+    def is_running(self, item_id: str) -> bool:
+        """Whether a tunnel has been started and not stopped, whatever its state."""
+        return item_id in self._group_keys or item_id in self._waiting
+
+    def releasing(self, port: int) -> bool:
+        """Whether a local port is still held by the process of a tunnel that has been stopped."""
+        return any(port in ports for ports in self._ending.values())
+
+    def set_grouped(self, grouped: bool) -> None:
+        """Change whether tunnels through the same server share one process, restarting the running tunnels."""
+        if grouped == self.grouped:
+            return
+        specs = {item_id: self._groups[key].tunnels[item_id].spec for item_id, key in self._group_keys.items()}
+        specs |= {item_id: tunnel.spec for item_id, tunnel in self._waiting.items()}
+        self._stop(list(specs))
+        self.grouped = grouped
+        for item_id, spec in specs.items():
+            self.start(item_id, spec)
+
+    def start(self, item_id: str, spec: TunnelSpec) -> None:
+        """Start a tunnel, or restart it with a new spec if it is running."""
+        self.stop(item_id)
+        self._add(item_id, _Tunnel(spec, ForwardStatus(ForwardState.STARTING)))
+
+    def stop(self, item_id: str) -> None:
+        self._stop([item_id])
+
+    def stop_all(self) -> None:
+        """Stop every tunnel and wait for their processes to exit, e.g. before exiting."""
+        self._stop([*self._group_keys, *self._waiting])
+        for process in list(self._ending):
+            if not process.waitForFinished(STOP_TIMEOUT_MS):
+                process.kill()
+                process.waitForFinished(STOP_TIMEOUT_MS)
+
+    def _add(self, item_id: str, tunnel: _Tunnel) -> None:
+        if self.releasing(tunnel.spec.local_port):
+            # Added once the process that has the port lets go of it
+            tunnel.status = ForwardStatus(ForwardState.STARTING, restarts=tunnel.status.restarts)
+            self._waiting[item_id] = tunnel
+            self.status_changed.emit(item_id, tunnel.status)
+            return
+        if _is_listening(tunnel.spec.local_port):
+            self._retry_later(item_id, tunnel, f"Port {tunnel.spec.local_port} is already in use")
+            return
+        key = "\0".join(tunnel.spec.server) if self.grouped else item_id
+        group = self._groups.get(key)
+        if group is None:
+            control_path = None
+            if self.grouped and self.live_control_supported:
+                control_path = os.path.join(self.control_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+            group = self._groups[key] = _Group(tunnel.spec.server, control_path)
+        tunnel.status = ForwardStatus(ForwardState.STARTING, restarts=tunnel.status.restarts)
+        group.tunnels[item_id] = tunnel
+        self._group_keys[item_id] = key
+        if group.process is None and group.retry_at is not None:
+            # Started with the group when it is restarted
+            self._set_status(item_id, ForwardStatus(ForwardState.FAILED, retry_at=group.retry_at, error=group.error))
+        elif group.process is None:
+            # Tunnels started one after another, e.g. by switching modes, are launched with one process
+            self.status_changed.emit(item_id, group.tunnels[item_id].status)
+            self._unlaunched.add(key)
+            self._launch_timer.start()
+        elif group.control_path is None:
+            self._relaunch(key)
+        else:
+            # Added through the control socket now, or once the process has logged in
+            self.status_changed.emit(item_id, group.tunnels[item_id].status)
+            if group.connected:
+                self._forward_live(key, item_id)
+            if not self._ready_timer.isActive():
+                self._ready_timer.start()
+
+    def _retry_later(self, item_id: str, tunnel: _Tunnel, error: str) -> None:
+        """Fail a tunnel that isn't in a group, and add it again after a delay."""
+        delay = _restart_delay(tunnel.failures)
+        tunnel.failures += 1
+        tunnel.status = ForwardStatus(
+            ForwardState.FAILED, restarts=tunnel.status.restarts, retry_at=time.monotonic() + delay, error=error
+        )
+        self._waiting[item_id] = tunnel
+        logging.warning("Tunnel on port %d failed: %s. Retrying in %.1f s", tunnel.spec.local_port, error, delay)
+        self.status_changed.emit(item_id, tunnel.status)
+        QTimer.singleShot(round(delay * 1000), self, lambda: self._retry(item_id, tunnel))
+
+    def _retry(self, item_id: str, tunnel: _Tunnel) -> None:
+        if self._waiting.get(item_id) is not tunnel:
+            return  # Stopped or started again in the meantime
+        del self._waiting[item_id]
+        tunnel.status = dataclasses.replace(tunnel.status, restarts=tunnel.status.restarts + 1)
+        self._add(item_id, tunnel)
+
+    def _launch(self, key: str) -> None:
+        group = self._groups[key]
+        for item_id, tunnel in list(group.tunnels.items()):
+            if _is_listening(tunnel.spec.local_port):
+                del group.tunnels[item_id], self._group_keys[item_id]
+                self._retry_later(item_id, tunnel, f"Port {tunnel.spec.local_port} is already in use")
+        if not group.tunnels:
+            del self._groups[key]
+            return
+        options = list(SUPERVISED_SSH_OPTIONS)
+        if group.control_path is not None:
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            with contextlib.suppress(OSError):
+                os.remove(group.control_path)  # Left behind by a process that was killed
+            options += ["ControlMaster=yes", f"ControlPath={group.control_path}", "ControlPersist=no"]
+        else:
+            options.append("ControlPath=none")  # Not shared with sessions, so that the process is owned here
+        forwards = [argument for tunnel in group.tunnels.values() for argument in ("-L", tunnel.spec.forward)]
+        arguments = [*(argument for option in options for argument in ("-o", option)), "-N", *forwards, *group.server]
+        process = QProcess(self)
+        process.readyReadStandardError.connect(lambda: self._on_stderr(key, process))
+        process.finished.connect(lambda exit_code, _status: self._on_finished(key, process, exit_code))
+        process.errorOccurred.connect(lambda error: self._on_error(key, process, error))
+        group.process = process
+        group.live = set(group.tunnels)
+        group.ports = {tunnel.spec.local_port for tunnel in group.tunnels.values()}
+        group.connected = False
+        group.up_since = group.retry_at = None
+        for item_id, tunnel in group.tunnels.items():
+            self._set_status(item_id, dataclasses.replace(tunnel.status, state=ForwardState.STARTING, retry_at=None))
+        logging.info("Starting %d tunnel(s): ssh %s", len(group.tunnels), " ".join(arguments))
+        process.start("ssh", arguments)
+        if not self._ready_timer.isActive():
+            self._ready_timer.start()
+
+    def _launch_pending(self) -> None:
+        unlaunched, self._unlaunched = self._unlaunched, set()
+        ending = set().union(*self._ending.values())
+        for key in unlaunched:
+            group = self._groups.get(key)
+            if group is None or group.process is not None:
+                continue
+            if ending & {tunnel.spec.local_port for tunnel in group.tunnels.values()}:
+                self._unlaunched.add(key)  # Launched once the processes that have its ports exit
+            else:
+                self._launch(key)
+
+    def _launch_later(self, key: str) -> None:
+        self._unlaunched.add(key)
+        self._launch_timer.start()
+
+    def _relaunch(self, key: str) -> None:
+        """Restart a process with its current tunnels, because they can't be changed while it runs."""
+        group = self._groups[key]
+        if group.process is not None:
+            self._end(group.process, group.ports)
+            group.process = None
+            group.live.clear()
+            group.connected = False
+        self._launch_later(key)
+
+    def _forward_live(self, key: str, item_id: str) -> None:
+        """Add a tunnel to a running process through its control socket."""
+        group = self._groups[key]
+        group.live.add(item_id)
+        group.ports.add(group.tunnels[item_id].spec.local_port)
+        master = group.process
+        process = QProcess(self)
+        process.finished.connect(
+            lambda exit_code, _status: self._on_forwarded(key, item_id, master, process, exit_code)
+        )
+        process.start("ssh", self._control_arguments(group, "forward", group.tunnels[item_id].spec))
+
+    def _on_forwarded(self, key: str, item_id: str, master: QProcess | None, process: QProcess, exit_code: int) -> None:
+        process.deleteLater()
+        if exit_code == 0:
+            return
+        lines = bytes(process.readAllStandardError().data()).decode(errors="replace").strip().splitlines()
+        error = lines[-1] if lines else f"exit code {exit_code}"
+        group = self._groups.get(key)
+        if group is None or group.process is not master or item_id not in group.tunnels:
+            return  # Stopped, or the process exited, which restarts the tunnel with the others
+        group.live.discard(item_id)
+        del self._group_keys[item_id]
+        self._retry_later(item_id, group.tunnels.pop(item_id), error)
+
+    def _cancel_live(self, key: str, group: _Group, spec: TunnelSpec) -> None:
+        """Cancel a tunnel of a running process through its control socket, restarting the process if that fails."""
+        master = group.process
+        process = QProcess(self)
+        self._ending[process] = {spec.local_port}
+        process.finished.connect(lambda: self._on_cancelled(key, master, process, spec))
+        process.errorOccurred.connect(lambda error: self._on_cancel_error(key, master, process, spec, error))
+        process.start("ssh", self._control_arguments(group, "cancel", spec))
+        QTimer.singleShot(STOP_TIMEOUT_MS, process, process.kill)
+
+    def _on_cancel_error(
+        self, key: str, master: QProcess | None, process: QProcess, spec: TunnelSpec, error: QProcess.ProcessError
+    ) -> None:
+        if error == QProcess.ProcessError.FailedToStart:
+            self._on_cancelled(key, master, process, spec)  # Otherwise handled when the process finishes
+
+    def _on_cancelled(self, key: str, master: QProcess | None, process: QProcess, spec: TunnelSpec) -> None:
+        # Failed to start, was killed for taking too long, or exited with an error
+        if process.error() != QProcess.ProcessError.UnknownError or process.exitCode() != 0:
+            logging.warning("Could not cancel the tunnel on port %d: %s", spec.local_port, process.errorString())
+            group = self._groups.get(key)
+            if group is not None and group.process is master:
+                self._relaunch(key)  # The port would stay taken otherwise
+        self._on_released(process)
+
+    def _control_arguments(self, group: _Group, command: str, spec: TunnelSpec) -> list[str]:
+        return ["-o", f"ControlPath={group.control_path}", "-O", command, "-L", spec.forward, *group.server]
+
+    def _check_starting(self) -> None:
+        waiting = False
+        for key, group in list(self._groups.items()):
+            if group.process is None:
+                continue
+            for item_id in group.live:
+                tunnel = group.tunnels[item_id]
+                if tunnel.status.state != ForwardState.STARTING:
+                    continue
+                if _is_listening(tunnel.spec.local_port):
+                    tunnel.failures = 0
+                    self._set_status(
+                        item_id, dataclasses.replace(tunnel.status, state=ForwardState.UP, up_since=time.monotonic())
+                    )
+                    if not group.connected:
+                        group.connected = True
+                        group.up_since = time.monotonic()
+                else:
+                    waiting = True
+            if group.connected:
+                for item_id in group.tunnels.keys() - group.live:
+                    self._forward_live(key, item_id)
+                    waiting = True
+            elif len(group.tunnels) > len(group.live):
+                waiting = True
+        if not waiting:
+            self._ready_timer.stop()
+
+    def _on_stderr(self, key: str, process: QProcess) -> None:
+        group = self._groups.get(key)
+        lines = bytes(process.readAllStandardError().data()).decode(errors="replace").strip().splitlines()
+        if group is not None and group.process is process and lines:
+            group.error = lines[-1]
+
+    def _on_finished(self, key: str, process: QProcess, exit_code: int) -> None:
+        process.deleteLater()
+        group = self._groups.get(key)
+        if group is None or group.process is not process:
+            return  # Stopped, or restarted with other tunnels
+        group.process = None
+        group.live.clear()
+        group.connected = False
+        if group.up_since is not None and time.monotonic() - group.up_since >= STABLE_UPTIME:
+            group.failures = 0
+        delay = _restart_delay(group.failures)
+        group.failures += 1
+        group.retry_at = time.monotonic() + delay
+        logging.warning(
+            "Tunnel(s) through %s exited (exit code %d): %s. Restarting in %.1f s",
+            group.server[0],
+            exit_code,
+            group.error,
+            delay,
+        )
+        for item_id, tunnel in group.tunnels.items():
+            self._set_status(
+                item_id,
+                dataclasses.replace(
+                    tunnel.status, state=ForwardState.FAILED, up_since=None, retry_at=group.retry_at, error=group.error
+                ),
+            )
+        QTimer.singleShot(round(delay * 1000), self, lambda: self._restart(key, group))
+
+    def _on_error(self, key: str, process: QProcess, error: QProcess.ProcessError) -> None:
+        group = self._groups.get(key)
+        if error != QProcess.ProcessError.FailedToStart or group is None or group.process is not process:
+            return  # Crashes are handled when the process finishes
+        # ssh isn't installed or can't be run, so restarting won't help
+        process.deleteLater()
+        group.process = None
+        group.live.clear()
+        group.error = process.errorString()
+        logging.error("Could not start ssh for the tunnel(s) through %s: %s", group.server[0], group.error)
+        for item_id, tunnel in group.tunnels.items():
+            self._set_status(
+                item_id, ForwardStatus(ForwardState.FAILED, restarts=tunnel.status.restarts, error=group.error)
+            )
+
+    def _restart(self, key: str, group: _Group) -> None:
+        if self._groups.get(key) is not group or group.process is not None:
+            return  # Stopped or started again in the meantime
+        for tunnel in group.tunnels.values():
+            tunnel.status = dataclasses.replace(tunnel.status, restarts=tunnel.status.restarts + 1)
+        self._launch_later(key)
+
+    def _tunnel(self, item_id: str) -> _Tunnel | None:
+        key = self._group_keys.get(item_id)
+        return self._groups[key].tunnels[item_id] if key is not None else self._waiting.get(item_id)
+
+    def _set_status(self, item_id: str, status: ForwardStatus) -> None:
+        self._groups[self._group_keys[item_id]].tunnels[item_id].status = status
+        self.status_changed.emit(item_id, status)
+
+    def _stop(self, item_ids: list[str]) -> None:
+        stopping: dict[str, list[str]] = {}  # Key of the group -> IDs of its tunnels to stop
+        for item_id in item_ids:
+            key = self._group_keys.pop(item_id, None)
+            if key is not None:
+                stopping.setdefault(key, []).append(item_id)
+                self.status_changed.emit(item_id, STOPPED_STATUS)
+            elif self._waiting.pop(item_id, None) is not None:
+                self.status_changed.emit(item_id, STOPPED_STATUS)
+        relaunch: list[str] = []
+        for key, stopped in stopping.items():
+            group = self._groups[key]
+            live = [group.tunnels[item_id] for item_id in stopped if item_id in group.live]
+            for item_id in stopped:
+                del group.tunnels[item_id]
+                group.live.discard(item_id)
+            if not group.tunnels:
+                del self._groups[key]
+                if group.process is not None:
+                    self._end(group.process, group.ports)
+            elif group.process is None or not live:
+                continue
+            elif not group.connected or group.control_path is None:
+                relaunch.append(key)  # Its forwards were given when the process started
+            else:
+                for tunnel in live:
+                    self._cancel_live(key, group, tunnel.spec)
+        for key in relaunch:
+            self._relaunch(key)
+
+    def _end(self, process: QProcess, ports: set[int]) -> None:
+        """Ask a process that is no longer supervised to exit, killing it if it doesn't within `STOP_TIMEOUT_MS`."""
+        self._ending[process] = set(ports)
+        process.finished.connect(lambda: self._on_released(process))
+        # Console programs on Windows can only be killed
+        if platform == "win32":
+            process.kill()
+        else:
+            process.terminate()
+        QTimer.singleShot(STOP_TIMEOUT_MS, process, process.kill)
+
+    def _on_released(self, process: QProcess) -> None:
+        """Add the tunnels that were waiting for the ports a process has let go of."""
+        ports = self._ending.pop(process, set())
+        process.deleteLater()
+        for item_id, tunnel in list(self._waiting.items()):
+            if tunnel.spec.local_port in ports and tunnel.status.state == ForwardState.STARTING:
+                del self._waiting[item_id]
+                self._add(item_id, tunnel)
+        if self._unlaunched:
+            self._launch_timer.start()
+        if ports:
+            self.ports_released.emit(sorted(ports))
+
+
+def _restart_delay(failures: int) -> float:
+    """Get the delay before restarting after failures in a row, doubling with each one, with random jitter."""
+    delay = min(MAX_RESTART_DELAY, BASE_RESTART_DELAY * 2**failures)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _is_listening(port: int) -> bool:
+    """Check whether something is listening on a local port, without connecting to it."""
+    # Connecting would open a channel through the tunnel, so try to take the port instead
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        if platform != "win32":
+            # Ignore connections of an earlier listener still in TIME_WAIT, as ssh does when it listens; on Windows
+            # this would allow sharing the port
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            probe.bind(("127.0.0.1", port))
+        except OSError:
+            return True
+    return False
@@ -1,6 +1,17 @@
+import os
+
+from app.connection_store import set_store_backend
+from app.model.forward_supervisor import ForwardSupervisor
+from app.model.probe_scheduler import ProbeScheduler
+from app.model.probe_service import ProbeService
+from app.model.ssh_multiplexer import MultiplexOptions, SshMultiplexer
 from app.model.ssh_service import SshService
+from app.model.status_cache import StatusCache
+from app.model.traffic_meter import TrafficMeter
+from app.model.usage_log import UsageLog
 from app.model.version_service import VersionService
 from app.settings import Settings
+from app.utility.dns_cache import DnsCache
 
 
 class Model:
@@ -10,3 +21,20 @@ class Model:
 
         self.settings = Settings()
         self.settings.load()
+        set_store_backend(self.settings.connection_store)  # Before any connection table is opened
+
+        self.dns_cache = DnsCache(self.settings.dns_positive_ttl, self.settings.dns_negative_ttl)
+        self.probe = ProbeService(self.dns_cache, self.settings.probe_options())
+        self.probe_scheduler = ProbeScheduler(self.probe, self.settings.max_probes_per_second)
+        self.status_cache = StatusCache(self.settings.status_cache_max_age)
+        self.status_cache.load()
+        self.probe.status_updated.connect(self.status_cache.record)
+        self.usage_log = UsageLog()
+        self.usage_log.load()
+        self.multiplexer = SshMultiplexer(MultiplexOptions.from_settings(self.settings))
+        self.multiplexer.load()
+        self.multiplexer.prewarm_excluded_hosts_changed.connect(self.settings.set_prewarm_excluded_hosts)
+        self.forwards = ForwardSupervisor(
+            os.path.join(os.path.dirname(self.multiplexer.control_dir), "tunnels"), self.settings.group_port_forwards
+        )
+        self.traffic = TrafficMeter(self.settings.meter_port_forwards)
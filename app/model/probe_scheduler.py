@@ -0,0 +1,126 @@
+import heapq
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from PySide6.QtCore import QObject, QTimer
+
+from app.common import ModelBase
+from app.connection_status import ConnectionStatus, Endpoint, ProbeResult
+from app.model.probe_service import ProbeService
+from app.settings import DEFAULT_MAX_PROBES_PER_SECOND
+from app.thread.probe_thread import ProbePriority
+
+MIN_INTERVAL = 15.0  # Seconds between checks of a host whose status just changed
+MAX_STABLE_INTERVAL = 600.0  # Longest gap between checks of a host that stays online
+MAX_OFFLINE_INTERVAL = 300.0  # Longest gap between checks of a host that stays offline
+JITTER = 0.1  # Fraction each interval is randomly shortened or lengthened by, so checks don't line up
+TICK_MS = 250
+
+
+@dataclass
+class _Schedule:
+    interval: float
+    next_due: float
+    status: ConnectionStatus = ConnectionStatus.UNKNOWN
+
+
+class ProbeScheduler(QObject):
+    """Keeps connection statuses fresh by re-checking hosts in the background.
+
+    Every endpoint used by a watched model gets its own check interval. The interval is reset to the minimum whenever
+    the status of the endpoint changes, then doubles after every check that returns the same status (up to a longer
+    cap for online hosts than offline ones). Due checks are handed to the probe service at no more than
+    `max_probes_per_second`, and nothing is checked while the scheduler is paused.
+    """
+
+    def __init__(self, probe_service: ProbeService, max_probes_per_second: float = DEFAULT_MAX_PROBES_PER_SECOND):
+        super().__init__()
+        self.probe_service = probe_service
+        self.max_probes_per_second = max_probes_per_second
+        self._schedules: dict[Endpoint, _Schedule] = {}
+        self._due: list[tuple[float, Endpoint]] = []  # Heap of (due time, endpoint); outdated entries are skipped
+        self._sources: dict[int, set[Endpoint]] = {}  # Endpoints used by each watched model
+        self._users: Counter[Endpoint] = Counter()  # Number of watched models using each endpoint
+        self._tokens = 0.0
+        self._last_tick = time.monotonic()
+
+        self.probe_service.status_updated.connect(self._on_status_updated)
+        self._timer = QTimer(self)
+        self._timer.setInterval(TICK_MS)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start()
+
+    def watch(self, model: ModelBase) -> None:
+        """Keep the endpoints of a model scheduled, following it as items are added, edited and deleted."""
+        model.endpoints_changed.connect(lambda: self._set_source_endpoints(id(model), model.endpoints()))
+        self._set_source_endpoints(id(model), model.endpoints())
+
+    def set_paused(self, paused: bool) -> None:
+        """Stop or restart background checks, e.g. while the main window is hidden."""
+        if paused:
+            self._timer.stop()
+        elif not self._timer.isActive():
+            self._last_tick = time.monotonic()
+            self._timer.start()
+
+    def _set_source_endpoints(self, source: int, endpoints: list[Endpoint]) -> None:
+        new_endpoints = set(endpoints)
+        old_endpoints = self._sources.get(source, set())
+        self._sources[source] = new_endpoints
+
+        now = time.monotonic()
+        for endpoint in new_endpoints - old_endpoints:
+            self._users[endpoint] += 1
+            if endpoint not in self._schedules:
+                # New endpoints are checked straight away by their page, so the first background check can wait
+                self._schedules[endpoint] = _Schedule(interval=MIN_INTERVAL, next_due=now + _jitter(MIN_INTERVAL))
+                heapq.heappush(self._due, (self._schedules[endpoint].next_due, endpoint))
+        for endpoint in old_endpoints - new_endpoints:
+            self._users[endpoint] -= 1
+            if self._users[endpoint] <= 0:
+                del self._users[endpoint]
+                del self._schedules[endpoint]
+
+    def _on_status_updated(self, host: str, port: int, result: ProbeResult) -> None:
+        schedule = self._schedules.get((host, port))
+        if schedule is None:
+            return
+
+        if result.status == ConnectionStatus.UNKNOWN or result.status != schedule.status:
+            schedule.interval = MIN_INTERVAL
+        elif result.status == ConnectionStatus.ONLINE:
+            schedule.interval = min(schedule.interval * 2, MAX_STABLE_INTERVAL)
+        else:
+            schedule.interval = min(schedule.interval * 2, MAX_OFFLINE_INTERVAL)
+        schedule.status = result.status
+        schedule.next_due = time.monotonic() + _jitter(schedule.interval)
+        heapq.heappush(self._due, (schedule.next_due, (host, port)))
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._tokens + (now - self._last_tick) * self.max_probes_per_second, self.max_probes_per_second
+        )
+        self._last_tick = now
+
+        due = []
+        while self._due and self._due[0][0] <= now and len(due) < int(self._tokens):
+            due_time, endpoint = heapq.heappop(self._due)
+            schedule = self._schedules.get(endpoint)
+            if schedule is not None and schedule.next_due == due_time:  # Skip outdated heap entries
+                # Checks are rescheduled when their result arrives; until then, hold the endpoint back
+                schedule.next_due = float("inf")
+                due.append(endpoint)
+        if due:
+            self._tokens -= len(due)
+            self.probe_service.probe(due, ProbePriority.BACKGROUND)
+
+        if len(self._due) > 4 * len(self._schedules) + 64:
+            self._due = [(t, e) for t, e in self._due if e in self._schedules and self._schedules[e].next_due == t]
+            heapq.heapify(self._due)
+
+
+def _jitter(interval: float) -> float:
+    return interval * random.uniform(1 - JITTER, 1 + JITTER)
@@ -0,0 +1,98 @@
+import dataclasses
+import logging
+import time
+from collections.abc import Iterable
+
+from PySide6.QtCore import QObject, Signal
+
+from app.connection_status import Endpoint, ProbeOptions, ProbeResult
+from app.thread.probe_thread import ProbePriority, ProbeThread
+from app.utility.dns_cache import DnsCache
+from app.utility.latency_history import LatencyHistory
+from app.utility.resource_provider import resource_cache_stats
+
+
+class ProbeService(QObject):
+    """Checks the reachability of endpoints on a single shared probe thread.
+
+    The service is shared by every table. Requests for an endpoint that is already being checked join the check that
+    is in flight instead of starting another one, and every result is broadcast once through `status_updated` so that
+    each model can apply it to all of its rows using that endpoint. The connect latency of every check is kept in a
+    bounded history per endpoint, and each result carries the percentiles of that history.
+    """
+
+    status_updated = Signal(str, int, ProbeResult)  # host, port, result
+
+    def __init__(self, dns_cache: DnsCache, options: ProbeOptions) -> None:
+        super().__init__()
+        self.dns_cache = dns_cache
+        self.latency_history = LatencyHistory()
+        self._in_flight: dict[Endpoint, ProbePriority] = {}
+        self._thread = ProbeThread(dns_cache, options)
+        self._thread.probe_finished.connect(self._on_probe_finished)
+        self._thread.start()
+
+    def probe(self, endpoints: Iterable[Endpoint], priority: ProbePriority = ProbePriority.NORMAL) -> None:
+        """Check the reachability of a batch of endpoints.
+
+        Results are delivered through the `status_updated` signal as each check completes. Endpoints that are already
+        waiting to be checked are moved forward if the new priority is better.
+        """
+        endpoints = list(endpoints)
+        new_endpoints = []
+        for endpoint in endpoints:
+            if endpoint not in self._in_flight:
+                self._in_flight[endpoint] = priority
+                new_endpoints.append(endpoint)
+        if new_endpoints:
+            self._thread.submit(new_endpoints, priority)
+        self.prioritize(endpoints, priority)
+
+    def prioritize(self, endpoints: Iterable[Endpoint], priority: ProbePriority) -> None:
+        """Move endpoints that are waiting to be checked forward, e.g. because their rows are on screen."""
+        moved_endpoints = []
+        for endpoint in endpoints:
+            if self._in_flight.get(endpoint, priority) > priority:
+                self._in_flight[endpoint] = priority
+                moved_endpoints.append(endpoint)
+        if moved_endpoints:
+            self._thread.prioritize(moved_endpoints, priority)
+
+    @property
+    def options(self) -> ProbeOptions:
+        return self._thread.options
+
+    def set_options(self, options: ProbeOptions) -> None:
+        """Change how endpoints are checked. Checks that are already running finish with the old options."""
+        self._thread.options = options
+
+    def prefetch(self, hosts: Iterable[str]) -> None:
+        """Resolve host names in the background so that later checks don't wait on name resolution."""
+        self._thread.prefetch(host for host in hosts if host)
+
+    def stop(self) -> None:
+        """Stop the probe thread."""
+        self._thread.stop()
+
+    def _on_probe_finished(self, host: str, port: int, result: ProbeResult) -> None:
+        endpoint = (host, port)
+        self._in_flight.pop(endpoint, None)
+        if result.latency_ms is not None:
+            self.latency_history.record(endpoint, result.latency_ms)
+        result = dataclasses.replace(
+            result,
+            latency_p50_ms=self.latency_history.percentile(endpoint, 50),
+            latency_p95_ms=self.latency_history.percentile(endpoint, 95),
+            checked_at=time.time(),
+        )
+        self.status_updated.emit(host, port, result)
+        if not self._in_flight:
+            dns = self.dns_cache.stats()
+            resources = resource_cache_stats()  # The icons of the results are drawn from it
+            logging.debug(
+                "Connection checks complete (DNS cache: %d hits, %d misses; resource cache: %d hits, %d misses)",
+                dns.hits,
+                dns.misses,
+                resources.hits,
+                resources.misses,
+            )
@@ -0,0 +1,156 @@
+import heapq
+import math
+import re
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from PySide6.QtCore import QModelIndex, QObject, QTimer
+
+from app.common import ModelBase
+from app.model.usage_log import UsageLog
+
+REBUILD_DELAY_MS = 1000  # Quiet period after the connections change before the index is rebuilt
+DEFAULT_RESULT_LIMIT = 50
+FRECENCY_WEIGHT = 1.0  # How much the frecency of a connection counts against how well it matches
+WORD_START_BONUS = 0.5  # Added when a match starts at the start of a word
+MAX_MATCH_SCORE = 1 + WORD_START_BONUS  # Score of a query found as it is at the start of a word
+_WORD_SEPARATORS = " \n-_.@:/"
+_ENTRY_SEPARATOR = "\0"
+
+
+@dataclass(slots=True)
+class QuickLaunchEntry:
+    source: int  # Position of the table the connection is in, in the sources of the index
+    item_id: str
+    name: str
+    detail: str  # Other searchable fields, e.g. the host and user
+
+
+class QuickLaunchIndex(QObject):
+    """Searches the connections of several tables at once for the quick launch palette.
+
+    The name and search fields of every connection are kept lowercase in a single haystack string, so that a fuzzy
+    query (its characters in order, with anything in between) is matched by one regular expression over the haystack
+    rather than a test per connection. Matches are ranked by how tightly the query matches, and by the frecency of
+    the connection. The haystack is rebuilt shortly after the connections change, so it is ready when the palette
+    opens.
+    """
+
+    def __init__(self, sources: list[tuple[str, ModelBase]]) -> None:
+        super().__init__()
+        self.sources = sources  # Label and model of each table
+        self.entries: list[QuickLaunchEntry] = []
+        self._haystack = ""
+        self._starts: list[int] = []  # Where each entry starts in the haystack
+        self._index_by_id: dict[str, int] = {}  # ID -> entry of each connection
+        self._dirty = True
+        self._rebuild_timer = QTimer(self)
+        self._rebuild_timer.setSingleShot(True)
+        self._rebuild_timer.setInterval(REBUILD_DELAY_MS)
+        self._rebuild_timer.timeout.connect(self._rebuild)
+        for _, model in sources:
+            model.rowsInserted.connect(self._invalidate)
+            model.rowsRemoved.connect(self._invalidate)
+            model.modelReset.connect(self._invalidate)
+            model.dataChanged.connect(
+                lambda top_left, bottom_right, _roles, model=model: self._on_data_changed(model, top_left, bottom_right)
+            )
+
+    def refresh(self) -> None:
+        """Make sure every connection of every table is in the index, e.g. before the palette opens."""
+        for _, model in self.sources:
+            model.fetch_all()
+        if self._dirty:
+            self._rebuild()
+
+    def search(self, query: str, usage: UsageLog, limit: int = DEFAULT_RESULT_LIMIT) -> list[QuickLaunchEntry]:
+        """Find the connections matching a fuzzy query, best first.
+
+        Args:
+            query (str): Characters that must appear in order in the name or search fields of a connection. Case and
+                spaces are ignored. If empty, the connections used most are found instead.
+            usage (UsageLog): How often and how recently each connection was launched.
+            limit (int): Most connections to return.
+        """
+        if self._dirty:
+            self._rebuild()
+        now = time.time()
+        characters = [character for character in query.lower() if not character.isspace()]
+        if not characters:
+            used = (self._index_by_id.get(item_id) for item_id in usage.most_used())
+            return [self.entries[index] for index in used if index is not None][:limit]
+
+        # Each character is followed by the shortest run up to the next one, so matching never backtracks, and the
+        # rest of the entry is consumed after the leftmost match so that there is one match per entry
+        escaped = [re.escape(character) for character in characters]
+        core = escaped[0] + "".join(f"[^{_ENTRY_SEPARATOR}{character}]*+{character}" for character in escaped[1:])
+        pattern = re.compile(f"({core})[^{_ENTRY_SEPARATOR}]*+")
+        # Only the few connections that have been launched have a frecency, so they are scored first. Every other
+        # connection scores at most MAX_MATCH_SCORE, so once `limit` of them have, the rest of the haystack can't
+        # change the result. This keeps broad queries like a single character from stepping through every entry.
+        scores: dict[int, float] = {}
+        for item_id in usage.most_used():
+            index = self._index_by_id.get(item_id)
+            if index is None:
+                continue
+            end = self._starts[index + 1] if index + 1 < len(self._starts) else len(self._haystack)
+            match = pattern.search(self._haystack, self._starts[index], end)
+            if match is not None:
+                bonus = FRECENCY_WEIGHT * math.log1p(usage.frecency(item_id, now))
+                scores[index] = self._match_score(match, index, len(characters)) + bonus
+        frecent = set(scores)
+        haystack = self._haystack
+        starts = self._starts
+        length = len(characters)
+        best_matches = 0
+        for match in pattern.finditer(haystack):
+            start, end = match.span(1)
+            index = bisect_right(starts, start) - 1
+            if index in frecent:
+                continue
+            score = length / (end - start)  # 1 if the query appears as it is
+            if start == starts[index] or haystack[start - 1] in _WORD_SEPARATORS:
+                score += WORD_START_BONUS
+                if score == MAX_MATCH_SCORE:
+                    best_matches += 1
+            scores[index] = score
+            if best_matches == limit:
+                break
+        return [self.entries[index] for index in heapq.nlargest(limit, scores, key=scores.__getitem__)]
+
+    def _match_score(self, match: re.Match[str], index: int, length: int) -> float:
+        start, end = match.span(1)
+        score = length / (end - start)
+        if start == self._starts[index] or self._haystack[start - 1] in _WORD_SEPARATORS:
+            score += WORD_START_BONUS
+        return score
+
+    def _invalidate(self) -> None:
+        self._dirty = True
+        self._rebuild_timer.start()
+
+    def _on_data_changed(self, model: ModelBase, top_left: QModelIndex, bottom_right: QModelIndex) -> None:
+        # Connection status changes don't change what is searched
+        if any(not model.columns[col].status for col in range(top_left.column(), bottom_right.column() + 1)):
+            self._invalidate()
+
+    def _rebuild(self) -> None:
+        self._rebuild_timer.stop()
+        entries: list[QuickLaunchEntry] = []
+        texts: list[str] = []
+        for source, (_, model) in enumerate(self.sources):
+            detail_fields = [field for field in model.search_fields if field not in ("name", "notes")]
+            for item in model.items:
+                detail = ", ".join(str(value) for field in detail_fields if (value := getattr(item, field)))
+                entries.append(QuickLaunchEntry(source, item.id, item.name, detail))
+                texts.append(f"{item.name}\n{detail}".lower())
+        self._starts = []
+        start = 0
+        for text in texts:
+            self._starts.append(start)
+            start += len(text) + len(_ENTRY_SEPARATOR)
+        self._haystack = _ENTRY_SEPARATOR.join(texts)
+        self.entries = entries
+        self._index_by_id = {entry.item_id: index for index, entry in enumerate(entries)}
+        self._dirty = False
@@ -0,0 +1,396 @@
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import time
+from dataclasses import dataclass
+from sys import platform
+from typing import Self
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+
+from app.config_file import DEFAULT_WRITE_DELAY_MS, ConfigFile
+from app.settings import (
+    DEFAULT_CONTROL_PERSIST,
+    DEFAULT_PREWARM_IDLE_TIMEOUT,
+    DEFAULT_PREWARM_MAX_MASTERS,
+    Settings,
+)
+from app.ssh import terminal_available
+
+SWEEP_INTERVAL_MS = 30 * 1000  # How often the control sockets are checked
+CONNECT_GRACE_PERIOD = 2 * 60.0  # Seconds a new master has to log in and create its control socket
+PREWARM_DELAY_MS = 500  # How long a row has to stay selected or hovered before its connection is pre-warmed
+PREWARM_CONNECT_TIMEOUT = 10  # Seconds a pre-warmed master waits for the server to accept the TCP connection
+FORMAT_VERSION = 1
+
+
+@dataclass(slots=True)
+class ControlMaster:
+    """A master connection that sessions to the same destination are multiplexed over."""
+
+    name: str  # File name of the control socket
+    user: str
+    host: str
+    port: int
+    opened_at: float  # Wall-clock time the master was first used
+    last_used: float  # Wall-clock time a session was last started through the master
+    running: bool = False  # Whether the control socket is accepting sessions
+    prewarmed: bool = False  # Whether the master was opened ahead of time and no session has used it yet
+
+    @property
+    def destination(self) -> str:
+        return f"{self.user}@{self.host}:{self.port}"
+
+
+@dataclass(frozen=True)
+class MultiplexOptions:
+    enabled: bool = True  # Whether sessions to the same destination share a master connection
+    control_persist: int = DEFAULT_CONTROL_PERSIST  # Seconds a master stays open after its last session ends
+    prewarm: bool = False  # Whether masters are opened ahead of time for the focused row
+    prewarm_max_masters: int = DEFAULT_PREWARM_MAX_MASTERS  # Unused pre-warmed masters that can be open at once
+    prewarm_idle_timeout: int = DEFAULT_PREWARM_IDLE_TIMEOUT  # Seconds a pre-warmed master stays open unused
+    prewarm_excluded_hosts: frozenset[str] = frozenset()  # Hosts that are never pre-warmed, e.g. busy bastions
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> Self:
+        return cls(
+            enabled=settings.ssh_multiplexing,
+            control_persist=settings.control_persist,
+            prewarm=settings.prewarm,
+            prewarm_max_masters=settings.prewarm_max_masters,
+            prewarm_idle_timeout=settings.prewarm_idle_timeout,
+            prewarm_excluded_hosts=frozenset(settings.prewarm_excluded_hosts),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PrewarmTarget:
+    """A connection to open a master for ahead of time, with the same login as the session that will use it."""
+
+    user: str
+    host: str
+    port: int
+    key: str = ""
+    jump: tuple[str, str, int] | None = None  # User, host and port of the jump host, for a proxy jump
+
+
+@dataclass
+class PrewarmStats:
+    hits: int  # Sessions that started over a pre-warmed master that was ready
+    late: int  # Sessions that started while their pre-warmed master was still logging in
+    misses: int  # Sessions that had to open a new master
+    reused: int  # Sessions that started over a master opened by an earlier session
+    wasted: int  # Pre-warmed masters that closed without being used
+    failed: int  # Pre-warmed masters that couldn't log in, e.g. because a password was needed
+    mean_login_ms: float | None  # Average time a pre-warmed master took to log in, which a hit saves
+
+
+class SshMultiplexer(QObject):
+    """Shares one authenticated SSH connection between every session to the same destination.
+
+    Sessions are started with OpenSSH's ControlMaster, ControlPath and ControlPersist options, so the first one to a
+    destination opens a master connection and later ones are multiplexed over its control socket, skipping the TCP
+    connection, key exchange and login. The jump leg of a proxy jump goes through a master to the jump host in the
+    same way. A master closes itself once it has had no sessions for `control_persist` seconds.
+
+    The masters are kept in a file next to the configuration files, so they can be listed and closed across
+    sessions. Control sockets are checked every `SWEEP_INTERVAL_MS`; masters that have closed are forgotten and
+    sockets left behind by a master that died are removed.
+
+    Connections can also be pre-warmed: when a row stays selected or hovered for `PREWARM_DELAY_MS`, a master to it is
+    opened in the background, so that a session started from the row is already logged in. Pre-warming only uses
+    keys and agents (BatchMode), never opens more than `prewarm_max_masters` unused masters at once, closes unused
+    ones after `prewarm_idle_timeout` seconds and skips the hosts in `prewarm_excluded_hosts`.
+
+    OpenSSH for Windows doesn't support multiplexing, so there the options are left out and every session connects on
+    its own.
+    """
+
+    masters_changed = Signal()
+    prewarm_excluded_hosts_changed = Signal(list)  # Sorted hosts that are never pre-warmed
+
+    def __init__(self, options: MultiplexOptions | None = None) -> None:
+        super().__init__()
+        self.options = options or MultiplexOptions()
+        self.source = ConfigFile("control_masters.json", indent=None, write_delay_ms=DEFAULT_WRITE_DELAY_MS)
+        self.control_dir = os.path.join(os.path.dirname(self.source.path), "control")
+        self._masters: dict[str, ControlMaster] = {}  # Socket file name -> master
+        self._sweep_timer = QTimer(self)
+        self._sweep_timer.setInterval(SWEEP_INTERVAL_MS)
+        self._sweep_timer.timeout.connect(self.sweep)
+        self._prewarm_target: PrewarmTarget | None = None  # Waiting for the row to stay focused
+        self._prewarm_timer = QTimer(self)
+        self._prewarm_timer.setSingleShot(True)
+        self._prewarm_timer.setInterval(PREWARM_DELAY_MS)
+        self._prewarm_timer.timeout.connect(self._start_prewarm)
+        self._prewarming: dict[str, QProcess] = {}  # Socket file name -> ssh logging in ahead of time
+        self._stats = PrewarmStats(0, 0, 0, 0, 0, 0, None)
+        self._login_ms_total = 0.0
+        self._logins = 0
+
+    @property
+    def supported(self) -> bool:
+        return platform != "win32"
+
+    @property
+    def prewarm_supported(self) -> bool:
+        """Whether masters can be opened ahead of time, which is only useful if sessions can be opened to use them."""
+        return self.supported and terminal_available()
+
+    @property
+    def active(self) -> bool:
+        """Whether sessions are started with the multiplexing options."""
+        return self.options.enabled and self.supported
+
+    def set_options(self, options: MultiplexOptions) -> None:
+        """Change the options of sessions started from now on. Masters that are open keep their options."""
+        self.options = options
+
+    def load(self) -> None:
+        data = self.source.load()
+        if data.get("version") == FORMAT_VERSION:
+            for entry in data.get("masters", []):
+                try:
+                    name, user, host, port, opened_at, last_used = entry
+                    self._masters[name] = ControlMaster(name, user, host, int(port), opened_at, last_used)
+                except (TypeError, ValueError):
+                    continue  # Skip malformed entries rather than losing the rest
+        if self.supported:
+            self.sweep()
+            self._sweep_timer.start()
+
+    def save(self) -> None:
+        masters = [
+            [master.name, master.user, master.host, master.port, round(master.opened_at), round(master.last_used)]
+            for master in self._masters.values()
+        ]
+        self.source.save({"version": FORMAT_VERSION, "masters": masters})
+
+    def masters(self) -> list[ControlMaster]:
+        """Get the masters that are open or logging in, most recently used first."""
+        return sorted(self._masters.values(), key=lambda master: master.last_used, reverse=True)
+
+    def ssh_options(self, user: str, host: str, port: int) -> str:
+        """Get the command line options that multiplex a session to a destination over its master connection.
+
+        The master is marked as used, and whether it was pre-warmed is counted in the pre-warming stats. Empty if
+        multiplexing is off.
+        """
+        if not self.active:
+            return ""
+        name = self._name(user, host, port)
+        master = self._masters.get(name)
+        running = self._is_listening(os.path.join(self.control_dir, name)) is True
+        if master is not None and master.prewarmed:
+            if running:
+                self._stats.hits += 1
+            else:
+                self._stats.late += 1
+            master.prewarmed = False
+        elif running:
+            self._stats.reused += 1
+        else:
+            self._stats.misses += 1
+        return self._options(self._use(user, host, port), self.options.control_persist)
+
+    def proxy_command(self, user: str, host: str, port: int) -> str | None:
+        """Get a ProxyCommand that reaches the target of a proxy jump through a master connection to the jump host.
+
+        None if multiplexing is off, in which case the jump host is given with -J as usual.
+        """
+        if not self.active:
+            return None
+        jump_options = self._control_options(self._use(user, host, port).name, self.options.control_persist)
+        return f"-o {shlex.quote(f'ProxyCommand={_jump_command(user, host, port, jump_options)}')}"
+
+    def prewarm(self, target: PrewarmTarget) -> None:
+        """Open a master to a connection in the background if it stays the focused one for `PREWARM_DELAY_MS`."""
+        if target == self._prewarm_target:
+            return  # E.g. the pointer moved to another cell of the same row
+        self._prewarm_target = target
+        self._prewarm_timer.start()
+
+    def set_prewarm_excluded(self, host: str, excluded: bool) -> None:
+        """Change whether connections to or through a host are pre-warmed."""
+        hosts = self.options.prewarm_excluded_hosts
+        hosts = hosts | {host} if excluded else hosts - {host}
+        self.options = dataclasses.replace(self.options, prewarm_excluded_hosts=hosts)
+        self.prewarm_excluded_hosts_changed.emit(sorted(hosts))
+
+    def prewarm_stats(self) -> PrewarmStats:
+        mean_login_ms = self._login_ms_total / self._logins if self._logins else None
+        return dataclasses.replace(self._stats, mean_login_ms=mean_login_ms)
+
+    def close(self, name: str) -> None:
+        """Close a master connection, ending every session multiplexed over it."""
+        master = self._masters.pop(name, None)
+        if master is None:
+            return
+        process = self._prewarming.pop(name, None)
+        if process is not None:
+            process.kill()
+        path = os.path.join(self.control_dir, name)
+        if os.path.exists(path):
+            logging.info("Closing the shared connection to %s", master.destination)
+            with contextlib.suppress(OSError):
+                subprocess.Popen(
+                    [
+                        "ssh",
+                        "-o",
+                        f"ControlPath={path}",
+                        "-O",
+                        "exit",
+                        "-p",
+                        str(master.port),
+                        f"{master.user}@{master.host}",
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        self.save()
+        self.masters_changed.emit()
+
+    def close_all(self) -> None:
+        for name in list(self._masters):
+            self.close(name)
+
+    def sweep(self) -> None:
+        """Check the control sockets, forgetting masters that have closed and removing stale sockets."""
+        now = time.time()
+        changed = False
+        for name, master in list(self._masters.items()):
+            running = self._is_listening(os.path.join(self.control_dir, name))
+            if running is None and not master.running and now - master.last_used < CONNECT_GRACE_PERIOD:
+                continue  # Still logging in
+            if not running:
+                del self._masters[name]
+                if master.prewarmed:
+                    self._stats.wasted += 1
+                changed = True
+            elif not master.running:
+                master.running = True
+                changed = True
+        # Sockets left behind by masters that were killed, e.g. when the computer went to sleep
+        with contextlib.suppress(OSError):
+            for name in os.listdir(self.control_dir):
+                if name not in self._masters and self._is_listening(os.path.join(self.control_dir, name)) is False:
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(self.control_dir, name))
+                        logging.info("Removed a stale SSH control socket: %s", name)
+        if changed:
+            self.save()
+            self.masters_changed.emit()
+
+    def _start_prewarm(self) -> None:
+        target = self._prewarm_target
+        self._prewarm_target = None
+        if target is None or not self.active or not self.options.prewarm or not self.prewarm_supported:
+            return
+        hosts = {target.host} if target.jump is None else {target.host, target.jump[1]}
+        if hosts & self.options.prewarm_excluded_hosts:
+            return
+        name = self._name(target.user, target.host, target.port)
+        if name in self._masters:
+            return  # Already open or logging in
+        # Make room by closing the unused pre-warmed masters that were opened first, which have no sessions to end
+        prewarmed = sorted(
+            (master for master in self._masters.values() if master.prewarmed), key=lambda master: master.opened_at
+        )
+        for master in prewarmed[: max(0, len(prewarmed) - self.options.prewarm_max_masters + 1)]:
+            self.close(master.name)
+
+        self._use(target.user, target.host, target.port).prewarmed = True
+        # Never prompt for a password, as there is no terminal to prompt in
+        options = ["BatchMode=yes", f"ConnectTimeout={PREWARM_CONNECT_TIMEOUT}"]
+        options += self._control_options(name, self.options.prewarm_idle_timeout)
+        if target.jump is not None:
+            jump_user, jump_host, jump_port = target.jump
+            jump_options = [
+                "BatchMode=yes",
+                *self._control_options(self._use(*target.jump).name, self.options.control_persist),
+            ]
+            options.append(f"ProxyCommand={_jump_command(jump_user, jump_host, jump_port, jump_options)}")
+        arguments = ["-f", "-N"]
+        for option in options:
+            arguments += ["-o", option]
+        if target.key:
+            arguments += ["-i", target.key]
+        arguments += [f"{target.user}@{target.host}", "-p", str(target.port)]
+
+        logging.info("Pre-warming the connection to %s@%s:%s", target.user, target.host, target.port)
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedChannels)
+        started_at = time.monotonic()
+        process.finished.connect(lambda exit_code, _status: self._on_prewarmed(name, exit_code, started_at))
+        self._prewarming[name] = process
+        process.start("ssh", arguments)
+
+    def _on_prewarmed(self, name: str, exit_code: int, started_at: float) -> None:
+        process = self._prewarming.pop(name, None)
+        if process is None:
+            return  # Closed while logging in
+        process.deleteLater()
+        master = self._masters.get(name)
+        if master is None:
+            return
+        if exit_code == 0:
+            # ssh -f returns once it has logged in and the master has gone into the background
+            self._login_ms_total += (time.monotonic() - started_at) * 1000
+            self._logins += 1
+            master.running = self._is_listening(os.path.join(self.control_dir, name)) is True
+        else:
+            logging.info("Could not pre-warm the connection to %s (exit code %d)", master.destination, exit_code)
+            self._stats.failed += 1
+            if master.prewarmed:
+                del self._masters[name]
+        self.save()
+        self.masters_changed.emit()
+
+    def _name(self, user: str, host: str, port: int) -> str:
+        # Sockets are named by a hash of the destination, as socket paths are limited to around 100 characters
+        return hashlib.sha1(f"{user}@{host}:{port}".encode(), usedforsecurity=False).hexdigest()[:16]
+
+    def _use(self, user: str, host: str, port: int) -> ControlMaster:
+        name = self._name(user, host, port)
+        now = time.time()
+        master = self._masters.get(name)
+        if master is None:
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            master = self._masters[name] = ControlMaster(name, user, host, port, opened_at=now, last_used=now)
+        else:
+            master.last_used = now
+        self.save()
+        self.masters_changed.emit()
+        return master
+
+    def _control_options(self, name: str, persist: int) -> list[str]:
+        return [
+            "ControlMaster=auto",
+            f"ControlPath={os.path.join(self.control_dir, name)}",
+            f"ControlPersist={persist}",
+        ]
+
+    def _options(self, master: ControlMaster, persist: int) -> str:
+        return " ".join(f"-o {shlex.quote(option)}" for option in self._control_options(master.name, persist))
+
+    def _is_listening(self, path: str) -> bool | None:
+        """Check whether a master is accepting sessions on a control socket, or None if there is no socket."""
+        if not os.path.exists(path):
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(path)
+            except OSError:
+                return False
+        return True
+
+
+def _jump_command(user: str, host: str, port: int, options: list[str]) -> str:
+    """Get the command that connects to the jump host and forwards the ProxyCommand's stdin and stdout to the target."""
+    option_arguments = " ".join(f"-o {shlex.quote(option)}" for option in options)
+    return f"ssh {option_arguments} -W %h:%p {user}@{host} -p{port}"
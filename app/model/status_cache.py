@@ -0,0 +1,64 @@
+import time
+
+from PySide6.QtCore import QObject
+
+from app.config_file import ConfigFile
+from app.connection_status import ConnectionStatus, Endpoint, ProbeResult
+from app.settings import DEFAULT_STATUS_MAX_AGE
+
+SAVE_DELAY_MS = 5000  # Quiet period after the last result before the cache is written to disk
+FORMAT_VERSION = 1
+
+
+class StatusCache(QObject):
+    """Last known connection status of every checked endpoint, kept on disk between sessions.
+
+    The status, latency and time of the latest check of each endpoint are written to a compact file next to the
+    connection files, so that the tables can show them as soon as the application starts instead of waiting for every
+    host to be checked again. Entries older than `max_age` are dropped.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_STATUS_MAX_AGE) -> None:
+        super().__init__()
+        self.max_age = max_age
+        self.source = ConfigFile("status_cache.json", indent=None, write_delay_ms=SAVE_DELAY_MS)
+        # Endpoint -> (status, latency in ms, wall-clock time of the check)
+        self._entries: dict[Endpoint, tuple[ConnectionStatus, float | None, float]] = {}
+
+    def get(self, endpoint: Endpoint) -> ProbeResult | None:
+        """Get the last known result of an endpoint, if it was checked recently enough."""
+        entry = self._entries.get(endpoint)
+        if entry is None or entry[2] < time.time() - self.max_age:
+            return None
+        status, latency_ms, checked_at = entry
+        return ProbeResult(status, latency_ms=latency_ms, checked_at=checked_at, cached=True)
+
+    def record(self, host: str, port: int, result: ProbeResult) -> None:
+        """Remember the result of a check. It is written to disk once results stop arriving for a while."""
+        if result.status == ConnectionStatus.UNKNOWN or result.checked_at is None:
+            return  # Nothing was learned about the endpoint
+        self._entries[(host, port)] = (result.status, result.latency_ms, result.checked_at)
+        self.source.save(self._data)
+
+    def load(self) -> None:
+        data = self.source.load()
+        if data.get("version") != FORMAT_VERSION:
+            return
+        cutoff = time.time() - self.max_age
+        for entry in data.get("entries", []):
+            try:
+                host, port, status, latency_ms, checked_at = entry
+                if checked_at >= cutoff:
+                    self._entries[(host, int(port))] = (ConnectionStatus(status), latency_ms, checked_at)
+            except (TypeError, ValueError):
+                continue  # Skip malformed entries rather than losing the rest of the cache
+
+    def _data(self) -> dict:
+        """Get the contents of the file, dropping entries that have expired."""
+        cutoff = time.time() - self.max_age
+        self._entries = {endpoint: entry for endpoint, entry in self._entries.items() if entry[2] >= cutoff}
+        entries = [
+            [host, port, status.value, None if latency_ms is None else round(latency_ms, 1), round(checked_at)]
+            for (host, port), (status, latency_ms, checked_at) in self._entries.items()
+        ]
+        return {"version": FORMAT_VERSION, "entries": entries}
@@ -0,0 +1,49 @@
+from PySide6.QtCore import QObject, Signal
+
+from app.thread.relay_thread import RelayThread, TrafficStats
+
+
+class TrafficMeter(QObject):
+    """Meters the traffic of port forwards by relaying their local port on a single shared relay thread.
+
+    A metered forward has its tunnel listen on a spare loopback port, and a relay listen on its local port in its place,
+    so that clients connect as before while their connections and bytes are counted. Stats are broadcast through
+    `stats_changed` while a relay is open, and once as None when it closes.
+    """
+
+    stats_changed = Signal(str, object)  # ID of the port forward, TrafficStats or None
+
+    def __init__(self, enabled: bool = False) -> None:
+        super().__init__()
+        self.enabled = enabled  # Whether tunnels started from now on are metered
+        self._open: set[str] = set()  # IDs of the port forwards with a relay
+        self._thread = RelayThread()
+        self._thread.stats_updated.connect(self._on_stats_updated)
+        self._thread.start()
+
+    def is_open(self, item_id: str) -> bool:
+        return item_id in self._open
+
+    def open(self, item_id: str, local_port: int, upstream_port: int) -> None:
+        """Relay the connections to the local port of a port forward to its tunnel, replacing any earlier relay.
+
+        Raises:
+            OSError: If the local port can't be listened on, e.g. because it is in use.
+        """
+        self.close(item_id)
+        self._thread.open(item_id, local_port, upstream_port)
+        self._open.add(item_id)
+
+    def close(self, item_id: str) -> None:
+        if item_id in self._open:
+            self._open.discard(item_id)
+            self._thread.close(item_id)
+            self.stats_changed.emit(item_id, None)
+
+    def stop(self) -> None:
+        """Stop every relay and the relay thread."""
+        self._thread.stop()
+
+    def _on_stats_updated(self, item_id: str, stats: TrafficStats) -> None:
+        if item_id in self._open:  # Not a report sent just before the relay closed
+            self.stats_changed.emit(item_id, stats)
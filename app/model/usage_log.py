@@ -0,0 +1,85 @@
+import json
+import logging
+import time
+
+from app.config_file import ConfigFile
+
+DEFAULT_HALF_LIFE = 7 * 24 * 60 * 60.0  # Seconds after which a launch counts half as much
+COMPACT_RATIO = 4  # The log is compacted once it has this many records per connection
+MIN_RECORDS_TO_COMPACT = 1000
+MIN_SCORE = 0.01  # Connections with a lower score are forgotten when the log is compacted
+
+
+class UsageLog:
+    """How often and how recently each connection has been launched, kept on disk between sessions.
+
+    Each launch appends a single record to a log file rather than rewriting it. The records of a connection add up to
+    its frecency score, where every launch starts at 1 and halves in weight every `half_life` seconds. When the log
+    has grown well beyond one record per connection, it is rewritten with the combined score of each connection.
+    """
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE) -> None:
+        self.half_life = half_life
+        self.source = ConfigFile("usage_log.jsonl")
+        self._scores: dict[str, tuple[float, float]] = {}  # ID -> (score, time the score was last updated)
+
+    def load(self) -> None:
+        records = 0
+        for line in self.source.read_lines():
+            try:
+                item_id, used_at, weight = json.loads(line)
+                self._add(item_id, float(used_at), float(weight))
+                records += 1
+            except (TypeError, ValueError):
+                continue  # Skip malformed records, e.g. one cut short by a crash
+        if records >= MIN_RECORDS_TO_COMPACT and records > COMPACT_RATIO * len(self._scores):
+            self._compact()
+
+    def record(self, item_id: str) -> None:
+        """Remember that a connection was launched just now."""
+        now = time.time()
+        self._add(item_id, now, 1.0)
+        try:
+            self.source.append_line(json.dumps([item_id, round(now, 1), 1]))
+        except OSError as error:
+            logging.warning("Could not record the use of a connection: %s", error)
+
+    def frecency(self, item_id: str, now: float | None = None) -> float:
+        """Get the score of a connection, higher the more often and recently it was launched, or 0 if it never was."""
+        entry = self._scores.get(item_id)
+        if entry is None:
+            return 0.0
+        score, updated_at = entry
+        return self._decay(score, updated_at, time.time() if now is None else now)
+
+    def most_used(self) -> list[str]:
+        """Get the IDs of every connection that has been launched, highest score first."""
+        now = time.time()
+        return sorted(self._scores, key=lambda item_id: self.frecency(item_id, now), reverse=True)
+
+    def _add(self, item_id: str, used_at: float, weight: float) -> None:
+        score, updated_at = self._scores.get(item_id, (0.0, used_at))
+        # Scores are kept as of the latest use, so that they only ever decay forwards in time
+        if used_at >= updated_at:
+            self._scores[item_id] = (self._decay(score, updated_at, used_at) + weight, used_at)
+        else:
+            self._scores[item_id] = (score + self._decay(weight, used_at, updated_at), updated_at)
+
+    def _decay(self, score: float, since: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - since) / self.half_life)
+
+    def _compact(self) -> None:
+        now = time.time()
+        self._scores = {
+            item_id: (score, updated_at)
+            for item_id, (score, updated_at) in self._scores.items()
+            if self._decay(score, updated_at, now) >= MIN_SCORE
+        }
+        lines = [
+            json.dumps([item_id, round(updated_at, 1), round(score, 4)])
+            for item_id, (score, updated_at) in self._scores.items()
+        ]
+        try:
+            self.source.write_lines(lines)
+        except OSError as error:
+            logging.warning("Could not compact the usage log: %s", error)
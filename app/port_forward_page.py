@@ -1,26 +1,42 @@
 import logging
 import os
-import subprocess
+from collections.abc import Callable
 from enum import IntEnum
 from typing import Any
 
-from PySide6.QtCore import QAbstractItemModel, QAbstractTableModel, QModelIndex, Qt
-from PySide6.QtGui import QAction, QClipboard, QColor
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, QTimer, Signal
+from PySide6.QtGui import QAction, QClipboard, QContextMenuEvent
 from PySide6.QtWidgets import (
     QApplication,
     QDialog,
     QHBoxLayout,
     QHeaderView,
+    QLineEdit,
     QMessageBox,
     QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
-from app.common import StyleSheets, ViewBase
-from app.config_file import ConfigFile
-from app.connection import DEVICE_TYPE_ICONS, DeviceType, PortForward
+from app.common import STATUS_COLUMN, Column, ConnectionFilterModel, ModelBase, StyleSheets, ViewBase, item_column
+from app.connection import PortForward
+from app.connection_status import Endpoint, make_endpoint
+from app.connection_store import open_connection_store
+from app.model.forward_supervisor import (
+    FORWARD_STATE_ICONS,
+    STOPPED_STATUS,
+    ForwardState,
+    ForwardStatus,
+    ForwardSupervisor,
+    TunnelSpec,
+)
+from app.model.probe_service import ProbeService
+from app.model.ssh_multiplexer import SshMultiplexer
+from app.model.traffic_meter import TrafficMeter
 from app.port_forward_dialog import PortForwardDialog
+from app.ssh import open_terminal
+from app.thread.probe_thread import ProbePriority
+from app.thread.relay_thread import TrafficStats, free_local_port
 from app.utility.resource_provider import get_icon
 
 
@@ -35,200 +51,193 @@ class PortForwardsHeader(IntEnum):
     REMOTE_SERVER_HOST = 5
     REMOTE_SERVER_PORT = 6
     KEY = 7
+    CONNECTION_STATUS = 8
+    TUNNEL = 9
+    UPTIME = 10
+    CONNECTIONS = 11
+    TRAFFIC = 12
+    THROUGHPUT = 13
+    CONNECT_LATENCY = 14
 
 
-class PortForwardsModel(QAbstractTableModel):
-    """Model for the direct connections table."""
-
-    def __init__(self):
-        self.port_forwards: list[PortForward] = []
-        super().__init__()
-
-        self.headers = {
-            PortForwardsHeader.NAME: "Name",
-            PortForwardsHeader.LOCAL_PORT: "Local Port",
-            PortForwardsHeader.TARGET_HOST: "Target Host",
-            PortForwardsHeader.TARGET_PORT: "Target Port",
-            PortForwardsHeader.REMOTE_SERVER_USER: "Server User",
-            PortForwardsHeader.REMOTE_SERVER_HOST: "Server Host",
-            PortForwardsHeader.REMOTE_SERVER_PORT: "Server Port",
-            PortForwardsHeader.KEY: "Key",
-        }
-        assert len(self.headers) == len(PortForwardsHeader)
+UPTIME_REFRESH_MS = 1000  # How often the uptime of the tunnels that are up is shown again
 
-        self.source = ConfigFile("port_forwards.json")
-        self._load()
 
-    def add_port_forward(self, port_forward: PortForward) -> None:
-        """Add a port forward to the model.
+class PortForwardsModel(ModelBase[PortForward]):
+    """Model for the port forwards table.
 
-        Args:
-            port_forward (PortForward): The port forward to add.
-        """
-        row = len(self.port_forwards)
-        self.beginInsertRows(QModelIndex(), row, row)
-        self.port_forwards.append(port_forward)
-        self.endInsertRows()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-        self._save()
-
-    def delete_port_forward(self, row: int) -> None:
-        """Delete a port forward from the model.
-
-        Args:
-            row (int): The row of the port forward to delete.
-        """
-        self.beginRemoveRows(QModelIndex(), row, row)
-        self.port_forwards.pop(row)
-        self.endRemoveRows()
-        self._save()
-
-    def move_up(self, row: int) -> None:
-        """Move a port forward up in the model.
-
-        Args:
-            row (int): The row of the port forward to move up.
-        """
-        if row > 0:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row - 1)
-            self.port_forwards.insert(row - 1, self.port_forwards.pop(row))
-            self.endMoveRows()
-            self._save()
+    Besides the connection status of the server, each row shows the state and uptime of the tunnel of the port
+    forward, as reported by a `ForwardSupervisor`, and the traffic through it while it is metered by a `TrafficMeter`.
+    """
 
-    def move_down(self, row: int) -> None:
-        """Move a port forward down in the model.
-
-        Args:
-            row (int): The row of the port forward to move down.
-        """
-        if row < len(self.port_forwards) - 1:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row + 2)
-            self.port_forwards.insert(row + 1, self.port_forwards.pop(row))
-            self.endMoveRows()
-
-    def get_port_forward(self, row: int) -> PortForward:
-        """Get a port forward from the model."""
-        return self.port_forwards[row]
-
-    def update_port_forward(self, row: int, port_forward: PortForward) -> None:
-        """Update a port forward in the model."""
-        self.port_forwards[row] = port_forward
-        self._save()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-
-    def rowCount(self, parent: QModelIndex) -> int:
-        return len(self.port_forwards)
-
-    def columnCount(self, parent: QModelIndex) -> int:
-        return len(PortForwardsHeader)
-
-    def data(self, index: QModelIndex, role: int) -> Any:
-        if not index.isValid():
-            return
-
-        col = index.column()
-        row = index.row()
-
-        if role == Qt.ItemDataRole.DecorationRole:
-            if col == PortForwardsHeader.NAME:
-                return get_icon(DEVICE_TYPE_ICONS[DeviceType(self.port_forwards[row].device_type)])
-
-        if role == Qt.ItemDataRole.DisplayRole:  # What's displayed to the user
-            if col == PortForwardsHeader.NAME:
-                return self.port_forwards[row].name
-            if col == PortForwardsHeader.LOCAL_PORT:
-                return self.port_forwards[row].local_port
-            if col == PortForwardsHeader.TARGET_HOST:
-                return self.port_forwards[row].target_host
-            if col == PortForwardsHeader.TARGET_PORT:
-                return self.port_forwards[row].target_port
-            if col == PortForwardsHeader.REMOTE_SERVER_USER:
-                return self.port_forwards[row].remote_server_user
-            if col == PortForwardsHeader.REMOTE_SERVER_HOST:
-                return self.port_forwards[row].remote_server_host
-            if col == PortForwardsHeader.REMOTE_SERVER_PORT:
-                return self.port_forwards[row].remote_server_port
-            if col == PortForwardsHeader.KEY:
-                # Display the key file name only
-                return os.path.basename(self.port_forwards[row].key)
-
-        if role == Qt.ItemDataRole.UserRole:  # Application-specific purposes
-            if col == PortForwardsHeader.NAME:
-                return self.port_forwards[row].name
-            if col == PortForwardsHeader.LOCAL_PORT:
-                return self.port_forwards[row].local_port
-            if col == PortForwardsHeader.TARGET_HOST:
-                return self.port_forwards[row].target_host
-            if col == PortForwardsHeader.TARGET_PORT:
-                return self.port_forwards[row].target_port
-            if col == PortForwardsHeader.REMOTE_SERVER_USER:
-                return self.port_forwards[row].remote_server_user
-            if col == PortForwardsHeader.REMOTE_SERVER_HOST:
-                return self.port_forwards[row].remote_server_host
-            if col == PortForwardsHeader.REMOTE_SERVER_PORT:
-                return self.port_forwards[row].remote_server_port
-            if col == PortForwardsHeader.KEY:
-                return self.port_forwards[row].key
-
-    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
-        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
-
-    def headerData(self, section: int, orientation: Qt.Orientation, role: int) -> Any:
-        if orientation == Qt.Orientation.Horizontal:
-            if role == Qt.ItemDataRole.DisplayRole:
-                return self.headers[PortForwardsHeader(section)]
-            if role == Qt.ItemDataRole.TextAlignmentRole:
-                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-            if role == Qt.ItemDataRole.ForegroundRole:
-                return QColor(Qt.GlobalColor.gray)
-
-    def _load(self):
-        loaded_port_forwards = self.source.load()
-        if "port_forwards" in loaded_port_forwards:
-            for port_forward in loaded_port_forwards["port_forwards"]:
-                self.port_forwards.append(PortForward.from_dict(port_forward))
-
-    def _save(self):
-        self.source.save({"port_forwards": [pf.to_dict() for pf in self.port_forwards]})
+    def __init__(self):
+        columns = {
+            PortForwardsHeader.NAME: item_column("Name", "name", device_icon=True),
+            PortForwardsHeader.LOCAL_PORT: item_column("Local Port", "local_port"),
+            PortForwardsHeader.TARGET_HOST: item_column("Target Host", "target_host"),
+            PortForwardsHeader.TARGET_PORT: item_column("Target Port", "target_port"),
+            PortForwardsHeader.REMOTE_SERVER_USER: item_column("Server User", "remote_server_user"),
+            PortForwardsHeader.REMOTE_SERVER_HOST: item_column("Server Host", "remote_server_host"),
+            PortForwardsHeader.REMOTE_SERVER_PORT: item_column("Server Port", "remote_server_port"),
+            PortForwardsHeader.KEY: item_column("Key", "key", display=os.path.basename),
+            PortForwardsHeader.CONNECTION_STATUS: STATUS_COLUMN,
+            PortForwardsHeader.TUNNEL: Column(
+                "Tunnel",
+                value=lambda item, _result: self.forward_status(item.id),
+                display=ForwardStatus.state_text,
+                user=lambda item, _result: self.forward_status(item.id).state.value,
+                decoration=lambda item, _result: get_icon(FORWARD_STATE_ICONS[self.forward_status(item.id).state]),
+                status=True,
+            ),
+            PortForwardsHeader.UPTIME: Column(
+                "Uptime",
+                value=lambda item, _result: self.forward_status(item.id),
+                display=ForwardStatus.uptime_text,
+                user=lambda item, _result: self.forward_status(item.id).up_since,
+                status=True,
+            ),
+            PortForwardsHeader.CONNECTIONS: self._traffic_column(
+                "Connections", TrafficStats.connections_text, lambda stats: stats.active_connections
+            ),
+            PortForwardsHeader.TRAFFIC: self._traffic_column(
+                "Traffic", TrafficStats.traffic_text, lambda stats: stats.bytes_sent + stats.bytes_received
+            ),
+            PortForwardsHeader.THROUGHPUT: self._traffic_column(
+                "Throughput", TrafficStats.throughput_text, lambda stats: stats.send_rate + stats.receive_rate
+            ),
+            PortForwardsHeader.CONNECT_LATENCY: self._traffic_column(
+                "Connect Latency", TrafficStats.latency_text, lambda stats: stats.connect_latency_ms
+            ),
+        }
+        assert len(columns) == len(PortForwardsHeader)
+        store = open_connection_store(
+            "port_forwards", {"name": "name", "host": "remote_server_host", "user": "remote_server_user"}
+        )
+        super().__init__(
+            [columns[header] for header in PortForwardsHeader],
+            store,
+            PortForward.from_dict,
+            lambda item: make_endpoint(item.remote_server_host, item.remote_server_port),
+            ["name", "target_host", "remote_server_host", "remote_server_user", "notes"],
+        )
+        self._forward_statuses: dict[str, ForwardStatus] = {}  # ID -> status of each tunnel that isn't stopped
+        self._traffic_stats: dict[str, TrafficStats] = {}  # ID -> latest traffic of each metered tunnel
+        # Uptimes and restart countdowns are shown ticking while any tunnel is running
+        self._uptime_timer = QTimer(self)
+        self._uptime_timer.setInterval(UPTIME_REFRESH_MS)
+        self._uptime_timer.timeout.connect(lambda: self._queue_status_changed(self._forward_statuses))
+
+    def forward_status(self, item_id: str) -> ForwardStatus:
+        """Get the state of the tunnel of a port forward."""
+        return self._forward_statuses.get(item_id, STOPPED_STATUS)
+
+    def new_forward_status(self, item_id: str, status: ForwardStatus) -> None:
+        """Show the new state of the tunnel of a port forward."""
+        if status.state == ForwardState.STOPPED:
+            self._forward_statuses.pop(item_id, None)
+        else:
+            self._forward_statuses[item_id] = status
+        self._queue_status_changed([item_id])
+        if self._forward_statuses and not self._uptime_timer.isActive():
+            self._uptime_timer.start()
+        elif not self._forward_statuses:
+            self._uptime_timer.stop()
+
+    def traffic_stats(self, item_id: str) -> TrafficStats | None:
+        """Get the traffic through the tunnel of a port forward, or None if it isn't metered."""
+        return self._traffic_stats.get(item_id)
+
+    def new_traffic_stats(self, item_id: str, stats: TrafficStats | None) -> None:
+        """Show the new traffic through the tunnel of a port forward, or stop showing it if None."""
+        if stats is None:
+            self._traffic_stats.pop(item_id, None)
+        else:
+            self._traffic_stats[item_id] = stats
+        self._queue_status_changed([item_id])
+
+    def _traffic_column(
+        self, header: str, display: Callable[[TrafficStats], str], user: Callable[[TrafficStats], Any]
+    ) -> Column:
+        def value(item: PortForward, _result: object) -> TrafficStats | None:
+            return self.traffic_stats(item.id)
+
+        return Column(
+            header,
+            value=value,
+            display=lambda stats: "" if stats is None else display(stats),
+            user=lambda item, result: None if (stats := value(item, result)) is None else user(stats),
+            status=True,
+        )
 
 
 class PortForwardsView(ViewBase):
+    start_forward = Signal(int)
+    stop_forward = Signal(int)
+    open_terminal = Signal(int)
+
     def __init__(self):
         super().__init__()
+        self.start_action = QAction("Start Tunnel")
+        self.stop_action = QAction("Stop Tunnel")
+        self.open_terminal_action = QAction("Open in Terminal")
+        self.menu.insertActions(self.edit_action, [self.start_action, self.stop_action, self.open_terminal_action])
+        self.menu.insertSeparator(self.edit_action)
+        self.start_action.triggered.connect(lambda: self.start_forward.emit(self._source_row(self.currentIndex())))
+        self.stop_action.triggered.connect(lambda: self.stop_forward.emit(self._source_row(self.currentIndex())))
+        self.open_terminal_action.triggered.connect(
+            lambda: self.open_terminal.emit(self._source_row(self.currentIndex()))
+        )
+
+    def contextMenuEvent(self, event: QContextMenuEvent | None) -> None:
+        assert event is not None
+        is_valid = self.indexAt(event.pos()).isValid()
+        self.start_action.setEnabled(is_valid)
+        self.stop_action.setEnabled(is_valid)
+        self.open_terminal_action.setEnabled(is_valid)
+        super().contextMenuEvent(event)
 
     def attach_model(self, model: QAbstractItemModel) -> None:
         self.setModel(model)
         header = self.horizontalHeader()
         assert isinstance(header, QHeaderView)
         header.setSectionResizeMode(PortForwardsHeader.NAME.value, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(PortForwardsHeader.LOCAL_PORT.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(PortForwardsHeader.TARGET_HOST.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(PortForwardsHeader.TARGET_PORT.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(
-            PortForwardsHeader.REMOTE_SERVER_USER.value, QHeaderView.ResizeMode.ResizeToContents
-        )
-        header.setSectionResizeMode(
-            PortForwardsHeader.REMOTE_SERVER_HOST.value, QHeaderView.ResizeMode.ResizeToContents
+        self.fit_columns_to_contents(
+            [
+                PortForwardsHeader.LOCAL_PORT,
+                PortForwardsHeader.TARGET_HOST,
+                PortForwardsHeader.TARGET_PORT,
+                PortForwardsHeader.REMOTE_SERVER_USER,
+                PortForwardsHeader.REMOTE_SERVER_HOST,
+                PortForwardsHeader.REMOTE_SERVER_PORT,
+                PortForwardsHeader.KEY,
+                PortForwardsHeader.TUNNEL,
+                PortForwardsHeader.UPTIME,
+                PortForwardsHeader.CONNECTIONS,
+                PortForwardsHeader.TRAFFIC,
+                PortForwardsHeader.THROUGHPUT,
+                PortForwardsHeader.CONNECT_LATENCY,
+            ]
         )
-        header.setSectionResizeMode(
-            PortForwardsHeader.REMOTE_SERVER_PORT.value, QHeaderView.ResizeMode.ResizeToContents
-        )
-        header.setSectionResizeMode(PortForwardsHeader.KEY.value, QHeaderView.ResizeMode.ResizeToContents)
 
 
 class PortForwardsWidget(QWidget):
-    def __init__(self):
+    def __init__(self):  # noqa: PLR0915
         super().__init__()
 
         self.view = PortForwardsView()
         self.model = PortForwardsModel()
-        self.view.attach_model(self.model)
+        self.filter_model = ConnectionFilterModel(self.model)
+        self.view.attach_model(self.filter_model)
         self.view.item_activated.connect(self._on_port_forward_activated)
         self.view.new_item.connect(self._on_new_port_forward)
         self.view.edit_item.connect(self._on_edit_port_forward)
         self.view.duplicate_item.connect(self._on_duplicate_port_forward)
         self.view.delete_item.connect(self._on_delete_port_forward)
         self.view.copy_command.connect(self._on_copy_command)
+        self.view.open_terminal.connect(self._on_open_in_terminal)
+        self.view.visible_rows_changed.connect(self._on_visible_rows_changed)
+        self.view.focused_row_changed.connect(self._on_focused_row_changed)
+        self.model.rowsInserted.connect(self._on_rows_inserted)
 
         new_button = QToolButton()
         new_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
@@ -245,8 +254,21 @@ class PortForwardsWidget(QWidget):
         move_up_action.triggered.connect(self._move_selected_row_up)
         move_down_action.triggered.connect(self._move_selected_row_down)
 
+        refresh_connection_status_action = QAction(get_icon("reload.png"), "Refresh Connection Status")
+        refresh_connection_status_action.triggered.connect(self._on_refresh_status)
+        refresh_connection_status_button = QToolButton()
+        refresh_connection_status_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
+        refresh_connection_status_button.setDefaultAction(refresh_connection_status_action)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.filter_model.set_query)
+
         buttons_layout = QHBoxLayout()
         buttons_layout.addWidget(new_button)
+        buttons_layout.addWidget(refresh_connection_status_button)
+        buttons_layout.addWidget(self.filter_input)
         buttons_layout.addStretch()
         buttons_layout.addWidget(move_up_button)
         buttons_layout.addWidget(move_down_button)
@@ -256,42 +278,181 @@ class PortForwardsWidget(QWidget):
         layout.addWidget(self.view)
         self.setLayout(layout)
 
+        self.probe_service: ProbeService | None = None
+        self.multiplexer: SshMultiplexer | None = None
+        self.forward_supervisor: ForwardSupervisor | None = None
+        self.traffic_meter: TrafficMeter | None = None
+        self._metering_later: set[str] = set()  # IDs of the port forwards to start once their local port is freed
+
+    def attach_probe_service(self, probe_service: ProbeService):
+        """Use a probe service to check the connection status of the port forwards."""
+        self.probe_service = probe_service
+        self.probe_service.status_updated.connect(self.model.new_connection_status)
+        self._check_connection_statuses(self.model.endpoints())
+
+    def attach_multiplexer(self, multiplexer: SshMultiplexer):
+        """Share SSH connections between the sessions of the port forwards."""
+        self.multiplexer = multiplexer
+
+    def attach_forward_supervisor(self, forward_supervisor: ForwardSupervisor):
+        """Use a forward supervisor to run the tunnels of the port forwards."""
+        self.forward_supervisor = forward_supervisor
+        self.forward_supervisor.status_changed.connect(self.model.new_forward_status)
+        self.forward_supervisor.ports_released.connect(self._on_ports_released)
+        self.view.start_forward.connect(self._on_start_forward)
+        self.view.stop_forward.connect(self._on_stop_forward)
+
+    def attach_traffic_meter(self, traffic_meter: TrafficMeter):
+        """Use a traffic meter to count the connections through the tunnels of the port forwards."""
+        self.traffic_meter = traffic_meter
+        self.traffic_meter.stats_changed.connect(self.model.new_traffic_stats)
+
+    def set_traffic_metering(self, enabled: bool):
+        """Change whether tunnels are metered, restarting the running ones so that the change applies to them."""
+        if self.traffic_meter is None or self.forward_supervisor is None:
+            return
+        self.traffic_meter.enabled = enabled
+        running = [item.id for item in self.model.items if self.forward_supervisor.is_running(item.id)]
+        for item_id in running:
+            row = self.model.row(item_id)
+            if row is not None:
+                self._on_start_forward(row)
+
+    def _on_refresh_status(self):
+        """Refresh all connection statuses."""
+        self.model.reset_connection_statuses()
+        self._check_connection_statuses(self.model.endpoints())
+
+    def _check_connection_statuses(self, endpoints: list[Endpoint]):
+        """Queue a network check of each endpoint on the probe service."""
+        if self.probe_service is not None and endpoints:
+            self.probe_service.probe(endpoints)
+            self._on_visible_rows_changed(self.view.visible_rows())
+
+    def _on_rows_inserted(self, _parent: QModelIndex, first: int, last: int):
+        """Check the endpoints of rows that were added or fetched from the store."""
+        self._check_connection_statuses(self.model.endpoints(first, last))
+
+    def _on_visible_rows_changed(self, rows: list[int]):
+        """Check the endpoints of the rows on screen before the rest."""
+        if self.probe_service is not None and rows:
+            endpoints = [self.model.endpoint(self.model.get(row)) for row in rows]
+            self.probe_service.prioritize(endpoints, ProbePriority.VISIBLE)
+
+    def _on_focused_row_changed(self, row: int):
+        """Check the endpoint of the selected or hovered row next."""
+        if self.probe_service is not None and 0 <= row < len(self.model.items):
+            self.probe_service.prioritize([self.model.endpoint(self.model.get(row))], ProbePriority.FOCUSED)
+
+    def activate(self, item_id: str):
+        """Launch a connection by ID, as if its row had been activated in the table."""
+        row = self.model.row(item_id)
+        if row is not None:
+            self.view.item_activated.emit(row)
+
     def _on_port_forward_activated(self, row: int):
-        """Open a new terminal window and connect to the host."""
+        """Start the tunnel of the port forward, unless it is already running."""
+        if self.forward_supervisor is not None and not self.forward_supervisor.is_running(self.model.get(row).id):
+            self._on_start_forward(row)
+
+    def _on_open_in_terminal(self, row: int):
+        """Open a new terminal window running the port forward, which isn't supervised."""
         source_index = self.model.index(row, 0)
-        pf = self.model.get_port_forward(source_index.row())
-        command = pf.command()
+        pf = self.model.get(source_index.row())
+        if self.multiplexer is not None:
+            command = pf.command(
+                self.multiplexer.ssh_options(pf.remote_server_user, pf.remote_server_host, pf.remote_server_port)
+            )
+        else:
+            command = pf.command()
         logging.info(f"Running: {command}")
-        subprocess.Popen(["start", "cmd", "/k", command], shell=True)
+        open_terminal(command)
+
+    def _on_start_forward(self, row: int):
+        """Start the tunnel of a port forward in the background, restarting it if it is running.
+
+        When metering, the tunnel listens on a spare loopback port behind a relay on the local port.
+        """
+        pf = self.model.get(row)
+        if self.forward_supervisor is None:
+            return
+        metered = self.traffic_meter is not None and self.traffic_meter.enabled
+        relayed = self.traffic_meter is not None and self.traffic_meter.is_open(pf.id)
+        if relayed or (metered and self.forward_supervisor.is_running(pf.id)):
+            self._stop_forward(pf.id)  # The relay and the tunnel change ports, so the old ones are freed first
+        else:
+            # Restarted by the supervisor, in its group if it has one, leaving the other tunnels running
+            self._metering_later.discard(pf.id)
+        spec = TunnelSpec(tuple(pf.server_arguments()), pf.forward_argument(), pf.local_port)
+        if metered:
+            if self.forward_supervisor.releasing(pf.local_port):
+                # The relay can't listen on the port until the stopped tunnel's process has let go of it
+                self._metering_later.add(pf.id)
+                return
+            upstream_port = free_local_port()
+            try:
+                self.traffic_meter.open(pf.id, pf.local_port, upstream_port)
+                spec = TunnelSpec(spec.server, pf.forward_argument(upstream_port), upstream_port)
+            except OSError as error:
+                logging.warning(f"Could not meter the traffic of port forward '{pf.name}': {error}")
+        self.forward_supervisor.start(pf.id, spec)
+
+    def _on_stop_forward(self, row: int):
+        """Stop the tunnel of a port forward."""
+        self._stop_forward(self.model.get(row).id)
+
+    def _on_ports_released(self, ports: list[int]):
+        """Start the metered tunnels that were waiting for their local port to be freed."""
+        for item_id in list(self._metering_later):
+            row = self.model.row(item_id)
+            if row is None:
+                self._metering_later.discard(item_id)
+            elif self.model.get(row).local_port in ports:
+                self._metering_later.discard(item_id)
+                self._on_start_forward(row)
+
+    def _stop_forward(self, item_id: str):
+        """Stop the tunnel of a port forward and its traffic meter."""
+        self._metering_later.discard(item_id)
+        if self.forward_supervisor is not None:
+            self.forward_supervisor.stop(item_id)
+        if self.traffic_meter is not None:
+            self.traffic_meter.close(item_id)
 
     def _on_new_port_forward(self):
         """Open a new port forward dialog."""
         dialog = PortForwardDialog("New Port Forward")
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.add_port_forward(dialog.to_port_forward())
+            new_port_forward = dialog.to_port_forward()
+            self.model.add(new_port_forward)
 
     def _on_edit_port_forward(self, row: int):
         """Open an edit port forward dialog."""
         source_index = self.model.index(row, 0)
-        port_forward = self.model.get_port_forward(source_index.row())
+        port_forward = self.model.get(source_index.row())
 
         dialog = PortForwardDialog("Edit Port Forward")
         dialog.populate_fields(port_forward)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.update_port_forward(source_index.row(), dialog.to_port_forward())
+            edited_port_forward = dialog.to_port_forward()
+            self.model.update(source_index.row(), edited_port_forward)
+            if self.forward_supervisor is not None and self.forward_supervisor.is_running(port_forward.id):
+                self._on_start_forward(source_index.row())  # Restart the tunnel with the new settings
+            self._check_connection_statuses([self.model.endpoint(edited_port_forward)])
 
     def _on_duplicate_port_forward(self, row: int):
         """Duplicate a port forward into a new port forward dialog."""
         source_index = self.model.index(row, 0)
-        port_forward = self.model.get_port_forward(source_index.row()).copy()
+        port_forward = self.model.get(source_index.row()).copy()
         port_forward.name += " (Copy)"
         dialog = PortForwardDialog("New Port Forward")
         dialog.populate_fields(port_forward)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.add_port_forward(dialog.to_port_forward())
+            new_port_forward = dialog.to_port_forward()
+            self.model.add(new_port_forward)
 
     def _on_delete_port_forward(self, row: int):
         """Delete a port forward."""
@@ -304,11 +465,12 @@ class PortForwardsWidget(QWidget):
         )
         if confirmed == QMessageBox.StandardButton.Yes:
             source_index = self.model.index(row, 0)
-            self.model.delete_port_forward(source_index.row())
+            self._stop_forward(self.model.get(source_index.row()).id)
+            self.model.delete(source_index.row())
 
     def _on_copy_command(self, row: int):
         """Copy the SSH command to the clipboard."""
-        pf = self.model.get_port_forward(row)
+        pf = self.model.get(row)
         command = pf.command()
         clipboard = QApplication.clipboard()
         assert isinstance(clipboard, QClipboard)
@@ -317,12 +479,12 @@ class PortForwardsWidget(QWidget):
 
     def _move_selected_row_up(self):
         """Move the selected row up."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_up(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_up(selected_row)
 
     def _move_selected_row_down(self):
         """Move the selected row down."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_down(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_down(selected_row)
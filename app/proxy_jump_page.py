@@ -1,26 +1,30 @@
 import logging
 import os
-import subprocess
 from enum import IntEnum
-from typing import Any
 
-from PySide6.QtCore import QAbstractItemModel, QAbstractTableModel, QModelIndex, Qt
-from PySide6.QtGui import QAction, QClipboard, QColor
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Signal
+from PySide6.QtGui import QAction, QClipboard, QContextMenuEvent
 from PySide6.QtWidgets import (
     QApplication,
     QDialog,
     QHBoxLayout,
     QHeaderView,
+    QLineEdit,
     QMessageBox,
     QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
-from app.common import StyleSheets, ViewBase
-from app.config_file import ConfigFile
-from app.connection import DEVICE_TYPE_ICONS, DeviceType, ProxyJump
+from app.common import STATUS_COLUMN, ConnectionFilterModel, ModelBase, StyleSheets, ViewBase, item_column
+from app.connection import ProxyJump
+from app.connection_status import Endpoint, make_endpoint
+from app.connection_store import open_connection_store
+from app.model.probe_service import ProbeService
+from app.model.ssh_multiplexer import PrewarmTarget, SshMultiplexer
 from app.proxy_jump_dialog import ProxyJumpDialog
+from app.ssh import open_terminal
+from app.thread.probe_thread import ProbePriority
 from app.utility.resource_provider import get_icon
 
 
@@ -35,179 +39,69 @@ class ProxyJumpsHeader(IntEnum):
     JUMP_HOST = 5
     JUMP_PORT = 6
     KEY = 7
+    CONNECTION_STATUS = 8
 
 
-class ProxyJumpsModel(QAbstractTableModel):
+class ProxyJumpsModel(ModelBase[ProxyJump]):
     """Model for the proxy jumps table."""
 
     def __init__(self):
-        self.proxy_jumps: list[ProxyJump] = []
-        super().__init__()
-
-        self.headers = {
-            ProxyJumpsHeader.NAME: "Name",
-            ProxyJumpsHeader.TARGET_USER: "Target User",
-            ProxyJumpsHeader.TARGET_HOST: "Target Host",
-            ProxyJumpsHeader.TARGET_PORT: "Target Port",
-            ProxyJumpsHeader.JUMP_USER: "Jump User",
-            ProxyJumpsHeader.JUMP_HOST: "Jump Host",
-            ProxyJumpsHeader.JUMP_PORT: "Jump Port",
-            ProxyJumpsHeader.KEY: "Key",
+        columns = {
+            ProxyJumpsHeader.NAME: item_column("Name", "name", device_icon=True),
+            ProxyJumpsHeader.TARGET_USER: item_column("Target User", "target_user"),
+            ProxyJumpsHeader.TARGET_HOST: item_column("Target Host", "target_host"),
+            ProxyJumpsHeader.TARGET_PORT: item_column("Target Port", "target_port"),
+            ProxyJumpsHeader.JUMP_USER: item_column("Jump User", "jump_user"),
+            ProxyJumpsHeader.JUMP_HOST: item_column("Jump Host", "jump_host"),
+            ProxyJumpsHeader.JUMP_PORT: item_column("Jump Port", "jump_port"),
+            ProxyJumpsHeader.KEY: item_column("Key", "key", display=os.path.basename),
+            ProxyJumpsHeader.CONNECTION_STATUS: STATUS_COLUMN,
         }
-        assert len(self.headers) == len(ProxyJumpsHeader)
-
-        self.source = ConfigFile("proxy_jumps.json")
-        self._load()
-
-    def add_proxy_jump(self, proxy_jump: ProxyJump) -> None:
-        """Add a proxy jump to the model.
-
-        Args:
-            proxy_jump (ProxyJump): The proxy jump to add.
-        """
-        row = len(self.proxy_jumps)
-        self.beginInsertRows(QModelIndex(), row, row)
-        self.proxy_jumps.append(proxy_jump)
-        self.endInsertRows()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-        self._save()
-
-    def delete_proxy_jump(self, row: int) -> None:
-        """Delete a proxy jump from the model.
-
-        Args:
-            row (int): The row of the proxy jump to delete.
-        """
-        self.beginRemoveRows(QModelIndex(), row, row)
-        self.proxy_jumps.pop(row)
-        self.endRemoveRows()
-        self._save()
-
-    def move_up(self, row: int) -> None:
-        """Move a proxy jump up in the model.
-
-        Args:
-            row (int): The row of the proxy jump to move up.
-        """
-        if row > 0:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row - 1)
-            self.proxy_jumps.insert(row - 1, self.proxy_jumps.pop(row))
-            self.endMoveRows()
-            self._save()
-
-    def move_down(self, row: int) -> None:
-        """Move a proxy jump down in the model.
-
-        Args:
-            row (int): The row of the proxy jump to move down.
-        """
-        if row < len(self.proxy_jumps) - 1:
-            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), row + 2)
-            self.proxy_jumps.insert(row + 1, self.proxy_jumps.pop(row))
-            self.endMoveRows()
-
-    def get_proxy_jump(self, row: int) -> ProxyJump:
-        """Get a proxy jump from the model by row."""
-        return self.proxy_jumps[row]
-
-    def update_proxy_jump(self, row: int, proxy_jump: ProxyJump) -> None:
-        """Update a proxy jump in the model."""
-        self.proxy_jumps[row] = proxy_jump
-        self._save()
-        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
-
-    def rowCount(self, parent: QModelIndex) -> int:
-        return len(self.proxy_jumps)
-
-    def columnCount(self, parent: QModelIndex) -> int:
-        return len(ProxyJumpsHeader)
-
-    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
-        if not index.isValid():
-            return
-
-        col = index.column()
-        row = index.row()
-
-        if role == Qt.ItemDataRole.DecorationRole:
-            if col == ProxyJumpsHeader.NAME:
-                return get_icon(DEVICE_TYPE_ICONS[DeviceType(self.proxy_jumps[row].device_type)])
-
-        if role == Qt.ItemDataRole.DisplayRole:  # What's displayed to the user
-            if col == ProxyJumpsHeader.NAME:
-                return self.proxy_jumps[row].name
-            if col == ProxyJumpsHeader.TARGET_USER:
-                return self.proxy_jumps[row].target_user
-            if col == ProxyJumpsHeader.TARGET_HOST:
-                return self.proxy_jumps[row].target_host
-            if col == ProxyJumpsHeader.TARGET_PORT:
-                return self.proxy_jumps[row].target_port
-            if col == ProxyJumpsHeader.JUMP_USER:
-                return self.proxy_jumps[row].jump_user
-            if col == ProxyJumpsHeader.JUMP_HOST:
-                return self.proxy_jumps[row].jump_host
-            if col == ProxyJumpsHeader.JUMP_PORT:
-                return self.proxy_jumps[row].jump_port
-            if col == ProxyJumpsHeader.KEY:
-                # Display the key file name only
-                return os.path.basename(self.proxy_jumps[row].key)
-
-        if role == Qt.ItemDataRole.UserRole:  # Application-specific purposes
-            if col == ProxyJumpsHeader.NAME:
-                return self.proxy_jumps[row].name
-            if col == ProxyJumpsHeader.TARGET_USER:
-                return self.proxy_jumps[row].target_user
-            if col == ProxyJumpsHeader.TARGET_HOST:
-                return self.proxy_jumps[row].target_host
-            if col == ProxyJumpsHeader.TARGET_PORT:
-                return self.proxy_jumps[row].target_port
-            if col == ProxyJumpsHeader.JUMP_USER:
-                return self.proxy_jumps[row].jump_user
-            if col == ProxyJumpsHeader.JUMP_HOST:
-                return self.proxy_jumps[row].jump_host
-            if col == ProxyJumpsHeader.JUMP_PORT:
-                return self.proxy_jumps[row].jump_port
-            if col == ProxyJumpsHeader.KEY:
-                return self.proxy_jumps[row].key
-
-    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
-        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
-
-    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
-        if orientation == Qt.Orientation.Horizontal:
-            if role == Qt.ItemDataRole.DisplayRole:
-                return self.headers[ProxyJumpsHeader(section)]
-            if role == Qt.ItemDataRole.TextAlignmentRole:
-                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-            if role == Qt.ItemDataRole.ForegroundRole:
-                return QColor(Qt.GlobalColor.gray)
-
-    def _load(self):
-        loaded_proxy_jumps = self.source.load()
-        if "proxy_jumps" in loaded_proxy_jumps:
-            for proxy_jump in loaded_proxy_jumps["proxy_jumps"]:
-                self.proxy_jumps.append(ProxyJump.from_dict(proxy_jump))
-
-    def _save(self):
-        self.source.save({"proxy_jumps": [pj.to_dict() for pj in self.proxy_jumps]})
+        assert len(columns) == len(ProxyJumpsHeader)
+        store = open_connection_store("proxy_jumps", {"name": "name", "host": "target_host", "user": "target_user"})
+        super().__init__(
+            [columns[header] for header in ProxyJumpsHeader],
+            store,
+            ProxyJump.from_dict,
+            lambda item: make_endpoint(item.jump_host, item.jump_port),
+            ["name", "target_host", "target_user", "jump_host", "jump_user", "notes"],
+        )
 
 
 class ProxyJumpsView(ViewBase):
+    prewarm_changed = Signal(int, bool)  # Row and whether its host is pre-warmed
+
     def __init__(self):
         super().__init__()
+        self.prewarm_action = QAction("Pre-warm Jump Host")
+        self.prewarm_action.setCheckable(True)
+        self.prewarm_action.setVisible(False)  # Until SSH connections are shared
+        self.menu.addAction(self.prewarm_action)
+        self.prewarm_action.triggered.connect(
+            lambda checked: self.prewarm_changed.emit(self._source_row(self.currentIndex()), checked)
+        )
+
+    def contextMenuEvent(self, event: QContextMenuEvent | None) -> None:
+        assert event is not None
+        self.prewarm_action.setEnabled(self.indexAt(event.pos()).isValid())
+        super().contextMenuEvent(event)
 
     def attach_model(self, model: QAbstractItemModel) -> None:
         self.setModel(model)
         header = self.horizontalHeader()
         assert isinstance(header, QHeaderView)
         header.setSectionResizeMode(ProxyJumpsHeader.NAME.value, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(ProxyJumpsHeader.TARGET_USER.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.TARGET_HOST.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.TARGET_PORT.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.JUMP_USER.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.JUMP_HOST.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.JUMP_PORT.value, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(ProxyJumpsHeader.KEY.value, QHeaderView.ResizeMode.ResizeToContents)
+        self.fit_columns_to_contents(
+            [
+                ProxyJumpsHeader.TARGET_USER,
+                ProxyJumpsHeader.TARGET_HOST,
+                ProxyJumpsHeader.TARGET_PORT,
+                ProxyJumpsHeader.JUMP_USER,
+                ProxyJumpsHeader.JUMP_HOST,
+                ProxyJumpsHeader.JUMP_PORT,
+                ProxyJumpsHeader.KEY,
+            ]
+        )
 
 
 class ProxyJumpsWidget(QWidget):
@@ -216,13 +110,17 @@ class ProxyJumpsWidget(QWidget):
 
         self.view = ProxyJumpsView()
         self.model = ProxyJumpsModel()
-        self.view.attach_model(self.model)
+        self.filter_model = ConnectionFilterModel(self.model)
+        self.view.attach_model(self.filter_model)
         self.view.item_activated.connect(self._on_proxy_jump_activated)
         self.view.new_item.connect(self._on_new_proxy_jump)
         self.view.edit_item.connect(self._on_edit_proxy_jump)
         self.view.duplicate_item.connect(self._on_duplicate_proxy_jump)
         self.view.delete_item.connect(self._on_delete_proxy_jump)
         self.view.copy_command.connect(self._on_copy_command)
+        self.view.visible_rows_changed.connect(self._on_visible_rows_changed)
+        self.view.focused_row_changed.connect(self._on_focused_row_changed)
+        self.model.rowsInserted.connect(self._on_rows_inserted)
 
         new_button = QToolButton()
         new_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
@@ -239,8 +137,21 @@ class ProxyJumpsWidget(QWidget):
         move_up_action.triggered.connect(self._move_selected_row_up)
         move_down_action.triggered.connect(self._move_selected_row_down)
 
+        refresh_connection_status_action = QAction(get_icon("reload.png"), "Refresh Connection Status")
+        refresh_connection_status_action.triggered.connect(self._on_refresh_status)
+        refresh_connection_status_button = QToolButton()
+        refresh_connection_status_button.setStyleSheet(StyleSheets.TRANSPARENT_TOOLBUTTON)
+        refresh_connection_status_button.setDefaultAction(refresh_connection_status_action)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.filter_model.set_query)
+
         buttons_layout = QHBoxLayout()
         buttons_layout.addWidget(new_button)
+        buttons_layout.addWidget(refresh_connection_status_button)
+        buttons_layout.addWidget(self.filter_input)
         buttons_layout.addStretch()
         buttons_layout.addWidget(move_up_button)
         buttons_layout.addWidget(move_down_button)
@@ -250,39 +161,115 @@ class ProxyJumpsWidget(QWidget):
         layout.addWidget(self.view)
         self.setLayout(layout)
 
+        self.probe_service: ProbeService | None = None
+        self.multiplexer: SshMultiplexer | None = None
+
+    def attach_probe_service(self, probe_service: ProbeService):
+        """Use a probe service to check the connection status of the proxy jumps."""
+        self.probe_service = probe_service
+        self.probe_service.status_updated.connect(self.model.new_connection_status)
+        self._check_connection_statuses(self.model.endpoints())
+
+    def attach_multiplexer(self, multiplexer: SshMultiplexer):
+        """Share SSH connections between the sessions of the proxy jumps."""
+        self.multiplexer = multiplexer
+        self.view.menu.aboutToShow.connect(self._on_menu_about_to_show)
+        self.view.prewarm_changed.connect(self._on_prewarm_changed)
+
+    def _on_refresh_status(self):
+        """Refresh all connection statuses."""
+        self.model.reset_connection_statuses()
+        self._check_connection_statuses(self.model.endpoints())
+
+    def _check_connection_statuses(self, endpoints: list[Endpoint]):
+        """Queue a network check of each endpoint on the probe service."""
+        if self.probe_service is not None and endpoints:
+            self.probe_service.probe(endpoints)
+            self._on_visible_rows_changed(self.view.visible_rows())
+
+    def _on_rows_inserted(self, _parent: QModelIndex, first: int, last: int):
+        """Check the endpoints of rows that were added or fetched from the store."""
+        self._check_connection_statuses(self.model.endpoints(first, last))
+
+    def _on_visible_rows_changed(self, rows: list[int]):
+        """Check the endpoints of the rows on screen before the rest."""
+        if self.probe_service is not None and rows:
+            endpoints = [self.model.endpoint(self.model.get(row)) for row in rows]
+            self.probe_service.prioritize(endpoints, ProbePriority.VISIBLE)
+
+    def _on_focused_row_changed(self, row: int):
+        """Check the endpoint of the selected or hovered row next, and open a shared connection to it ahead of time."""
+        if not 0 <= row < len(self.model.items):
+            return
+        pj = self.model.get(row)
+        if self.probe_service is not None:
+            self.probe_service.prioritize([self.model.endpoint(pj)], ProbePriority.FOCUSED)
+        if self.multiplexer is not None:
+            jump = (pj.jump_user, pj.jump_host, pj.jump_port)
+            self.multiplexer.prewarm(PrewarmTarget(pj.target_user, pj.target_host, pj.target_port, pj.key, jump))
+
+    def _on_menu_about_to_show(self):
+        """Show whether connections through the jump host of the current row are pre-warmed."""
+        assert self.multiplexer is not None
+        row = self.view.current_row()
+        self.view.prewarm_action.setVisible(self.multiplexer.active)
+        if row is not None:
+            host = self.model.get(row).jump_host
+            self.view.prewarm_action.setChecked(host not in self.multiplexer.options.prewarm_excluded_hosts)
+
+    def _on_prewarm_changed(self, row: int, checked: bool):
+        """Change whether connections through the jump host of a row are pre-warmed."""
+        if self.multiplexer is not None:
+            self.multiplexer.set_prewarm_excluded(self.model.get(row).jump_host, not checked)
+
+    def activate(self, item_id: str):
+        """Launch a connection by ID, as if its row had been activated in the table."""
+        row = self.model.row(item_id)
+        if row is not None:
+            self.view.item_activated.emit(row)
+
     def _on_proxy_jump_activated(self, row: int):
         """Open a new terminal window and connect to the host through the proxy jump."""
-        pj = self.model.get_proxy_jump(row)
-        command = pj.command()
+        pj = self.model.get(row)
+        if self.multiplexer is not None:
+            ssh_options = self.multiplexer.ssh_options(pj.target_user, pj.target_host, pj.target_port)
+            proxy_command = self.multiplexer.proxy_command(pj.jump_user, pj.jump_host, pj.jump_port)
+            command = pj.command(ssh_options, proxy_command)
+        else:
+            command = pj.command()
         logging.info(f"Running: {command}")
-        subprocess.Popen(["start", "cmd", "/k", command], shell=True)
+        open_terminal(command)
 
     def _on_new_proxy_jump(self):
         """Open a new proxy jump dialog."""
         dialog = ProxyJumpDialog("New proxy jump")
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.add_proxy_jump(dialog.to_proxy_jump())
+            new_proxy_jump = dialog.to_proxy_jump()
+            self.model.add(new_proxy_jump)
 
     def _on_edit_proxy_jump(self, row: int):
         """Open an edit proxy jump dialog."""
-        proxy_jump = self.model.get_proxy_jump(row)
+        proxy_jump = self.model.get(row)
 
         dialog = ProxyJumpDialog("Edit proxy jump")
         dialog.populate_fields(proxy_jump)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.update_proxy_jump(row, dialog.to_proxy_jump())
+            edited_proxy_jump = dialog.to_proxy_jump()
+            self.model.update(row, edited_proxy_jump)
+            self._check_connection_statuses([self.model.endpoint(edited_proxy_jump)])
 
     def _on_duplicate_proxy_jump(self, row: int):
         """Duplicate a proxy jump into a new proxy jump dialog."""
-        proxy_jump = self.model.get_proxy_jump(row).copy()
+        proxy_jump = self.model.get(row).copy()
         proxy_jump.name += " (Copy)"
         dialog = ProxyJumpDialog("New proxy jump")
         dialog.populate_fields(proxy_jump)
         result = dialog.exec()
         if result == QDialog.DialogCode.Accepted:
-            self.model.add_proxy_jump(dialog.to_proxy_jump())
+            new_proxy_jump = dialog.to_proxy_jump()
+            self.model.add(new_proxy_jump)
 
     def _on_delete_proxy_jump(self, row: int):
         """Delete a proxy jump."""
@@ -294,11 +281,11 @@ class ProxyJumpsWidget(QWidget):
             QMessageBox.StandardButton.Yes,
         )
         if confirmed == QMessageBox.StandardButton.Yes:
-            self.model.delete_proxy_jump(row)
+            self.model.delete(row)
 
     def _on_copy_command(self, row: int):
         """Copy the SSH command to the clipboard."""
-        pj = self.model.get_proxy_jump(row)
+        pj = self.model.get(row)
         command = pj.command()
         clipboard = QApplication.clipboard()
         assert isinstance(clipboard, QClipboard)
@@ -307,12 +294,12 @@ class ProxyJumpsWidget(QWidget):
 
     def _move_selected_row_up(self):
         """Move the selected row up."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_up(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_up(selected_row)
 
     def _move_selected_row_down(self):
         """Move the selected row down."""
-        selected_index = self.view.currentIndex()
-        if selected_index.isValid():
-            self.model.move_down(selected_index.row())
+        selected_row = self.view.current_row()
+        if selected_row is not None:
+            self.model.move_down(selected_row)
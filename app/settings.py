@@ -1,7 +1,21 @@
-from app.config_file import ConfigFile
+from app.config_file import DEFAULT_WRITE_DELAY_MS, ConfigFile
+from app.connection_status import (
+    DEFAULT_BANNER_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_REFRESH_BUDGET,
+    ProbeMode,
+    ProbeOptions,
+)
+from app.connection_store import StoreBackend
+from app.utility.dns_cache import DEFAULT_NEGATIVE_TTL, DEFAULT_POSITIVE_TTL
 
 DEFAULT_THEME = "light"
 DEFAULT_PROMPT_TO_DOWNLOAD_NEW_VERSION = True
+DEFAULT_MAX_PROBES_PER_SECOND = 20.0
+DEFAULT_STATUS_MAX_AGE = 7 * 24 * 60 * 60.0  # Seconds a last known status is kept for
+DEFAULT_CONTROL_PERSIST = 10 * 60  # Seconds a master connection stays open after its last session ends
+DEFAULT_PREWARM_MAX_MASTERS = 3  # Pre-warmed masters that can be open, or opening, before any has been used
+DEFAULT_PREWARM_IDLE_TIMEOUT = 60  # Seconds a pre-warmed master stays open without a session
 
 
 class Settings:
@@ -12,7 +26,24 @@ class Settings:
     ):
         self.theme = theme
         self.prompt_to_download_new_version = prompt_to_download_new_version
-        self.source = ConfigFile("settings.json")
+        self.dns_positive_ttl = DEFAULT_POSITIVE_TTL  # Seconds to cache a resolved host name
+        self.dns_negative_ttl = DEFAULT_NEGATIVE_TTL  # Seconds to cache a host name that failed to resolve
+        self.probe_mode = ProbeMode.TCP
+        self.connect_timeout = DEFAULT_CONNECT_TIMEOUT  # Seconds to wait for a TCP connection when checking a host
+        self.banner_timeout = DEFAULT_BANNER_TIMEOUT  # Seconds to wait for the SSH identification string
+        self.refresh_budget = DEFAULT_REFRESH_BUDGET  # Seconds allowed for checking every host in one refresh
+        self.max_probes_per_second = DEFAULT_MAX_PROBES_PER_SECOND  # Limit on background connection checks
+        self.connection_store = StoreBackend.JSON  # Where the connection tables are kept
+        self.status_cache_max_age = DEFAULT_STATUS_MAX_AGE  # Seconds a last known status is shown for at startup
+        self.ssh_multiplexing = True  # Whether sessions to the same destination share one SSH connection
+        self.control_persist = DEFAULT_CONTROL_PERSIST  # Seconds a shared connection stays open once unused
+        self.prewarm = False  # Whether shared connections are opened ahead of time for the selected or hovered row
+        self.prewarm_max_masters = DEFAULT_PREWARM_MAX_MASTERS  # Unused pre-warmed connections open at once
+        self.prewarm_idle_timeout = DEFAULT_PREWARM_IDLE_TIMEOUT  # Seconds a pre-warmed connection stays open unused
+        self.prewarm_excluded_hosts: list[str] = []  # Hosts that are never pre-warmed
+        self.group_port_forwards = True  # Whether port forwards to the same server run in one SSH process
+        self.meter_port_forwards = False  # Whether the connections through port forwards are relayed and counted
+        self.source = ConfigFile("settings.json", write_delay_ms=DEFAULT_WRITE_DELAY_MS)
 
     def set_theme(self, theme: str):
         self.theme = theme
@@ -22,6 +53,38 @@ class Settings:
         self.prompt_to_download_new_version = value
         self.save()
 
+    def set_probe_mode(self, probe_mode: ProbeMode):
+        self.probe_mode = probe_mode
+        self.save()
+
+    def set_ssh_multiplexing(self, value: bool):
+        self.ssh_multiplexing = value
+        self.save()
+
+    def set_prewarm(self, value: bool):
+        self.prewarm = value
+        self.save()
+
+    def set_prewarm_excluded_hosts(self, hosts: list[str]):
+        self.prewarm_excluded_hosts = hosts
+        self.save()
+
+    def set_group_port_forwards(self, value: bool):
+        self.group_port_forwards = value
+        self.save()
+
+    def set_meter_port_forwards(self, value: bool):
+        self.meter_port_forwards = value
+        self.save()
+
+    def probe_options(self) -> ProbeOptions:
+        return ProbeOptions(
+            mode=self.probe_mode,
+            connect_timeout=self.connect_timeout,
+            banner_timeout=self.banner_timeout,
+            refresh_budget=self.refresh_budget,
+        )
+
     def load(self):
         self._from_json(self.source.load())
 
@@ -29,10 +92,64 @@ class Settings:
         self.source.save(self._to_json())
 
     def _to_json(self):
-        return {"theme": self.theme, "prompt_to_download_new_version": self.prompt_to_download_new_version}
+        return {
+            "theme": self.theme,
+            "prompt_to_download_new_version": self.prompt_to_download_new_version,
+            "dns_positive_ttl": self.dns_positive_ttl,
+            "dns_negative_ttl": self.dns_negative_ttl,
+            "probe_mode": self.probe_mode.value,
+            "connect_timeout": self.connect_timeout,
+            "banner_timeout": self.banner_timeout,
+            "refresh_budget": self.refresh_budget,
+            "max_probes_per_second": self.max_probes_per_second,
+            "connection_store": self.connection_store.value,
+            "status_cache_max_age": self.status_cache_max_age,
+            "ssh_multiplexing": self.ssh_multiplexing,
+            "control_persist": self.control_persist,
+            "prewarm": self.prewarm,
+            "prewarm_max_masters": self.prewarm_max_masters,
+            "prewarm_idle_timeout": self.prewarm_idle_timeout,
+            "prewarm_excluded_hosts": self.prewarm_excluded_hosts,
+            "group_port_forwards": self.group_port_forwards,
+            "meter_port_forwards": self.meter_port_forwards,
+        }
 
-    def _from_json(self, json: dict):
+    def _from_json(self, json: dict):  # noqa: PLR0912
         if "theme" in json:
             self.theme = json["theme"]
         if "prompt_to_download_new_version" in json:
             self.prompt_to_download_new_version = json["prompt_to_download_new_version"]
+        if "dns_positive_ttl" in json:
+            self.dns_positive_ttl = json["dns_positive_ttl"]
+        if "dns_negative_ttl" in json:
+            self.dns_negative_ttl = json["dns_negative_ttl"]
+        if json.get("probe_mode") in ProbeMode:
+            self.probe_mode = ProbeMode(json["probe_mode"])
+        if "connect_timeout" in json:
+            self.connect_timeout = json["connect_timeout"]
+        if "banner_timeout" in json:
+            self.banner_timeout = json["banner_timeout"]
+        if "refresh_budget" in json:
+            self.refresh_budget = json["refresh_budget"]
+        if "max_probes_per_second" in json:
+            self.max_probes_per_second = json["max_probes_per_second"]
+        if json.get("connection_store") in StoreBackend:
+            self.connection_store = StoreBackend(json["connection_store"])
+        if "status_cache_max_age" in json:
+            self.status_cache_max_age = json["status_cache_max_age"]
+        if "ssh_multiplexing" in json:
+            self.ssh_multiplexing = json["ssh_multiplexing"]
+        if "control_persist" in json:
+            self.control_persist = json["control_persist"]
+        if "prewarm" in json:
+            self.prewarm = json["prewarm"]
+        if "prewarm_max_masters" in json:
+            self.prewarm_max_masters = json["prewarm_max_masters"]
+        if "prewarm_idle_timeout" in json:
+            self.prewarm_idle_timeout = json["prewarm_idle_timeout"]
+        if "prewarm_excluded_hosts" in json:
+            self.prewarm_excluded_hosts = json["prewarm_excluded_hosts"]
+        if "group_port_forwards" in json:
+            self.group_port_forwards = json["group_port_forwards"]
+        if "meter_port_forwards" in json:
+            self.meter_port_forwards = json["meter_port_forwards"]
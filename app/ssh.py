@@ -1,4 +1,8 @@
+import logging
 import os
+import shlex
+import shutil
+import subprocess
 from sys import platform
 
 if platform == "win32":
@@ -7,3 +11,27 @@ elif platform == "linux":
     SSH_DIR = os.path.join(os.environ["HOME"], ".ssh")
 else:
     raise NotImplementedError(f"Platform '{platform}' is not supported")
+
+
+def terminal_arguments(command: str, system: str = platform) -> list[str]:
+    """Get the arguments that run a command in a new terminal window.
+
+    On Windows the window stays open after the command exits. Elsewhere the command is split into its arguments and
+    run by the terminal directly, without going through a shell.
+    """
+    if system == "win32":
+        return ["start", "cmd", "/k", command]
+    return ["x-terminal-emulator", "-e", *shlex.split(command)]
+
+
+def terminal_available() -> bool:
+    """Whether there is a terminal to open sessions in."""
+    return platform == "win32" or shutil.which("x-terminal-emulator") is not None
+
+
+def open_terminal(command: str) -> None:
+    """Run a command in a new terminal window."""
+    try:
+        subprocess.Popen(terminal_arguments(command), shell=platform == "win32")
+    except OSError as error:
+        logging.error(f"Could not open a terminal: {error}")
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import logging
+import threading
+from collections.abc import Iterable
+from enum import IntEnum
+
+from PySide6.QtCore import QThread, Signal
+
+from app.connection_status import ConnectionStatus, Endpoint, ProbeMode, ProbeOptions, ProbeResult, check_connection
+from app.utility.dns_cache import DnsCache
+
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class ProbePriority(IntEnum):
+    """Order in which queued targets are checked, lowest first."""
+
+    FOCUSED = 0  # The selected or hovered row
+    VISIBLE = 1  # Rows on screen
+    NORMAL = 2
+    BACKGROUND = 3  # Periodic re-checks
+
+
+class ProbeThread(QThread):
+    """Thread running a single asyncio event loop that checks the reachability of many hosts.
+
+    Targets are queued and picked up by a fixed pool of worker coroutines, so the number of threads and in-flight
+    connections stays the same no matter how many targets are submitted. Each submitted batch must finish within the
+    refresh budget of the probe options; targets that can't be checked in time are reported as UNKNOWN.
+
+    Targets are checked in order of priority, and a target that is still queued can be moved forward with
+    `prioritize`.
+    """
+
+    probe_finished = Signal(str, int, ProbeResult)  # host, port, result
+
+    def __init__(
+        self, dns_cache: DnsCache, options: ProbeOptions, max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ) -> None:
+        super().__init__()
+        self.dns_cache = dns_cache
+        self.options = options  # Replaced as a whole when the options change, so it is safe to read from the loop
+        self.max_concurrency = max_concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # Entries are (priority, sequence, host, port, deadline); the sequence keeps equal priorities in order
+        self._queue: asyncio.PriorityQueue[tuple[int, int, str, int, float]] | None = None
+        self._queued: dict[Endpoint, tuple[int, int, str, int, float]] = {}  # Live queue entry of each target
+        self._sequence = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self._ready = threading.Event()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [loop.create_task(self._worker(self._queue)) for _ in range(self.max_concurrency)]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)  # The workers and any prefetches still running
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+            self._loop = None
+
+    def submit(self, targets: Iterable[Endpoint], priority: ProbePriority = ProbePriority.NORMAL) -> None:
+        """Queue a batch of (host, port) targets to be checked. Safe to call from any thread."""
+        self._ready.wait()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._enqueue, list(targets), priority)
+
+    def prioritize(self, targets: Iterable[Endpoint], priority: ProbePriority) -> None:
+        """Move targets that are still queued forward to a better priority. Safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._reprioritize, list(targets), priority)
+
+    def prefetch(self, hosts: Iterable[str]) -> None:
+        """Resolve a batch of host names into the DNS cache ahead of time. Safe to call from any thread."""
+        self._ready.wait()
+        if self._loop is not None:
+            coroutine = self.dns_cache.prefetch(set(hosts), self.max_concurrency)
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def stop(self) -> None:
+        """Stop the event loop and wait for the thread to finish."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self.wait()
+
+    def _enqueue(self, targets: list[Endpoint], priority: ProbePriority) -> None:
+        assert self._queue is not None and self._loop is not None
+        deadline = self._loop.time() + self.options.refresh_budget
+        for host, port in targets:
+            queued = self._queued.get((host, port))
+            if queued is None or priority < queued[0]:
+                self._put(host, port, priority, deadline)
+
+    def _reprioritize(self, targets: list[Endpoint], priority: ProbePriority) -> None:
+        for host, port in targets:
+            queued = self._queued.get((host, port))
+            if queued is not None and priority < queued[0]:
+                self._put(host, port, priority, deadline=queued[4])  # Keep the refresh budget of the original batch
+
+    def _put(self, host: str, port: int, priority: ProbePriority, deadline: float) -> None:
+        assert self._queue is not None
+        entry = (priority.value, next(self._sequence), host, port, deadline)
+        self._queued[(host, port)] = entry  # Any earlier entry for the target is now stale
+        self._queue.put_nowait(entry)
+
+    async def _worker(self, queue: asyncio.PriorityQueue[tuple[int, int, str, int, float]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await queue.get()
+            _, _, host, port, deadline = entry
+            if self._queued.get((host, port)) is not entry:
+                continue  # Stale entry of a target that was moved forward or already checked
+            del self._queued[(host, port)]
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError
+                result = await asyncio.wait_for(self._check(host, port), remaining)
+            except TimeoutError:
+                result = ProbeResult(ConnectionStatus.UNKNOWN)  # Out of time for this batch
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():  # type: ignore[union-attr]
+                    raise  # The worker itself is being stopped
+                result = ProbeResult(ConnectionStatus.UNKNOWN)  # Only the check was cancelled
+            except Exception:
+                logging.exception("Checking %s:%d failed", host, port)
+                result = ProbeResult(ConnectionStatus.UNKNOWN)
+            self.probe_finished.emit(host, port, result)
+
+    async def _check(self, host: str, port: int) -> ProbeResult:
+        options = self.options
+        try:
+            addresses = await self.dns_cache.resolve_async(host)
+        except OSError:
+            return ProbeResult(ConnectionStatus.OFFLINE)
+        banner_timeout = options.banner_timeout if options.mode == ProbeMode.SSH_BANNER else None
+        return await check_connection(addresses, port, options.connect_timeout, banner_timeout)
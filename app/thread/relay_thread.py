@@ -0,0 +1,287 @@
+import asyncio
+import contextlib
+import errno
+import os
+import socket
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from sys import platform
+
+from PySide6.QtCore import QThread, Signal
+
+from app.utility.latency_history import LatencyHistory
+
+if platform == "linux":
+    import fcntl
+
+BUFFER_SIZE = 256 * 1024  # Bytes moved per read, and the size of the pipe data is spliced through
+STATS_INTERVAL = 1.0  # Seconds between reports of the traffic of each relay
+THROUGHPUT_WINDOW = 5  # Reports the throughput is averaged over
+BYTES_PER_KILOBYTE = 1000
+CLOSE_TIMEOUT = 2.0  # Seconds closing a relay can take before giving up on its connections
+# Sockets are moved between through a pipe in the kernel, rather than copied through Python, where supported
+SPLICE_SUPPORTED = hasattr(os, "splice")
+
+
+@dataclass(frozen=True)
+class TrafficStats:
+    """Traffic through a relay, as of its latest report."""
+
+    active_connections: int
+    total_connections: int
+    failed_connections: int  # Connections the relay couldn't pass on, e.g. because the tunnel was down
+    bytes_sent: int  # From the clients to the target
+    bytes_received: int  # From the target to the clients
+    send_rate: float  # Bytes per second sent, averaged over the last few seconds
+    receive_rate: float  # Bytes per second received, averaged over the last few seconds
+    connect_latency_ms: float | None  # Median time recent connections took to be passed on
+
+    def connections_text(self) -> str:
+        """Get the active and total connections for display, e.g. '2 of 15'."""
+        failed = f", {self.failed_connections} failed" if self.failed_connections else ""
+        return f"{self.active_connections} of {self.total_connections}{failed}"
+
+    def traffic_text(self) -> str:
+        return f"↑ {format_bytes(self.bytes_sent)}  ↓ {format_bytes(self.bytes_received)}"
+
+    def throughput_text(self) -> str:
+        return f"↑ {format_bytes(self.send_rate)}/s  ↓ {format_bytes(self.receive_rate)}/s"
+
+    def latency_text(self) -> str:
+        return "" if self.connect_latency_ms is None else f"{self.connect_latency_ms:.1f} ms"
+
+
+def format_bytes(count: float) -> str:
+    """Format a number of bytes for display, e.g. '1.2 MB'."""
+    units = ["B", "KB", "MB", "GB"]
+    exponent = 0
+    while count >= BYTES_PER_KILOBYTE and exponent < len(units) - 1:
+        count /= BYTES_PER_KILOBYTE
+        exponent += 1
+    return f"{count:.0f} B" if exponent == 0 else f"{count:.1f} {units[exponent]}"
+
+
+def free_local_port() -> int:
+    """Find a loopback port that nothing is listening on, e.g. for a relay to pass its connections on to."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@dataclass
+class _Relay:
+    listener: socket.socket
+    upstream_port: int
+    serving: asyncio.Task | None = None
+    connections: set[asyncio.Task] = field(default_factory=set)
+    total_connections: int = 0
+    failed_connections: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    samples: deque[tuple[float, int, int]] = field(default_factory=lambda: deque(maxlen=THROUGHPUT_WINDOW + 1))
+
+
+class RelayThread(QThread):
+    """Thread running a single asyncio event loop that relays local TCP connections and meters their traffic.
+
+    Each relay listens on a loopback port and passes every connection on to another loopback port, e.g. the one an
+    ssh tunnel listens on, counting the connections, their connect latency and the bytes in each direction. On Linux
+    the bytes are spliced from one socket to the other through a pipe without being copied into Python; elsewhere
+    they are copied through a large buffer. The traffic of every relay is reported every `STATS_INTERVAL` seconds.
+    """
+
+    stats_updated = Signal(str, TrafficStats)  # ID of the relay, stats
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._relays: dict[str, _Relay] = {}  # ID -> relay, only used from the loop
+        self._latencies = LatencyHistory()  # Connect latency of each relay, only used from the loop
+        self._ready = threading.Event()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.call_later(STATS_INTERVAL, self._report)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)  # The relays and their connections
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            for relay in self._relays.values():
+                relay.listener.close()
+            loop.close()
+            self._loop = None
+
+    def open(self, relay_id: str, listen_port: int, upstream_port: int) -> None:
+        """Start relaying the connections to a loopback port to another one. Safe to call from any thread.
+
+        Raises:
+            OSError: If the port can't be listened on, e.g. because it is in use.
+        """
+        self._ready.wait()
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            if platform != "win32":
+                # Allow listening again straight after a relay closes; on Windows this would allow sharing the port
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind(("127.0.0.1", listen_port))
+            listener.listen(socket.SOMAXCONN)
+            listener.setblocking(False)
+        except OSError:
+            listener.close()
+            raise
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._open, relay_id, _Relay(listener, upstream_port))
+
+    def close(self, relay_id: str) -> None:
+        """Stop a relay and its connections, waiting for its port to be freed. Safe to call from any thread."""
+        if self._loop is not None:
+            future = asyncio.run_coroutine_threadsafe(self._close(relay_id), self._loop)
+            with contextlib.suppress(TimeoutError):
+                future.result(CLOSE_TIMEOUT)
+
+    def stop(self) -> None:
+        """Stop the event loop and wait for the thread to finish."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self.wait()
+
+    def _open(self, relay_id: str, relay: _Relay) -> None:
+        assert self._loop is not None
+        relay.serving = self._loop.create_task(self._serve(relay_id, relay))
+        relay.samples.append((self._loop.time(), 0, 0))
+        self._relays[relay_id] = relay
+
+    async def _close(self, relay_id: str) -> None:
+        relay = self._relays.pop(relay_id, None)
+        if relay is None:
+            return
+        tasks = [task for task in (relay.serving, *relay.connections) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        relay.listener.close()
+        self._latencies.discard(relay_id)
+
+    async def _serve(self, relay_id: str, relay: _Relay) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            client, _ = await loop.sock_accept(relay.listener)
+            task = loop.create_task(self._connect(relay_id, relay, client))
+            relay.connections.add(task)
+            task.add_done_callback(relay.connections.discard)
+
+    async def _connect(self, relay_id: str, relay: _Relay, client: socket.socket) -> None:
+        loop = asyncio.get_running_loop()
+        relay.total_connections += 1
+        started = loop.time()
+        upstream = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        with client, upstream:
+            client.setblocking(False)
+            upstream.setblocking(False)
+            try:
+                await loop.sock_connect(upstream, ("127.0.0.1", relay.upstream_port))
+            except OSError:
+                relay.failed_connections += 1
+                return
+            self._latencies.record(relay_id, (loop.time() - started) * 1000)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            await asyncio.gather(self._pump(relay, client, upstream, True), self._pump(relay, upstream, client, False))
+
+    async def _pump(self, relay: _Relay, source: socket.socket, destination: socket.socket, sending: bool) -> None:
+        """Move the bytes from one socket to the other until the source is done sending, then pass that on."""
+        try:
+            if SPLICE_SUPPORTED:
+                try:
+                    await self._splice(relay, source, destination, sending)
+                except OSError as error:
+                    if error.errno not in (errno.EINVAL, errno.ENOSYS):
+                        raise
+                    await self._copy(relay, source, destination, sending)  # Not supported by these sockets
+            else:
+                await self._copy(relay, source, destination, sending)
+            destination.shutdown(socket.SHUT_WR)
+        except OSError:
+            # Reset, so end the other direction too
+            for sock in (source, destination):
+                with contextlib.suppress(OSError):
+                    sock.shutdown(socket.SHUT_RDWR)
+
+    async def _copy(self, relay: _Relay, source: socket.socket, destination: socket.socket, sending: bool) -> None:
+        loop = asyncio.get_running_loop()
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        while count := await loop.sock_recv_into(source, buffer):
+            await loop.sock_sendall(destination, view[:count])
+            self._count(relay, count, sending)
+
+    async def _splice(self, relay: _Relay, source: socket.socket, destination: socket.socket, sending: bool) -> None:
+        flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+        read_end, write_end = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        try:
+            with contextlib.suppress(OSError):
+                fcntl.fcntl(write_end, fcntl.F_SETPIPE_SZ, BUFFER_SIZE)
+            while True:
+                try:
+                    count = os.splice(source.fileno(), write_end, BUFFER_SIZE, flags=flags)
+                except BlockingIOError:
+                    await _ready(source, writing=False)
+                    continue
+                if count == 0:
+                    return
+                while count > 0:
+                    try:
+                        moved = os.splice(read_end, destination.fileno(), count, flags=flags)
+                    except BlockingIOError:
+                        await _ready(destination, writing=True)
+                        continue
+                    count -= moved
+                    self._count(relay, moved, sending)
+        finally:
+            os.close(read_end)
+            os.close(write_end)
+
+    def _count(self, relay: _Relay, count: int, sending: bool) -> None:
+        if sending:
+            relay.bytes_sent += count
+        else:
+            relay.bytes_received += count
+
+    def _report(self) -> None:
+        assert self._loop is not None
+        now = self._loop.time()
+        for relay_id, relay in self._relays.items():
+            relay.samples.append((now, relay.bytes_sent, relay.bytes_received))
+            since, sent, received = relay.samples[0]
+            elapsed = max(now - since, STATS_INTERVAL)
+            stats = TrafficStats(
+                active_connections=len(relay.connections),
+                total_connections=relay.total_connections,
+                failed_connections=relay.failed_connections,
+                bytes_sent=relay.bytes_sent,
+                bytes_received=relay.bytes_received,
+                send_rate=(relay.bytes_sent - sent) / elapsed,
+                receive_rate=(relay.bytes_received - received) / elapsed,
+                connect_latency_ms=self._latencies.percentile(relay_id, 50),
+            )
+            self.stats_updated.emit(relay_id, stats)
+        self._loop.call_later(STATS_INTERVAL, self._report)
+
+
+async def _ready(sock: socket.socket, writing: bool) -> None:
+    """Wait for a non-blocking socket to be readable or writable."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    add, remove = (loop.add_writer, loop.remove_writer) if writing else (loop.add_reader, loop.remove_reader)
+    add(sock.fileno(), lambda: future.done() or future.set_result(None))
+    try:
+        await future
+    finally:
+        remove(sock.fileno())
@@ -0,0 +1,112 @@
+import asyncio
+import socket
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+DEFAULT_POSITIVE_TTL = 300.0
+DEFAULT_NEGATIVE_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 4096
+
+
+@dataclass
+class DnsCacheStats:
+    hits: int
+    misses: int
+    size: int
+
+
+class DnsCache:
+    """Thread-safe cache of host name resolutions.
+
+    Successful and failed lookups are kept for separate amounts of time, and the least recently used host names are
+    evicted once the cache is full.
+    """
+
+    def __init__(
+        self,
+        positive_ttl: float = DEFAULT_POSITIVE_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Host name -> (expiry time, addresses). An empty list of addresses is a failed lookup.
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Lookups running on the event loop, so that concurrent misses for the same host share one lookup
+        self._pending: dict[str, asyncio.Task[list[str]]] = {}
+
+    async def resolve_async(self, host: str) -> list[str]:
+        """Get the addresses of a host, resolving it on the running event loop if it isn't cached.
+
+        Raises:
+            socket.gaierror: If the host could not be resolved.
+        """
+        addresses = self._lookup(host)
+        if addresses is None:
+            pending = self._pending.get(host)
+            if pending is None:
+                pending = self._pending[host] = asyncio.get_running_loop().create_task(self._resolve(host))
+                pending.add_done_callback(lambda _: self._pending.pop(host, None))
+            # Shielded so that a cancelled caller doesn't cancel the lookup the other callers are waiting for
+            addresses = await asyncio.shield(pending)
+        return _check_resolved(host, addresses)
+
+    async def prefetch(self, hosts: set[str], max_concurrency: int) -> None:
+        """Resolve many host names in parallel so that later lookups are served from the cache."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def prefetch_one(host: str) -> None:
+            async with semaphore:
+                try:
+                    await self.resolve_async(host)
+                except OSError:
+                    pass  # Cached as a failed lookup
+
+        await asyncio.gather(*(prefetch_one(host) for host in hosts))
+
+    def stats(self) -> DnsCacheStats:
+        with self._lock:
+            return DnsCacheStats(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+    async def _resolve(self, host: str) -> list[str]:
+        try:
+            addresses = _addresses(await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM))
+        except (OSError, UnicodeError):
+            addresses = []
+        self._store(host, addresses)
+        return addresses
+
+    def _lookup(self, host: str) -> list[str] | None:
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(host)
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, host: str, addresses: list[str]) -> None:
+        ttl = self.positive_ttl if addresses else self.negative_ttl
+        with self._lock:
+            self._entries[host] = (time.monotonic() + ttl, addresses)
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _addresses(address_infos: list) -> list[str]:
+    # getaddrinfo returns one entry per socket type/protocol, so the same address can appear more than once
+    return list(dict.fromkeys(str(address_info[4][0]) for address_info in address_infos))
+
+
+def _check_resolved(host: str, addresses: list[str]) -> list[str]:
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, f"Could not resolve '{host}'")
+    return addresses
@@ -0,0 +1,100 @@
+import json
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+
+
+def iter_json_array(file: TextIO, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of the list stored under a key of a JSON object one at a time.
+
+    The file is read in chunks and each element is decoded as soon as it is complete, so memory use is bounded by the
+    largest element rather than the size of the file. Other members of the object are skipped.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a JSON object, or the value of the key is not a list.
+    """
+    reader = _Reader(file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        member = reader.decode()
+        reader.expect(":")
+        if member == key:
+            yield from _iter_array(reader)
+            return
+        reader.decode()  # Skip the value of another member
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
+
+
+def _iter_array(reader: "_Reader") -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.decode()
+        if reader.peek() == "]":
+            return
+        reader.expect(",")
+
+
+class _Reader:
+    """A window onto a file being decoded, refilled from the file as values are consumed."""
+
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.at_end = False
+        self.decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        """Get the next character that isn't whitespace without consuming it, or an empty string at the end."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position : self.position + 1]
+
+    def expect(self, character: str) -> None:
+        found = self.peek()
+        if found != character:
+            raise json.JSONDecodeError(f"Expecting '{character}'", self.buffer, self.position)
+        self.position += 1
+
+    def decode(self) -> Any:
+        """Decode and consume the next value, reading more of the file until the value is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut off by the end of the buffer (e.g. "2." of "2.25") may continue in the next chunk
+            if not _may_continue(value, self.buffer, end) or not self._fill():
+                self.position = end
+                return value
+
+    def _fill(self) -> bool:
+        if self.at_end:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.at_end = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+
+def _may_continue(value: Any, buffer: str, end: int) -> bool:
+    is_number = isinstance(value, int | float) and not isinstance(value, bool)
+    return is_number and (end == len(buffer) or buffer[end] not in _DELIMITERS)
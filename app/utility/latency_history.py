@@ -0,0 +1,81 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Hashable
+
+DEFAULT_SAMPLES_PER_KEY = 32
+DEFAULT_MAX_KEYS = 10000
+
+
+class LatencyHistory:
+    """Fixed-size history of latency samples for many keys (e.g. endpoints).
+
+    The samples of every key live in one flat array of 32-bit floats, with each key owning a ring buffer slot of
+    `samples_per_key` values. Memory use is bounded by `max_keys`; once it is reached the slot of the least recently
+    recorded key is reused.
+    """
+
+    def __init__(self, samples_per_key: int = DEFAULT_SAMPLES_PER_KEY, max_keys: int = DEFAULT_MAX_KEYS) -> None:
+        self.samples_per_key = samples_per_key
+        self.max_keys = max_keys
+        self._slots: OrderedDict[Hashable, int] = OrderedDict()
+        self._samples = array("f")
+        self._counts = array("H")  # Number of samples recorded in each slot, up to samples_per_key
+        self._next = array("H")  # Position the next sample is written to in each slot
+        self._free: list[int] = []  # Slots of discarded keys, reused before the arrays grow
+
+    def record(self, key: Hashable, latency_ms: float) -> None:
+        """Add a latency sample for a key, overwriting the oldest sample once its history is full."""
+        slot = self._slot(key)
+        position = self._next[slot]
+        self._samples[slot * self.samples_per_key + position] = latency_ms
+        self._next[slot] = (position + 1) % self.samples_per_key
+        self._counts[slot] = min(self._counts[slot] + 1, self.samples_per_key)
+
+    def samples(self, key: Hashable) -> list[float]:
+        """Get the latency samples of a key, oldest first."""
+        slot = self._slots.get(key)
+        if slot is None:
+            return []
+        start = slot * self.samples_per_key
+        count = self._counts[slot]
+        ring = self._samples[start : start + count]
+        if count < self.samples_per_key:
+            return ring.tolist()
+        position = self._next[slot]
+        return ring[position:].tolist() + ring[:position].tolist()
+
+    def percentile(self, key: Hashable, percent: float) -> float | None:
+        """Get a percentile (0-100) of the latency samples of a key using the nearest-rank method."""
+        samples = sorted(self.samples(key))
+        if not samples:
+            return None
+        rank = max(1, -(-len(samples) * percent // 100))  # Ceiling division
+        return samples[int(rank) - 1]
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the latency samples of a key, e.g. once it is no longer used."""
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            return slot
+
+        if self._free:
+            slot = self._free.pop()
+            self._counts[slot] = 0
+            self._next[slot] = 0
+        elif len(self._slots) < self.max_keys:
+            slot = len(self._slots)
+            self._samples.extend([0.0] * self.samples_per_key)
+            self._counts.append(0)
+            self._next.append(0)
+        else:
+            _, slot = self._slots.popitem(last=False)
+            self._counts[slot] = 0
+            self._next[slot] = 0
+        self._slots[key] = slot
+        return slot
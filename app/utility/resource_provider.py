@@ -1,8 +1,24 @@
 import os
 import sys
+from collections.abc import Iterable
+from dataclasses import dataclass
 
 from PySide6.QtGui import QIcon, QPixmap
 
+# Icons and pixmaps are decoded once per process and shared, so repainting table cells never reads from disk
+_icons: dict[str, QIcon] = {}
+_pixmaps: dict[str, QPixmap] = {}
+_hits = 0
+_misses = 0
+
+
+@dataclass
+class ResourceCacheStats:
+    hits: int
+    misses: int
+    icons: int
+    pixmaps: int
+
 
 def get_resource_path(resource: str) -> str:
     path = f"resources/{resource}"
@@ -12,8 +28,40 @@ def get_resource_path(resource: str) -> str:
 
 
 def get_icon(png: str) -> QIcon:
-    return QIcon(get_resource_path(png))
+    global _hits, _misses  # noqa: PLW0603
+    icon = _icons.get(png)
+    if icon is None:
+        _misses += 1
+        icon = _icons[png] = QIcon(_decode(png))
+    else:
+        _hits += 1
+    return icon
 
 
 def get_pixmap(png: str) -> QPixmap:
-    return QPixmap(get_resource_path(png))
+    """Get a copy of a shared pixmap, which can be changed without changing the one the icons are made from."""
+    global _hits, _misses  # noqa: PLW0603
+    pixmap = _pixmaps.get(png)
+    if pixmap is None:
+        _misses += 1
+        pixmap = _decode(png)
+    else:
+        _hits += 1
+    return QPixmap(pixmap)  # Implicitly shared, so the image data is only copied if the copy is painted on
+
+
+def preload_icons(pngs: Iterable[str]) -> None:
+    """Decode icons ahead of time, e.g. at startup, so that they are ready when first painted."""
+    for png in pngs:
+        get_icon(png)
+
+
+def resource_cache_stats() -> ResourceCacheStats:
+    return ResourceCacheStats(hits=_hits, misses=_misses, icons=len(_icons), pixmaps=len(_pixmaps))
+
+
+def _decode(png: str) -> QPixmap:
+    pixmap = _pixmaps.get(png)
+    if pixmap is None:
+        pixmap = _pixmaps[png] = QPixmap(get_resource_path(png))
+    return pixmap
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+
+from app.common import FETCH_PAGE_SIZE
+from app.config_file import ConfigFile
+from app.direct_connection_page import DirectConnectionsModel
+
+ROWS = FETCH_PAGE_SIZE * 4
+
+
+@pytest.fixture
+def connections_file(tmp_path, monkeypatch):
+    """Write a direct connections file with more rows than fit in one page, and get its path."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    _ = QCoreApplication.instance() or QCoreApplication([])
+    path = ConfigFile("direct_connections.json").path
+    rows = [{"id": f"id-{row}", "name": f"host-{row}", "host": f"host-{row}.test"} for row in range(ROWS)]
+    ConfigFile("direct_connections.json").save({"direct_connections": rows})
+    return path
+
+
+def _names(path: str) -> list[str]:
+    with open(path) as file:
+        return [row["name"] for row in json.load(file)["direct_connections"]]
+
+
+def test_large_table_stays_paged_after_an_edit(connections_file):
+    model = DirectConnectionsModel()
+    assert model.rowCount() == FETCH_PAGE_SIZE
+
+    edited = model.get(1).copy()
+    edited.name = "edited"
+    model.update(1, edited)
+    ConfigFile.flush_all()
+
+    assert model.rowCount() == FETCH_PAGE_SIZE
+    assert _names(connections_file) == ["host-0", "edited", *(f"host-{row}" for row in range(2, ROWS))]
+
+    model.fetch_all()  # Carries on from the rewritten file
+    assert [item.name for item in model.items] == _names(connections_file)
+
+
+def test_legacy_table_stays_paged_when_given_ids(connections_file):
+    with open(connections_file) as file:
+        rows = json.load(file)["direct_connections"]
+    ConfigFile("direct_connections.json").save({"direct_connections": [{**row, "id": ""} for row in rows]})
+
+    model = DirectConnectionsModel()
+    ConfigFile.flush_all()
+
+    assert model.rowCount() == FETCH_PAGE_SIZE
+    with open(connections_file) as file:
+        saved = json.load(file)["direct_connections"]
+    assert [row["id"] for row in saved[:FETCH_PAGE_SIZE]] == [item.id for item in model.items]
+    assert all(row["id"] == "" for row in saved[FETCH_PAGE_SIZE:])  # Given IDs as they are fetched
+    assert len(saved) == ROWS
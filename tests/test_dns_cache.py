@@ -0,0 +1,31 @@
+import asyncio
+import socket
+
+from app.utility.dns_cache import DnsCache
+
+
+def test_cancelled_caller_does_not_cancel_shared_lookup():
+    cache = DnsCache()
+    lookups = 0
+
+    async def getaddrinfo(host, port, *, type):
+        nonlocal lookups
+        lookups += 1
+        await asyncio.sleep(0.05)
+        return [(socket.AF_INET, type, 6, "", ("192.0.2.1", 0))]
+
+    async def main():
+        asyncio.get_running_loop().getaddrinfo = getaddrinfo
+        first = asyncio.create_task(cache.resolve_async("example.test"))
+        second = asyncio.create_task(cache.resolve_async("example.test"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(main())
+
+    assert isinstance(first, asyncio.CancelledError)
+    assert second == ["192.0.2.1"]
+    assert lookups == 1
+    assert asyncio.run(cache.resolve_async("example.test")) == ["192.0.2.1"]  # Cached by the shared lookup
+    assert lookups == 1
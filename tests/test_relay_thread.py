@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+
+import pytest
+from PySide6.QtCore import Qt
+
+from app.thread import relay_thread
+from app.thread.relay_thread import RelayThread, TrafficStats, free_local_port
+
+
+class _StatsRecorder:
+    """Latest stats reported for each relay, recorded on the relay thread."""
+
+    def __init__(self, thread: RelayThread) -> None:
+        self.latest: dict[str, TrafficStats] = {}
+        self._lock = threading.Lock()
+        thread.stats_updated.connect(self._record, Qt.ConnectionType.DirectConnection)
+
+    def _record(self, relay_id: str, stats: TrafficStats) -> None:
+        with self._lock:
+            self.latest[relay_id] = stats
+
+    def wait_for(self, relay_id: str, predicate, timeout: float = 5.0) -> TrafficStats:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                stats = self.latest.get(relay_id)
+            if stats is not None and predicate(stats):
+                return stats
+            time.sleep(0.01)
+        raise AssertionError(f"Stats of relay '{relay_id}' never matched, last reported: {stats}")
+
+
+def _serve(handle) -> int:
+    """Start a loopback server that handles each connection on its own thread, and get its port."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def accept():
+        while True:
+            connection, _ = server.accept()
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def _echo(connection: socket.socket) -> None:
+    with connection:
+        while data := connection.recv(65536):
+            connection.sendall(data)
+
+
+def _receive_all(connection: socket.socket) -> bytes:
+    chunks = []
+    while chunk := connection.recv(65536):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@pytest.fixture(params=[True, False], ids=["splice", "copy"])
+def relays(request, monkeypatch):
+    if request.param and not relay_thread.SPLICE_SUPPORTED:
+        pytest.skip("splice isn't supported on this platform")
+    monkeypatch.setattr(relay_thread, "SPLICE_SUPPORTED", request.param)
+    monkeypatch.setattr(relay_thread, "STATS_INTERVAL", 0.05)
+    thread = RelayThread()
+    recorder = _StatsRecorder(thread)
+    thread.start()
+    yield thread, recorder
+    thread.stop()
+
+
+def test_relays_connections_to_upstream(relays):
+    thread, recorder = relays
+    listen_port = free_local_port()
+    thread.open("echo", listen_port, _serve(_echo))
+
+    with socket.create_connection(("127.0.0.1", listen_port)) as client:
+        client.sendall(b"hello")
+        assert client.recv(5) == b"hello"
+
+    stats = recorder.wait_for("echo", lambda stats: stats.total_connections == 1 and stats.active_connections == 0)
+    assert stats.failed_connections == 0
+    assert stats.connect_latency_ms is not None
+
+
+def test_passes_on_half_close(relays):
+    def reply_after_eof(connection: socket.socket) -> None:
+        with connection:
+            received = _receive_all(connection)
+            connection.sendall(f"got {len(received)}".encode())
+
+    thread, _ = relays
+    listen_port = free_local_port()
+    thread.open("half-close", listen_port, _serve(reply_after_eof))
+
+    with socket.create_connection(("127.0.0.1", listen_port)) as client:
+        client.sendall(b"x" * 1000)
+        client.shutdown(socket.SHUT_WR)  # The upstream only replies once it sees the end of the request
+        assert _receive_all(client) == b"got 1000"
+
+
+def test_counts_failed_upstream_connections(relays):
+    thread, recorder = relays
+    listen_port = free_local_port()
+    thread.open("down", listen_port, free_local_port())  # Nothing listens upstream
+
+    with socket.create_connection(("127.0.0.1", listen_port)) as client:
+        assert _receive_all(client) == b""
+
+    stats = recorder.wait_for("down", lambda stats: stats.failed_connections == 1)
+    assert stats.total_connections == 1
+    assert stats.connect_latency_ms is None
+
+
+def test_counts_bytes_in_each_direction(relays):
+    def send_more(connection: socket.socket) -> None:
+        with connection:
+            received = _receive_all(connection)
+            connection.sendall(received * 3)
+
+    thread, recorder = relays
+    listen_port = free_local_port()
+    thread.open("bytes", listen_port, _serve(send_more))
+
+    with socket.create_connection(("127.0.0.1", listen_port)) as client:
+        client.sendall(b"x" * 300_000)
+        client.shutdown(socket.SHUT_WR)
+        assert len(_receive_all(client)) == 900_000
+
+    stats = recorder.wait_for("bytes", lambda stats: stats.active_connections == 0 and stats.bytes_received == 900_000)
+    assert stats.bytes_sent == 300_000
+
+
+def test_closing_forgets_connect_latency(relays):
+    thread, recorder = relays
+    listen_port = free_local_port()
+    upstream_port = _serve(_echo)
+    thread.open("reopened", listen_port, upstream_port)
+    with socket.create_connection(("127.0.0.1", listen_port)) as client:
+        client.sendall(b"hello")
+        client.recv(5)
+    recorder.wait_for("reopened", lambda stats: stats.connect_latency_ms is not None)
+
+    thread.close("reopened")
+    thread.open("reopened", listen_port, upstream_port)
+
+    stats = recorder.wait_for("reopened", lambda stats: stats.total_connections == 0)  # Reported by the new relay
+    assert stats.connect_latency_ms is None
@@ -0,0 +1,25 @@
+from app.ssh import terminal_arguments
+
+
+def test_windows_runs_the_command_in_cmd():
+    command = "ssh -o ControlPath=none u@host -p22"
+    assert terminal_arguments(command, "win32") == ["start", "cmd", "/k", command]
+
+
+def test_linux_passes_the_command_as_arguments():
+    command = "ssh -o 'ProxyCommand=ssh -W %h:%p u@jump' u@target -p22"
+    assert terminal_arguments(command, "linux") == [
+        "x-terminal-emulator",
+        "-e",
+        "ssh",
+        "-o",
+        "ProxyCommand=ssh -W %h:%p u@jump",
+        "u@target",
+        "-p22",
+    ]
+
+
+def test_linux_does_not_run_the_command_through_a_shell():
+    arguments = terminal_arguments("ssh u@host;touch /tmp/x -p22", "linux")
+    assert "sh" not in arguments
+    assert arguments[2:] == ["ssh", "u@host;touch", "/tmp/x", "-p22"]